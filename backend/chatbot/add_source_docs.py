@@ -6,30 +6,54 @@ This script demonstrates how to manually add source documents information
 to chatbot responses when the automatic integration isn't working.
 """
 
+import io
 import sys
 import os
+import operator
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(__file__))
-from langchain_rag_chatbot import LangChainLegalRAGChatbot
+if __package__:
+    from .langchain_rag_chatbot import LangChainLegalRAGChatbot, build_rag_system
+else:
+    # Run as a script: make the sibling module importable
+    sys.path.append(os.path.dirname(__file__))
+    from langchain_rag_chatbot import LangChainLegalRAGChatbot, build_rag_system
 
-def extract_source_documents_manual(rag_response):
-    """Manually extract source documents from RAG response."""
+# Number of streamed tokens written between stdout flushes
+_FLUSH_EVERY = 8
+
+# Fixed rows shown for every source document
+_DOC_TEMPLATE = (
+    "📋 Source {source_number} (Score: {relevance_score:.3f}):\n"
+    "   Type: {document_type}\n"
+    "   Jurisdiction: {jurisdiction}\n"
+    "   Status: {law_status}"
+)
+
+# Search result fields read for every source document
+_FIELDS = operator.attrgetter(
+    'score', 'document_type', 'jurisdiction', 'law_status', 'content',
+    'citation_chain', 'dates', 'file_name', 'section'
+)
+
+def extract_source_documents_manual(search_results):
+    """Manually extract source documents from already-retrieved search results."""
     
     source_documents = []
     
-    for i, result in enumerate(rag_response['search_results'][:5], 1):  # Top 5 results
+    for i, result in enumerate(search_results[:5], 1):  # Top 5 results
+        score, dtype, juris, status, content, cites, dates, fname, section = _FIELDS(result)
+        preview = content[:200]
         doc_info = {
             'source_number': i,
-            'relevance_score': result.score,
-            'document_type': getattr(result, 'document_type', 'Unknown'),
-            'jurisdiction': getattr(result, 'jurisdiction', 'Unknown'),
-            'law_status': getattr(result, 'law_status', 'Unknown'),
-            'content_preview': result.content[:200] + "..." if len(result.content) > 200 else result.content,
-            'citations': getattr(result, 'citation_chain', []),
-            'dates': getattr(result, 'dates', []),
-            'file_name': getattr(result, 'file_name', 'Unknown'),
-            'section': getattr(result, 'section', 'Unknown')
+            'relevance_score': score,
+            'document_type': dtype,
+            'jurisdiction': juris,
+            'law_status': status,
+            'content_preview': preview + "..." if len(preview) < len(content) else preview,
+            'citations': cites,
+            'dates': dates,
+            'file_name': fname,
+            'section': section
         }
         source_documents.append(doc_info)
     
@@ -38,28 +62,29 @@ def extract_source_documents_manual(rag_response):
 def display_source_documents(source_documents):
     """Display source documents in a formatted way."""
     
-    print("📄 **Source Documents Used:**")
-    print("=" * 50)
+    lines = ["📄 **Source Documents Used:**", "=" * 50]
     
     for doc in source_documents[:3]:
-        print(f"📋 Source {doc['source_number']} (Score: {doc['relevance_score']:.3f}):")
-        print(f"   Type: {doc['document_type']}")
-        print(f"   Jurisdiction: {doc['jurisdiction']}")
-        print(f"   Status: {doc['law_status']}")
+        lines.append(_DOC_TEMPLATE.format_map(doc))
         
-        if doc['file_name'] != 'Unknown':
-            print(f"   File: {doc['file_name']}")
+        file_name = doc.get('file_name')
+        if file_name and file_name != 'Unknown':
+            lines.append(f"   File: {file_name}")
         
-        if doc['section'] != 'Unknown':
-            print(f"   Section: {doc['section']}")
+        section = doc.get('section')
+        if section and section != 'Unknown':
+            lines.append(f"   Section: {section}")
         
-        if doc['citations']:
-            print(f"   Citations: {', '.join(doc['citations'][:3])}")
+        citations = doc.get('citations')
+        if citations:
+            lines.append(f"   Citations: {', '.join(citations[:3])}")
         
-        print(f"   Preview: {doc['content_preview']}")
-        print("-" * 30)
+        lines.append(f"   Preview: {doc['content_preview']}")
+        lines.append("-" * 30)
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
-def test_with_source_documents():
+def test_with_source_documents(rag_system=None):
     """Test the chatbot with manual source document extraction."""
     
     print("🧪 Testing Chatbot with Source Documents")
@@ -71,7 +96,9 @@ def test_with_source_documents():
             model="gpt-3.5-turbo",
             max_tokens=600,
             temperature=0.3,
-            streaming=False
+            streaming=False,
+            cache_retrieval=True,
+            rag_system=rag_system
         )
         
         # Test question
@@ -90,14 +117,19 @@ def test_with_source_documents():
         
         # Manually extract and display source documents
         if 'metadata' in response:
-            # Access the RAG system directly to get source documents
-            rag_response = chatbot.rag_system.ask_question(question, max_results=5)
-            source_documents = extract_source_documents_manual(rag_response)
+            metadata = response['metadata']
+            
+            # Nothing to display when retrieval came back empty
+            if metadata['search_quality']['total_results'] == 0:
+                print("📭 No source documents retrieved.")
+                return
+            
+            # Reuse the search results retrieved by ask() instead of re-running retrieval
+            source_documents = extract_source_documents_manual(metadata['search_results'])
             
             display_source_documents(source_documents)
             
             # Display other metadata
-            metadata = response['metadata']
             print("\n📊 **Search Quality:**")
             print(f"   Top Score: {metadata['search_quality']['top_score']:.3f}")
             print(f"   Results Found: {metadata['search_quality']['total_results']}")
@@ -112,7 +144,7 @@ def test_with_source_documents():
     except Exception as e:
         print(f"❌ Error: {e}")
 
-def streaming_with_source_documents():
+def streaming_with_source_documents(rag_system=None):
     """Test streaming with source documents."""
     
     print("📡 Streaming with Source Documents")
@@ -124,7 +156,9 @@ def streaming_with_source_documents():
             model="gpt-3.5-turbo",
             max_tokens=500,
             temperature=0.3,
-            streaming=True
+            streaming=True,
+            cache_retrieval=True,
+            rag_system=rag_system
         )
         
         question = "What are the Fourth Amendment protections for digital privacy?"
@@ -133,24 +167,32 @@ def streaming_with_source_documents():
         print("\n🤖 Streaming Response:")
         print("-" * 40)
         
-        # Stream the response
-        full_response = None
-        for chunk in chatbot.ask_streaming(question, include_metadata=True):
-            if chunk['type'] == 'content':
-                print(chunk['content'], end='', flush=True)
-            elif chunk['type'] == 'complete':
-                full_response = chunk['response']
-                break
-            elif chunk['type'] == 'error':
-                print(f"\n❌ Error: {chunk['response']['answer']}")
-                return
+        # Stream the response; source documents are prepared as soon as
+        # retrieval finishes so they are ready by the time the stream ends
+        source_documents = None
+        buf = io.StringIO()
+        write = sys.stdout.write
+        for n, token in enumerate(chatbot.ask_streaming_tokens(question, include_metadata=True), 1):
+            buf.write(token)
+            write(token)
+            if n % _FLUSH_EVERY == 0:
+                sys.stdout.flush()
+            if source_documents is None and chatbot.last_search_results is not None:
+                source_documents = extract_source_documents_manual(chatbot.last_search_results)
+        sys.stdout.flush()
+        full_text = buf.getvalue()
+        
+        full_response = chatbot.last_response
+        if full_response and 'error' in full_response:
+            print(f"\n❌ Error: {full_response['answer']}")
+            return
         
         if full_response:
             print("\n\n" + "=" * 50)
             
-            # Manually extract and display source documents
-            rag_response = chatbot.rag_system.ask_question(question, max_results=5)
-            source_documents = extract_source_documents_manual(rag_response)
+            # Display the source documents prefetched during streaming
+            if source_documents is None:
+                source_documents = extract_source_documents_manual(full_response['metadata']['search_results'])
             
             display_source_documents(source_documents)
             
@@ -158,6 +200,8 @@ def streaming_with_source_documents():
             if 'confidence_score' in full_response:
                 confidence = full_response['confidence_score']
                 print(f"\n🎯 **Confidence:** {confidence:.1%}")
+            
+            print(f"📝 **Streamed:** {len(full_text)} characters")
         
         print("\n✅ Streaming test completed!")
         
@@ -177,13 +221,14 @@ def main():
         else:
             print("❌ Unknown mode. Use: 'test' or 'streaming'")
     else:
-        # Run both tests
+        # Run both tests against one shared retrieval backend
         print("Running both tests...\n")
+        rag_system = build_rag_system()
         
-        test_with_source_documents()
+        test_with_source_documents(rag_system)
         print("\n" + "="*60 + "\n")
         
-        streaming_with_source_documents()
+        streaming_with_source_documents(rag_system)
 
 if __name__ == "__main__":
     main()
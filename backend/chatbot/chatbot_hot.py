@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Chatbot Hot Paths
+
+Pure, type-annotated string helpers that run on every question: prompt type
+routing, use-of-force detection and source document extraction. They are kept
+free of LangChain and class state so the module can be compiled with mypyc
+(`mypyc chatbot/chatbot_hot.py`); the interpreted module is used otherwise.
+"""
+
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Any, Iterable, Iterator, Tuple
+
+# Aho-Corasick keyword matching (optional, falls back to a compiled regex)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Keyword lists used to route questions and flag safety concerns
+CITATION_KEYWORDS = ('cite', 'citation', 'statute', 'case', 'authority', 'legal basis', 'what law', 'which law')
+FOLLOW_UP_KEYWORDS = ('also', 'additionally', 'furthermore', 'moreover', 'what about', 'how about', 'and', 'but')
+USE_OF_FORCE_KEYWORDS = (
+    'use of force', 'deadly force', 'lethal force', 'shooting', 'firearm',
+    'weapon', 'assault', 'battery', 'self-defense', 'defense of others',
+    'reasonable force', 'excessive force', 'police shooting', 'officer involved'
+)
+STATE_INDICATORS = (
+    'wisconsin', 'state of wisconsin', 'wi statutes', 'wisconsin statutes',
+    'state sovereignty', 'state jurisdiction'
+)
+FEDERAL_INDICATORS = ('united states', 'u.s.', 'federal', 'congress', 'supreme court')
+
+def _keyword_re(keywords: tuple) -> "re.Pattern[str]":
+    """Compile a keyword list into one substring-matching alternation."""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+def _build_prompt_keyword_matcher() -> Any:
+    """Build one matcher that finds citation and follow-up keywords in a single pass."""
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for category, keywords in (('citation', CITATION_KEYWORDS), ('follow_up', FOLLOW_UP_KEYWORDS)):
+            for keyword in keywords:
+                automaton.add_word(keyword, category)
+        automaton.make_automaton()
+        return automaton
+    
+    return re.compile(
+        f"(?P<citation>{'|'.join(map(re.escape, CITATION_KEYWORDS))})"
+        f"|(?P<follow_up>{'|'.join(map(re.escape, FOLLOW_UP_KEYWORDS))})"
+    )
+
+PROMPT_KEYWORDS = _build_prompt_keyword_matcher()
+UOF_RE = _keyword_re(USE_OF_FORCE_KEYWORDS)
+STATE_RE = _keyword_re(STATE_INDICATORS)
+FEDERAL_RE = _keyword_re(FEDERAL_INDICATORS)
+
+# Section detection patterns for source documents
+STATUTE_RE = re.compile(r'(\d+\.\d+[A-Z]*)')
+LEADING_STATUTE_RE = re.compile(r'(?:^\s*|\.\s*|\(\d+\)\s*)(\d+\.\d+[A-Z]*)')
+CHAPTER_RE = re.compile(r'CHAPTER\s+(\d+[A-Z]*)', re.IGNORECASE)
+SECTION_RE = re.compile(r'SECTION\s+(\d+\.\d+)', re.IGNORECASE)
+
+# Metadata fields checked, in priority order, for a source document's file name and section
+FILE_NAME_KEYS = ('file_name', 'original_file_name', 'document_name', 'title', 'module_title')
+SECTION_KEYS = ('section_number', 'section_title', 'section_type')
+
+def determine_prompt_type(question: str, has_history: bool) -> str:
+    """
+    Determine which prompt template to use based on the question.
+    
+    Args:
+        question: The legal question asked
+        has_history: Whether there are earlier exchanges to follow up on
+        
+    Returns:
+        'citation_summary', 'follow_up' or 'legal_qa'
+    """
+    question_lower = question.lower()
+    
+    # One scan finds both kinds of keywords; citation keywords take priority
+    if AHOCORASICK_AVAILABLE:
+        categories = [category for _, category in PROMPT_KEYWORDS.iter(question_lower)]
+    else:
+        categories = [match.lastgroup for match in PROMPT_KEYWORDS.finditer(question_lower)]
+    
+    # Citation-focused questions
+    if 'citation' in categories:
+        return 'citation_summary'
+    
+    # Follow-up questions
+    if categories and has_history:
+        return 'follow_up'
+    
+    # Default to general legal Q&A
+    return 'legal_qa'
+
+def detect_use_of_force(question: str) -> bool:
+    """Detect if the question is related to use of force."""
+    return UOF_RE.search(question.lower()) is not None
+
+@dataclass(slots=True, frozen=True)
+class SourceDocPreview:
+    """Display information for one source document used in an answer."""
+    source_number: int
+    relevance_score: float
+    document_type: str
+    jurisdiction: str
+    law_status: str
+    content_preview: str
+    citations: Tuple[str, ...]
+    dates: Tuple[str, ...]
+    file_name: str
+    original_file_name: str  # Used for download links
+    module_title: str
+    section: str
+
+def iter_source_documents(search_results: Iterable[Any]) -> Iterator[SourceDocPreview]:
+    """Lazily extract and format source document information, one search result at a time."""
+    
+    for i, result in enumerate(search_results, 1):
+        # Extract file name from metadata
+        metadata = result.metadata or {}
+        file_name = next((metadata[key] for key in FILE_NAME_KEYS if metadata.get(key)), 'Unknown')
+        
+        # Extract section information with better detection
+        # First priority: Use section information from document processing
+        section = next((metadata[key] for key in SECTION_KEYS if metadata.get(key)), None)
+        if section is None:
+            section = 'Unknown'
+            
+            # Fallback: Try to extract section from content
+            content = result.content[:200]  # Look at first 200 chars for better coverage
+            
+            # Look for statute numbers like "1.04", "1.05", etc.
+            # Find ALL statute numbers in the content
+            statute_matches = STATUTE_RE.findall(content)
+            
+            if statute_matches:
+                # If multiple statute numbers found, try to determine the most relevant one
+                if len(statute_matches) > 1:
+                    # Prefer a statute number that starts the text, a sentence or a
+                    # numbered item; it is more likely to be the main section discussed
+                    leading = set(LEADING_STATUTE_RE.findall(content))
+                    section = next(
+                        (match for match in statute_matches if match in leading),
+                        statute_matches[0]  # If no clear pattern, use the first one
+                    )
+                else:
+                    # Only one statute number found
+                    section = statute_matches[0]
+            else:
+                # Fallback to chapter patterns
+                chapter_match = CHAPTER_RE.search(content)
+                section_match = SECTION_RE.search(content)
+                if chapter_match:
+                    section = f"CHAPTER {chapter_match.group(1)}"
+                elif section_match:
+                    section = f"Section {section_match.group(1)}"
+        
+        # Determine jurisdiction with better detection
+        jurisdiction = getattr(result, 'jurisdiction', 'Unknown')
+        if jurisdiction == 'Unknown' or jurisdiction == 'federal':
+            # Check content for Wisconsin indicators
+            content_lower = result.content.lower()
+            if STATE_RE.search(content_lower):
+                jurisdiction = 'state'
+            elif FEDERAL_RE.search(content_lower):
+                jurisdiction = 'federal'
+        
+        yield SourceDocPreview(
+            source_number=i,
+            relevance_score=result.score,
+            document_type=getattr(result, 'document_type', 'Unknown'),
+            jurisdiction=jurisdiction,
+            law_status=getattr(result, 'law_status', 'Unknown'),
+            content_preview=result.content[:200] + "..." if len(result.content) > 200 else result.content,
+            citations=tuple(getattr(result, 'citation_chain', ())),
+            dates=tuple(metadata.get('dates', ())),
+            file_name=file_name,
+            original_file_name=metadata.get('original_file_name', file_name),
+            module_title=metadata.get('module_title', 'Unknown'),
+            section=section
+        )
+
+def extract_source_documents(search_results: Iterable[Any], limit: int = 5) -> List[SourceDocPreview]:
+    """Extract and format source documents information for the top search results."""
+    return list(islice(iter_source_documents(search_results), limit))
@@ -7,43 +7,78 @@ A user-friendly interface for the LangChain-based legal RAG chatbot.
 
 import sys
 import os
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(__file__))
-from langchain_rag_chatbot import LangChainLegalRAGChatbot, format_langchain_response
+import asyncio
+import functools
+import threading
+if __package__:
+    from .langchain_rag_chatbot import LangChainLegalRAGChatbot, format_langchain_response
+else:
+    # Run as a script: make the sibling module importable
+    sys.path.append(os.path.dirname(__file__))
+    from langchain_rag_chatbot import LangChainLegalRAGChatbot, format_langchain_response
+
+# Async line editor for the REPL (falls back to a blocking input() loop)
+try:
+    from prompt_toolkit import PromptSession
+    PROMPT_TOOLKIT_AVAILABLE = True
+except ImportError:
+    PROMPT_TOOLKIT_AVAILABLE = False
+
+_PROMPT = "❓ Your legal question: "
+
+@functools.lru_cache(maxsize=4)
+def _get_chatbot(model: str, max_tokens: int, temperature: float, streaming: bool = False):
+    """Return a cached chatbot for the given configuration."""
+    return LangChainLegalRAGChatbot(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        streaming=streaming,
+        cache_retrieval=True
+    )
+
+# Static banner and help text, built once at import
+_BANNER = "\n".join([
+    "=" * 70,
+    "🤖 LANGCHAIN LEGAL RAG CHATBOT",
+    "=" * 70,
+    "💰 Cost-effective: GPT-3.5-turbo with LangChain",
+    "⚖️ Specialized: Legal document Q&A",
+    "🔍 Advanced: Hybrid search + intelligent generation",
+    "🔗 Framework: LangChain for optimal RAG performance",
+    "=" * 70,
+]) + "\n"
+
+_HELP = "\n".join([
+    "\n💡 **Available Commands:**",
+    "   - Type your legal question to get an answer",
+    "   - 'help': Show this help message",
+    "   - 'history': Show conversation history",
+    "   - 'clear': Clear conversation history",
+    "   - 'stats': Show usage statistics",
+    "   - 'quit' or 'exit': End the session",
+    "\n💡 **Example Questions:**",
+    "   - What does 18 U.S.C. 2703 say about digital evidence?",
+    "   - What are the Fourth Amendment protections for digital privacy?",
+    "   - What does Smith v. Maryland say about privacy?",
+    "   - What are the requirements for digital evidence collection?",
+    "   - What training is available for digital forensics?",
+    "   - What are the DOJ policies on evidence preservation?",
+    "   - What legal authorities support digital evidence collection?",
+    "\n💡 **LangChain Features:**",
+    "   - Intelligent prompt selection based on question type",
+    "   - Conversation memory and context management",
+    "   - Advanced retrieval with relevance scoring",
+    "   - Cost-effective GPT-3.5-turbo integration",
+]) + "\n"
 
 def print_banner():
     """Print the chatbot banner."""
-    print("=" * 70)
-    print("🤖 LANGCHAIN LEGAL RAG CHATBOT")
-    print("=" * 70)
-    print("💰 Cost-effective: GPT-3.5-turbo with LangChain")
-    print("⚖️ Specialized: Legal document Q&A")
-    print("🔍 Advanced: Hybrid search + intelligent generation")
-    print("🔗 Framework: LangChain for optimal RAG performance")
-    print("=" * 70)
+    sys.stdout.write(_BANNER)
 
 def print_help():
     """Print help information."""
-    print("\n💡 **Available Commands:**")
-    print("   - Type your legal question to get an answer")
-    print("   - 'help': Show this help message")
-    print("   - 'history': Show conversation history")
-    print("   - 'clear': Clear conversation history")
-    print("   - 'stats': Show usage statistics")
-    print("   - 'quit' or 'exit': End the session")
-    print("\n💡 **Example Questions:**")
-    print("   - What does 18 U.S.C. 2703 say about digital evidence?")
-    print("   - What are the Fourth Amendment protections for digital privacy?")
-    print("   - What does Smith v. Maryland say about privacy?")
-    print("   - What are the requirements for digital evidence collection?")
-    print("   - What training is available for digital forensics?")
-    print("   - What are the DOJ policies on evidence preservation?")
-    print("   - What legal authorities support digital evidence collection?")
-    print("\n💡 **LangChain Features:**")
-    print("   - Intelligent prompt selection based on question type")
-    print("   - Conversation memory and context management")
-    print("   - Advanced retrieval with relevance scoring")
-    print("   - Cost-effective GPT-3.5-turbo integration")
+    sys.stdout.write(_HELP)
 
 def print_history(chatbot):
     """Print conversation history."""
@@ -53,150 +88,201 @@ def print_history(chatbot):
         print("📭 No conversation history yet.")
         return
     
-    print(f"\n📚 **Conversation History ({len(history)} exchanges):**")
-    print("=" * 50)
-    
-    for i, exchange in enumerate(history, 1):
-        print(f"\n{i}. **Question:** {exchange['question']}")
-        print(f"   **Answer:** {exchange['answer'][:200]}...")
-        print(f"   **Time:** {exchange['timestamp']}")
-        print("-" * 30)
+    lines = [f"\n📚 **Conversation History ({len(history)} exchanges):**", "=" * 50]
+    lines.extend(
+        f"\n{i}. **Question:** {exchange['question']}\n"
+        f"   **Answer:** {exchange['answer_preview']}\n"
+        f"   **Time:** {exchange['timestamp']}\n" + "-" * 30
+        for i, exchange in enumerate(history, 1)
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_stats(chatbot):
     """Print usage statistics."""
     stats = chatbot.get_usage_stats()
     
-    print(f"\n📊 **Usage Statistics:**")
-    print("=" * 30)
-    print(f"   Total Conversations: {stats['total_conversations']}")
-    print(f"   Model Used: {stats['model_used']}")
-    print(f"   Max Tokens: {stats['max_tokens']}")
-    print(f"   Temperature: {stats['temperature']}")
-    print(f"   LangChain Components: {', '.join(stats['langchain_components'])}")
+    lines = [
+        "\n📊 **Usage Statistics:**",
+        "=" * 30,
+        f"   Total Conversations: {stats['total_conversations']}",
+        f"   Model Used: {stats['model_used']}",
+        f"   Max Tokens: {stats['max_tokens']}",
+        f"   Temperature: {stats['temperature']}",
+        f"   LangChain Components: {', '.join(stats['langchain_components'])}",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
-def interactive_mode():
-    """Run the interactive LangChain chatbot."""
+def _bye(chatbot):
+    print("\n👋 Thank you for using the LangChain Legal RAG Chatbot!")
+    return True
+
+def _clear(chatbot):
+    chatbot.clear_history()
+    print("🗑️ Conversation history cleared.")
+
+# REPL commands; a handler returning True ends the session
+_COMMANDS = {
+    'quit': _bye,
+    'exit': _bye,
+    'q': _bye,
+    'help': lambda chatbot: print_help(),
+    'history': print_history,
+    'clear': _clear,
+    'stats': print_stats,
+}
+
+def _print_processing(question: str):
+    """Print the progress lines shown before a question is answered."""
+    print(f"\n🔍 Processing: {question}")
+    print("⏳ Generating response with LangChain...")
+
+def _print_response(response):
+    """Print a formatted chatbot response."""
+    print("\n" + "=" * 50)
+    print(format_langchain_response(response))
+    print("=" * 50)
+
+def _repl(chatbot):
+    """Run the question loop on blocking input() while a daemon thread keeps the LLM connection warm."""
     
-    print_banner()
+    stop_keepalive = threading.Event()
+    threading.Thread(target=chatbot.keepalive, args=(stop_keepalive,), daemon=True).start()
     
     try:
-        # Initialize chatbot
-        print("🔧 Initializing LangChain chatbot...")
-        chatbot = LangChainLegalRAGChatbot(
-            model="gpt-3.5-turbo",
-            max_tokens=800,
-            temperature=0.3
-        )
-        print("✅ LangChain chatbot ready!")
-        print_help()
-        
         while True:
             try:
                 # Get user input
                 print("\n" + "-" * 50)
-                question = input("❓ Your legal question: ").strip()
-                
-                # Handle commands
-                if question.lower() in ['quit', 'exit', 'q']:
-                    print("\n👋 Thank you for using the LangChain Legal RAG Chatbot!")
-                    break
+                question = input(_PROMPT).strip()
                 
-                elif question.lower() == 'help':
-                    print_help()
+                command = _COMMANDS.get(question.lower())
+                if command:
+                    if command(chatbot):
+                        break
                     continue
                 
-                elif question.lower() == 'history':
-                    print_history(chatbot)
+                if not question:
+                    print("❌ Please enter a question.")
                     continue
                 
-                elif question.lower() == 'clear':
-                    chatbot.clear_history()
-                    print("🗑️ Conversation history cleared.")
-                    continue
+                # Process the question
+                _print_processing(question)
+                _print_response(chatbot.ask(question, include_metadata=True))
                 
-                elif question.lower() == 'stats':
-                    print_stats(chatbot)
+            except (KeyboardInterrupt, EOFError):
+                print("\n\n👋 Goodbye!")
+                break
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+                print("Please try again with a different question.")
+    finally:
+        stop_keepalive.set()
+
+async def _arepl(chatbot):
+    """Run the question loop while a keepalive task keeps the LLM connection warm."""
+    
+    session = PromptSession()
+    keepalive = asyncio.create_task(chatbot.akeepalive())
+    
+    try:
+        while True:
+            try:
+                # Get user input
+                print("\n" + "-" * 50)
+                question = (await session.prompt_async(_PROMPT)).strip()
+                
+                command = _COMMANDS.get(question.lower())
+                if command:
+                    if command(chatbot):
+                        break
                     continue
                 
-                elif not question:
+                if not question:
                     print("❌ Please enter a question.")
                     continue
                 
                 # Process the question
-                print(f"\n🔍 Processing: {question}")
-                print("⏳ Generating response with LangChain...")
-                
-                response = chatbot.ask(question, include_metadata=True)
-                formatted_response = format_langchain_response(response)
+                _print_processing(question)
+                _print_response(await chatbot.aask(question, include_metadata=True))
                 
-                print("\n" + "=" * 50)
-                print(formatted_response)
-                print("=" * 50)
-                
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\n👋 Goodbye!")
                 break
             except Exception as e:
                 print(f"\n❌ Error: {e}")
                 print("Please try again with a different question.")
+    finally:
+        keepalive.cancel()
+
+def interactive_mode():
+    """Run the interactive LangChain chatbot."""
+    
+    print_banner()
     
+    try:
+        # Initialize chatbot
+        print("🔧 Initializing LangChain chatbot...")
+        chatbot = _get_chatbot("gpt-3.5-turbo", 800, 0.3)
+        print("✅ LangChain chatbot ready!")
+        print_help()
     except Exception as e:
         print(f"❌ Failed to initialize LangChain chatbot: {e}")
         print("Make sure to set OPENAI_API_KEY in your .env file")
+        return
+    
+    try:
+        if PROMPT_TOOLKIT_AVAILABLE:
+            asyncio.run(_arepl(chatbot))
+        else:
+            _repl(chatbot)
+    except KeyboardInterrupt:
+        print("\n\n👋 Goodbye!")
 
-def quick_test():
-    """Run a quick test of the LangChain chatbot."""
+async def _aquick_test():
+    """Run the quick test through the async chatbot API."""
     
-    print("🧪 Quick Test Mode - LangChain")
+    print("🧪 Quick Test Mode - LangChain (async)")
     print("=" * 40)
     
     try:
-        chatbot = LangChainLegalRAGChatbot(
-            model="gpt-3.5-turbo",
-            max_tokens=600,
-            temperature=0.3
-        )
+        chatbot = _get_chatbot("gpt-3.5-turbo", 600, 0.3)
         
         test_question = "What does 18 U.S.C. 2703 say about digital evidence?"
         print(f"❓ Test Question: {test_question}")
         print("-" * 40)
         
-        response = chatbot.ask(test_question, include_metadata=True)
-        formatted_response = format_langchain_response(response)
-        print(formatted_response)
+        response = await chatbot.aask(test_question, include_metadata=True)
+        print(format_langchain_response(response))
         
         print("\n✅ LangChain test completed successfully!")
         
     except Exception as e:
         print(f"❌ LangChain test failed: {e}")
 
-def test_langchain_features():
-    """Test specific LangChain features."""
+async def _atest_langchain_features():
+    """Run the features test with the independent questions issued concurrently."""
     
-    print("🔗 LangChain Features Test")
+    print("🔗 LangChain Features Test (async)")
     print("=" * 40)
     
     try:
-        chatbot = LangChainLegalRAGChatbot(
-            model="gpt-3.5-turbo",
-            max_tokens=600,
-            temperature=0.3
-        )
+        chatbot = _get_chatbot("gpt-3.5-turbo", 600, 0.3)
         
-        # Test different prompt types
         test_questions = [
             "What does 18 U.S.C. 2703 say about digital evidence?",  # General Q&A
             "What legal authorities support digital evidence collection?",  # Citation-focused
-            "And what about Fourth Amendment protections?",  # Follow-up
         ]
+        follow_up = "And what about Fourth Amendment protections?"  # Follow-up
+        
+        # Batch the independent questions; the follow-up needs their answers in history
+        responses = await chatbot.abatch_ask(test_questions, include_metadata=True)
+        responses.append(await chatbot.aask(follow_up, include_metadata=True))
+        test_questions.append(follow_up)
         
-        for i, question in enumerate(test_questions, 1):
+        for i, (question, response) in enumerate(zip(test_questions, responses), 1):
             print(f"\n{i}. Testing: {question}")
             print("-" * 30)
             
-            response = chatbot.ask(question, include_metadata=True)
-            
-            # Show LangChain-specific info
             if 'metadata' in response and 'langchain_components' in response['metadata']:
                 langchain_info = response['metadata']['langchain_components']
                 print(f"   Prompt Type: {langchain_info['prompt_type']}")
@@ -216,9 +302,9 @@ def main():
         mode = sys.argv[1].lower()
         
         if mode == "test":
-            quick_test()
+            asyncio.run(_aquick_test())
         elif mode == "features":
-            test_langchain_features()
+            asyncio.run(_atest_langchain_features())
         elif mode == "interactive":
             interactive_mode()
         else:
@@ -7,17 +7,29 @@ Integrates with our advanced retrieval system for optimal performance.
 """
 
 import os
+import re
 import json
+import asyncio
+import time
+import pickle
+import tempfile
 import logging
-from typing import Dict, List, Any, Optional
+import functools
+import threading
+import importlib.util
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from datetime import datetime
+from collections import deque, OrderedDict
+import httpx
+import numpy as np
 from dotenv import load_dotenv
 
 # LangChain imports
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableBranch
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
@@ -28,6 +40,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from rag_system.advanced_rag_system import AdvancedLegalRAG
 from vector_db.vector_database import LegalVectorDatabase
+from chatbot.semantic_cache import SemanticResponseCache
+from chatbot.chatbot_hot import (
+    USE_OF_FORCE_KEYWORDS,
+    SourceDocPreview,
+    determine_prompt_type,
+    detect_use_of_force,
+    extract_source_documents
+)
 
 # Load environment variables
 load_dotenv()
@@ -36,6 +56,136 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every OpenAI request the chatbot makes
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# Bump when the prompt templates change so stale warm-start files are rebuilt
+_WARM_START_VERSION = 1
+
+# Conversation history limits
+_MAX_HISTORY = 10
+_RETRIEVAL_CACHE_SIZE = 128
+_CHAT_HISTORY_EXCHANGES = 6  # Exchanges passed to the LLM as chat history
+_HISTORY_CONTEXT_CHARS = 200
+_ANSWER_PREVIEW_CHARS = 200  # Answer preview shown when listing the history
+
+# Cached answers are replayed to streaming clients in chunks of this many characters
+_CACHED_REPLAY_CHARS = 30
+
+# One search result in the LLM context
+_SOURCE_TEMPLATE = (
+    "Source {i} (Relevance: {score:.3f}):\n"
+    "Document Type: {document_type}\n"
+    "Jurisdiction: {jurisdiction}\n"
+    "Law Status: {law_status}\n"
+    "Content: {content}\n"
+    "{citations}"
+)
+
+@dataclass(slots=True)
+class SafetyWarnings:
+    """Safety flags computed for each answer."""
+    use_of_force_warning: bool = False
+    jurisdiction_warning: bool = False
+    outdated_warning: bool = False
+    low_confidence_warning: bool = False
+    legal_disclaimer: bool = False  # Disabled for law enforcement use
+    
+    @property
+    def mask(self) -> int:
+        """The flags packed into one int, one _WARN_* bit per field."""
+        return (self.use_of_force_warning * _WARN_USE_OF_FORCE
+                | self.jurisdiction_warning * _WARN_JURISDICTION
+                | self.outdated_warning * _WARN_OUTDATED
+                | self.low_confidence_warning * _WARN_LOW_CONFIDENCE
+                | self.legal_disclaimer * _WARN_DISCLAIMER)
+
+# Bits used to pack SafetyWarnings flags into a response's 'warning_mask'
+_WARN_USE_OF_FORCE = 1
+_WARN_JURISDICTION = 2
+_WARN_OUTDATED = 4
+_WARN_LOW_CONFIDENCE = 8
+_WARN_DISCLAIMER = 16
+
+# Safety warnings attached to every error response, copied per response
+_ERROR_WARNINGS = SafetyWarnings(low_confidence_warning=True, legal_disclaimer=True)
+_ERROR_SAFETY_WARNINGS = asdict(_ERROR_WARNINGS)
+_ERROR_WARNING_MASK = _ERROR_WARNINGS.mask
+
+# Confidence multipliers: by result count (<2, 2-4, >=5), and for high semantic
+# similarity, high keyword matching and low citation relevance respectively
+_RESULT_COUNT_MULTIPLIERS = np.array([0.8, 1.0, 1.1])
+_RELEVANCE_MULTIPLIERS = np.array([1.05, 1.05, 0.9])
+
+# First four-digit year in a date string
+_YEAR_RE = re.compile(r'(\d{4})')
+
+def _answer_preview(answer: str) -> str:
+    """Shorten an answer for history listings."""
+    if len(answer) > _ANSWER_PREVIEW_CHARS:
+        return answer[:_ANSWER_PREVIEW_CHARS] + '...'
+    return answer
+
+def build_rag_system() -> AdvancedLegalRAG:
+    """Build the advanced RAG system (vector index and embedding model)."""
+    try:
+        vector_db = LegalVectorDatabase()
+        rag_system = AdvancedLegalRAG(vector_db)
+        logger.info("Advanced RAG system initialized successfully")
+        return rag_system
+    except Exception as e:
+        logger.error(f"Failed to initialize RAG system: {e}")
+        raise
+
+def _to_soa(search_results: List[Any]) -> Dict[str, Any]:
+    """Materialize the per-result fields scanned by the safety checks as parallel arrays."""
+    return {
+        'has_state': np.fromiter(
+            (bool(result.jurisdiction) and result.jurisdiction.lower() != 'federal' for result in search_results),
+            dtype=bool, count=len(search_results)
+        ),
+        'dates': [date_str for result in search_results for date_str in (result.dates or ())]
+    }
+
+def _results_soa(rag_response: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the struct-of-arrays view of a retrieval, building it on first use."""
+    soa = rag_response.get('soa')
+    if soa is None:
+        soa = rag_response['soa'] = _to_soa(rag_response['search_results'])
+    return soa
+
+class _MinuteRateLimiter:
+    """Async limiter for requests and tokens sent within a rolling minute."""
+    
+    def __init__(self, max_requests_per_minute: int, max_tokens_per_minute: int):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self._sent = deque()  # (monotonic time, tokens) per request
+        self._tokens_in_window = 0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: int):
+        """Wait until a request of the given token cost fits in the current window."""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0][0] >= 60:
+                    self._tokens_in_window -= self._sent.popleft()[1]
+                
+                # An empty window always admits one request, however large
+                if not self._sent or (
+                    len(self._sent) < self.max_requests_per_minute and
+                    self._tokens_in_window + tokens <= self.max_tokens_per_minute
+                ):
+                    self._sent.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                
+                wait = 60 - (now - self._sent[0][0])
+            
+            await asyncio.sleep(wait)
+
 class LangChainLegalRAGChatbot:
     """
     LangChain-based RAG chatbot for legal document Q&A.
@@ -65,7 +215,13 @@ class LangChainLegalRAGChatbot:
                  model: str = "gpt-3.5-turbo",
                  max_tokens: int = 1000,
                  temperature: float = 0.3,
-                 streaming: bool = False):
+                 streaming: bool = False,
+                 cache_retrieval: bool = False,
+                 rag_system: Optional[AdvancedLegalRAG] = None,
+                 semantic_cache: bool = False,
+                 semantic_cache_path: Optional[str] = None,
+                 semantic_cache_ttl: Optional[float] = None,
+                 warm_start_path: Optional[str] = None):
         
         # Only initialize once
         if self._initialized:
@@ -78,19 +234,33 @@ class LangChainLegalRAGChatbot:
             model: OpenAI model to use (default: gpt-3.5-turbo for cost efficiency)
             max_tokens: Maximum tokens for response generation
             temperature: Response creativity (0.0 = focused, 1.0 = creative)
+            streaming: Whether the LLM streams tokens
+            cache_retrieval: Reuse retrieval results for repeated questions
+            rag_system: Existing RAG system to share (built from scratch if omitted)
+            semantic_cache: Answer near-duplicate questions from a response cache
+            semantic_cache_path: File prefix to load/save the response cache
+            semantic_cache_ttl: Seconds a cached response stays valid (None to never expire)
+            warm_start_path: Pickle file caching the parsed prompt templates across runs
         """
         # Initialize OpenAI API key
         self.api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in .env file")
         
+        # Long-lived HTTP clients so every call (invoke, stream, ainvoke) reuses
+        # pooled connections instead of paying a new TCP/TLS handshake
+        self.http_client = httpx.Client(limits=_HTTP_LIMITS, http2=_HTTP2_AVAILABLE)
+        self.http_async_client = httpx.AsyncClient(limits=_HTTP_LIMITS, http2=_HTTP2_AVAILABLE)
+        
         # Initialize LangChain components
         self.llm = ChatOpenAI(
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
             openai_api_key=self.api_key,
-            streaming=streaming
+            streaming=streaming,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client
         )
         
         self.streaming = streaming
@@ -99,35 +269,89 @@ class LangChainLegalRAGChatbot:
         self.max_tokens = max_tokens
         self.temperature = temperature
         
-        # Initialize advanced RAG system
-        try:
-            vector_db = LegalVectorDatabase()
-            self.rag_system = AdvancedLegalRAG(vector_db)
-            logger.info("Advanced RAG system initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize RAG system: {e}")
-            raise
+        # Advanced RAG system (or the one passed in), built on first use
+        self._rag_system = rag_system
+        self._rag_lock = threading.RLock()
         
-        # Conversation history
-        self.conversation_history = []
+        # Retrieval cache keyed by (normalized question, jurisdiction, max_results)
+        self.cache_retrieval = cache_retrieval
+        self._retrieval_cache = OrderedDict()
+        self._retrieval_cache_lock = threading.Lock()
+        
+        # Rendered context / metrics strings, shared by ask() and ask_streaming()
+        self._context_cache = functools.lru_cache(maxsize=256)(self._format_context)
+        self._metrics_cache = functools.lru_cache(maxsize=256)(self._format_search_metrics)
+        
+        # Semantic response cache, built with the RAG system since it shares its embedding model
+        self._semantic_cache_enabled = semantic_cache
+        self._semantic_cache_path = semantic_cache_path
+        self._semantic_cache_ttl = semantic_cache_ttl
+        self._semantic_cache = None
+        
+        # Conversation history (oldest exchanges drop off automatically)
+        self.conversation_history = deque(maxlen=_MAX_HISTORY)
+        
+        # LangChain messages for the most recent exchanges, built once per exchange
+        self._msg_history = deque(maxlen=2 * _CHAT_HISTORY_EXCHANGES)
+        
+        # Keeps each exchange's question and answer adjacent in both histories
+        self._history_lock = threading.Lock()
+        
+        # Final state of the most recent ask_streaming_tokens() call
+        self.last_response = None
+        self.last_search_results = None
         
         # Safety and accuracy features
         self.confidence_threshold = 0.7
-        self.use_of_force_keywords = [
-            'use of force', 'deadly force', 'lethal force', 'shooting', 'firearm',
-            'weapon', 'assault', 'battery', 'self-defense', 'defense of others',
-            'reasonable force', 'excessive force', 'police shooting', 'officer involved'
-        ]
+        self.use_of_force_keywords = list(USE_OF_FORCE_KEYWORDS)
         
-        # Create LangChain prompt templates
-        self.prompt_templates = self._create_prompt_templates()
+        # Create LangChain prompt templates (or load them from the warm-start file)
+        self.warm_start_path = warm_start_path
+        self.prompt_templates = self._load_prompt_templates()
         
         # Create LangChain chains
-        self.chains = self._create_chains()
+        self.chain = self._create_chain()
         
         # Mark as initialized
         self._initialized = True
     
+    @property
+    def rag_system(self) -> AdvancedLegalRAG:
+        """The advanced RAG system, built on first access."""
+        if self._rag_system is None:
+            with self._rag_lock:
+                if self._rag_system is None:
+                    self._rag_system = build_rag_system()
+        return self._rag_system
+    
+    @property
+    def semantic_cache(self) -> Optional[SemanticResponseCache]:
+        """The semantic response cache, or None if disabled or no embedding model is available."""
+        if self._semantic_cache_enabled and self._semantic_cache is None:
+            with self._rag_lock:
+                if self._semantic_cache is None:
+                    embedding_model = getattr(self.rag_system.vector_db, 'embedding_model', None)
+                    if embedding_model is None:
+                        self._semantic_cache_enabled = False
+                        return None
+                    self._semantic_cache = SemanticResponseCache(
+                        embedding_model,
+                        path=self._semantic_cache_path,
+                        ttl=self._semantic_cache_ttl
+                    )
+        return self._semantic_cache
+    
+    def preload(self) -> threading.Thread:
+        """
+        Build the RAG system in a background thread.
+        
+        Returns:
+            The started daemon thread
+        """
+        thread = threading.Thread(target=lambda: self.rag_system, name="rag-preload", daemon=True)
+        thread.start()
+        return thread
+    
     def _create_prompt_templates(self) -> Dict[str, ChatPromptTemplate]:
         """Create LangChain prompt templates for different use cases."""
         
@@ -220,291 +444,270 @@ Search Quality Metrics:
             'follow_up': follow_up_template
         }
     
-    def _create_chains(self) -> Dict[str, Any]:
-        """Create LangChain chains for different prompt types."""
+    def _load_prompt_templates(self) -> Dict[str, ChatPromptTemplate]:
+        """
+        Load prompt templates from the warm-start file, creating and saving them if needed.
         
-        chains = {}
+        Chains hold the live LLM client, so only the templates are cached; the
+        semantic cache persists itself separately via semantic_cache_path.
+        """
+        if not self.warm_start_path:
+            return self._create_prompt_templates()
+        
+        if os.path.exists(self.warm_start_path):
+            try:
+                with open(self.warm_start_path, 'rb') as f:
+                    data = pickle.load(f)
+                if data.get('version') == _WARM_START_VERSION:
+                    logger.info(f"Loaded prompt templates from {self.warm_start_path}")
+                    return data['prompts']
+                logger.info("Warm-start file is from an older version, rebuilding")
+            except Exception as e:
+                logger.warning(f"Failed to load warm-start file: {e}")
+        
+        prompt_templates = self._create_prompt_templates()
+        
+        # Write to a temp file and rename so readers never see a partial file
+        try:
+            directory = os.path.dirname(os.path.abspath(self.warm_start_path))
+            with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+                pickle.dump({'version': _WARM_START_VERSION, 'prompts': prompt_templates}, f)
+            os.replace(f.name, self.warm_start_path)
+        except Exception as e:
+            logger.warning(f"Failed to save warm-start file: {e}")
         
-        for prompt_type, template in self.prompt_templates.items():
-            chain = (
-                {
-                    "context": lambda x: x["context"],
-                    "search_metrics": lambda x: x["search_metrics"],
-                    "chat_history": lambda x: x["chat_history"],
-                    "question": lambda x: x["question"]
-                }
-                | template
-                | self.llm
-                | StrOutputParser()
-            )
-            chains[prompt_type] = chain
+        return prompt_templates
+    
+    def _create_chain(self) -> RunnableBranch:
+        """
+        Create one LangChain chain that routes to the prompt for input['prompt_type'].
+        
+        All branches share the same LLM binding and output parser; unknown
+        prompt types fall through to the general legal Q&A prompt.
+        """
         
-        return chains
+        parser = StrOutputParser()
+        branches = {
+            prompt_type: template | self.llm | parser
+            for prompt_type, template in self.prompt_templates.items()
+        }
+        default = branches.pop('legal_qa')
+        
+        return RunnableBranch(
+            *[
+                (lambda x, prompt_type=prompt_type: x["prompt_type"] == prompt_type, chain)
+                for prompt_type, chain in branches.items()
+            ],
+            default
+        )
     
-    def _determine_prompt_type(self, question: str) -> str:
-        """Determine which prompt template to use based on the question."""
-        question_lower = question.lower()
+    def _raw_rag_ask(self, question: str, jurisdiction: str, max_results: int) -> Dict[str, Any]:
+        """Run retrieval without caching."""
+        return self.rag_system.ask_question(
+            question, 
+            jurisdiction=jurisdiction, 
+            max_results=max_results
+        )
+    
+    def ask_question_cached(self, 
+                            question: str, 
+                            jurisdiction: str = "federal",
+                            max_results: int = 5) -> Dict[str, Any]:
+        """
+        Run retrieval, reusing results for repeated questions.
         
-        # Citation-focused questions
-        citation_keywords = ['cite', 'citation', 'statute', 'case', 'authority', 'legal basis', 'what law', 'which law']
-        if any(keyword in question_lower for keyword in citation_keywords):
-            return 'citation_summary'
+        Questions are matched after normalizing case and whitespace, but
+        retrieval always runs on the original question: citation and statute
+        filters in the vector database are case-sensitive.
+        """
+        key = (question.strip().lower(), jurisdiction, max_results)
+        with self._retrieval_cache_lock:
+            if key in self._retrieval_cache:
+                self._retrieval_cache.move_to_end(key)
+                return self._retrieval_cache[key]
+        
+        result = self._raw_rag_ask(question, jurisdiction, max_results)
+        
+        with self._retrieval_cache_lock:
+            # Keep the first result if another thread stored one meanwhile
+            result = self._retrieval_cache.setdefault(key, result)
+            self._retrieval_cache.move_to_end(key)
+            while len(self._retrieval_cache) > _RETRIEVAL_CACHE_SIZE:
+                self._retrieval_cache.popitem(last=False)
+        return result
+    
+    def clear_retrieval_cache(self):
+        """Drop all cached retrieval results."""
+        with self._retrieval_cache_lock:
+            self._retrieval_cache.clear()
+    
+    def _retrieve(self, question: str, jurisdiction: str) -> Dict[str, Any]:
+        """Retrieve search results for a question, using the cache if enabled."""
+        if self.cache_retrieval:
+            return self.ask_question_cached(question, jurisdiction, max_results=5)
+        return self._raw_rag_ask(question, jurisdiction, 5)
+    
+    def _semantic_lookup(self, 
+                         question: str, 
+                         jurisdiction: str,
+                         prompt_type: str,
+                         include_metadata: bool):
+        """
+        Check the semantic cache for a question.
         
-        # Follow-up questions
-        follow_up_keywords = ['also', 'additionally', 'furthermore', 'moreover', 'what about', 'how about', 'and', 'but']
-        if any(keyword in question_lower for keyword in follow_up_keywords) and self.conversation_history:
-            return 'follow_up'
+        Exact repeats are matched on the question text before falling back to
+        embedding similarity. Follow-up questions depend on the conversation
+        so they are never cached.
         
-        # Default to general legal Q&A
-        return 'legal_qa'
+        Returns:
+            Tuple of (question embedding or None, cached response or None)
+        """
+        semantic_cache = self.semantic_cache
+        if semantic_cache is None or prompt_type == 'follow_up':
+            return None, None
+        
+        q_vec = None
+        cached = semantic_cache.lookup_text(question, jurisdiction)
+        if cached is None:
+            q_vec = semantic_cache.embed(question)
+            cached = semantic_cache.lookup(q_vec, jurisdiction)
+        if cached is None:
+            return q_vec, None
+        
+        if include_metadata and 'metadata' not in cached:
+            # Answer again and replace the entry with one that carries metadata
+            return (q_vec if q_vec is not None else semantic_cache.embed(question)), None
+        if not include_metadata:
+            cached.pop('metadata', None)
+        
+        logger.info(f"Semantic cache hit for question: {question}")
+        cached['question'] = question
+        return q_vec, cached
+    
+    def save_semantic_cache(self):
+        """Persist the semantic response cache, if one is configured."""
+        if self._semantic_cache is not None:
+            self._semantic_cache.save()
+    
+    def _determine_prompt_type(self, question: str) -> str:
+        """Determine which prompt template to use based on the question."""
+        return determine_prompt_type(question, bool(self.conversation_history))
     
     def _build_context_for_llm(self, rag_response: Dict[str, Any]) -> str:
         """Build optimized context for the LLM from RAG results."""
         
-        context_parts = []
-        
-        # Add search results with relevance scores
-        for i, result in enumerate(rag_response['search_results'][:3], 1):  # Top 3 results
-            context_parts.append(f"Source {i} (Relevance: {result.score:.3f}):")
-            context_parts.append(f"Document Type: {result.document_type}")
-            context_parts.append(f"Jurisdiction: {result.jurisdiction}")
-            context_parts.append(f"Law Status: {result.law_status}")
-            context_parts.append(f"Content: {result.content}")
-            
-            if result.citation_chain:
-                context_parts.append(f"Citations: {', '.join(result.citation_chain)}")
-            context_parts.append("")  # Empty line for separation
+        # Key on exactly the fields rendered, so identical retrievals share one string
+        results_key = tuple(
+            (result.score, result.document_type, result.jurisdiction,
+             result.law_status, result.content, tuple(result.citation_chain))
+            for result in rag_response['search_results'][:3]  # Top 3 results
+        )
+        citations_key = tuple(rag_response['citation_chain'][:5])  # Top 5 citations
+        return self._context_cache(results_key, citations_key)
+    
+    @staticmethod
+    def _format_context(results_key: tuple, citations_key: tuple) -> str:
+        """Render the LLM context from the cache key built by _build_context_for_llm."""
+        
+        # One block per search result, each followed by an empty separator line
+        blocks = [
+            _SOURCE_TEMPLATE.format(
+                i=i, score=score, document_type=document_type, jurisdiction=jurisdiction,
+                law_status=law_status, content=content,
+                citations=f"Citations: {', '.join(citation_chain)}\n" if citation_chain else ""
+            )
+            for i, (score, document_type, jurisdiction, law_status, content, citation_chain) in enumerate(results_key, 1)
+        ]
         
         # Add citation chain summary
-        if rag_response['citation_chain']:
-            context_parts.append("Related Legal Authorities:")
-            for citation in rag_response['citation_chain'][:5]:  # Top 5 citations
-                context_parts.append(f"- {citation}")
-            context_parts.append("")
+        if citations_key:
+            blocks.append("Related Legal Authorities:\n" + "".join(f"- {citation}\n" for citation in citations_key))
         
-        return "\n".join(context_parts)
+        return "\n".join(blocks)
     
     def _build_search_metrics(self, rag_response: Dict[str, Any]) -> str:
         """Build search quality metrics for the LLM."""
-        
-        metrics_parts = []
-        metrics_parts.append("Search Quality Metrics:")
-        
-        for factor, score in rag_response['relevance_breakdown'].items():
-            metrics_parts.append(f"- {factor}: {score:.3f}")
-        
-        metrics_parts.append(f"- Top Score: {rag_response['top_score']:.3f}")
-        metrics_parts.append(f"- Total Results: {rag_response['total_results']}")
-        
-        return "\n".join(metrics_parts)
+        return self._metrics_cache(
+            tuple(rag_response['relevance_breakdown'].items()),
+            rag_response['top_score'],
+            rag_response['total_results']
+        )
+    
+    @staticmethod
+    def _format_search_metrics(breakdown: tuple, top_score: float, total_results: int) -> str:
+        """Render search quality metrics from the cache key built by _build_search_metrics."""
+        factors = "".join(f"- {factor}: {score:.3f}\n" for factor, score in breakdown)
+        return f"Search Quality Metrics:\n{factors}- Top Score: {top_score:.3f}\n- Total Results: {total_results}"
     
-    def _extract_source_documents(self, rag_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _extract_source_documents(self, rag_response: Dict[str, Any]) -> List[SourceDocPreview]:
         """Extract and format source documents information."""
-        
-        source_documents = []
-        
-        for i, result in enumerate(rag_response['search_results'][:5], 1):  # Top 5 results
-            # Extract file name from metadata
-            metadata = getattr(result, 'metadata', {})
-            file_name = metadata.get('file_name', 'Unknown')
-            
-            # If file_name is still Unknown, try other metadata fields
-            if file_name == 'Unknown':
-                # Try different possible metadata fields for file name
-                file_name = (
-                    metadata.get('original_file_name') or
-                    metadata.get('document_name') or
-                    metadata.get('title') or
-                    metadata.get('module_title') or
-                    'Unknown'
-                )
-            
-            # Extract section information with better detection
-            section = 'Unknown'
-            
-            # First priority: Use section information from document processing
-            if metadata.get('section_number'):
-                section = metadata.get('section_number')
-            elif metadata.get('section_title'):
-                section = metadata.get('section_title')
-            elif metadata.get('section_type'):
-                section = metadata.get('section_type')
-            else:
-                # Fallback: Try to extract section from content
-                content = result.content[:200]  # Look at first 200 chars for better coverage
-                import re
-                
-                # Look for statute numbers like "1.04", "1.05", etc.
-                # Find ALL statute numbers in the content
-                statute_matches = re.findall(r'(\d+\.\d+[A-Z]*)', content)
-                
-                if statute_matches:
-                    # If multiple statute numbers found, try to determine the most relevant one
-                    if len(statute_matches) > 1:
-                        # Look for the statute number that appears at the beginning of a sentence or line
-                        # This is more likely to be the main section being discussed
-                        for match in statute_matches:
-                            # Check if this statute number appears at the start of a sentence or line
-                            if re.search(rf'^\s*{re.escape(match)}|\.\s*{re.escape(match)}|\(\d+\)\s*{re.escape(match)}', content):
-                                section = match
-                                break
-                        else:
-                            # If no clear pattern, use the first one
-                            section = statute_matches[0]
-                    else:
-                        # Only one statute number found
-                        section = statute_matches[0]
-                else:
-                    # Fallback to chapter patterns
-                    chapter_match = re.search(r'CHAPTER\s+(\d+[A-Z]*)', content, re.IGNORECASE)
-                    section_match = re.search(r'SECTION\s+(\d+\.\d+)', content, re.IGNORECASE)
-                    if chapter_match:
-                        section = f"CHAPTER {chapter_match.group(1)}"
-                    elif section_match:
-                        section = f"Section {section_match.group(1)}"
-            
-            # Determine jurisdiction with better detection
-            jurisdiction = getattr(result, 'jurisdiction', 'Unknown')
-            if jurisdiction == 'Unknown' or jurisdiction == 'federal':
-                # Check content for Wisconsin indicators
-                content_lower = result.content.lower()
-                if any(wisconsin_indicator in content_lower for wisconsin_indicator in [
-                    'wisconsin', 'state of wisconsin', 'wi statutes', 'wisconsin statutes',
-                    'state sovereignty', 'state jurisdiction'
-                ]):
-                    jurisdiction = 'state'
-                elif any(federal_indicator in content_lower for federal_indicator in [
-                    'united states', 'u.s.', 'federal', 'congress', 'supreme court'
-                ]):
-                    jurisdiction = 'federal'
-            
-            doc_info = {
-                'source_number': i,
-                'relevance_score': result.score,
-                'document_type': getattr(result, 'document_type', 'Unknown'),
-                'jurisdiction': jurisdiction,
-                'law_status': getattr(result, 'law_status', 'Unknown'),
-                'content_preview': result.content[:200] + "..." if len(result.content) > 200 else result.content,
-                'citations': getattr(result, 'citation_chain', []),
-                'dates': metadata.get('dates', []),
-                'file_name': file_name,
-                'original_file_name': metadata.get('original_file_name', file_name),  # Add original filename for download
-                'module_title': metadata.get('module_title', 'Unknown'),
-                'section': section
-            }
-            source_documents.append(doc_info)
-        
-        return source_documents
+        return extract_source_documents(rag_response['search_results'])
     
     def _build_chat_history(self) -> List[Any]:
         """Build chat history for LangChain."""
-        
-        history = []
-        for exchange in self.conversation_history[-6:]:
-            history.append(HumanMessage(content=exchange['question']))
-            history.append(AIMessage(content=exchange['answer']))
-        
-        return history
+        with self._history_lock:
+            return list(self._msg_history)
     
     def _detect_use_of_force_query(self, question: str) -> bool:
         """Detect if the question is related to use of force."""
-        question_lower = question.lower()
-        return any(keyword in question_lower for keyword in self.use_of_force_keywords)
+        return detect_use_of_force(question)
     
-    def _calculate_confidence_score(self, rag_response: Dict[str, Any]) -> float:
-        """Calculate confidence score based on search quality."""
-        
-        # Base confidence on top score
-        base_confidence = min(rag_response['top_score'], 1.0)
+    def _assess_response(self, 
+                         question: str, 
+                         rag_response: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+        """
+        Calculate the confidence score and safety warnings in one pass over the results.
         
-        # Adjust based on number of results
-        if rag_response['total_results'] >= 5:
-            base_confidence *= 1.1
-        elif rag_response['total_results'] < 2:
-            base_confidence *= 0.8
+        Args:
+            question: The legal question asked
+            rag_response: Retrieval results for the question
+            
+        Returns:
+            Tuple of (confidence score, safety warnings)
+        """
         
-        # Adjust based on relevance breakdown
+        # Base confidence on top score, adjusted by the number of results and
+        # the relevance breakdown via the multiplier lookup tables
+        total_results = rag_response['total_results']
         relevance_scores = rag_response['relevance_breakdown']
+        relevance_multipliers = np.where(
+            [
+                relevance_scores.get('semantic_similarity', 0) > 0.8,
+                relevance_scores.get('keyword_matching', 0) > 0.8,
+                relevance_scores.get('citation_relevance', 0) < 0.5
+            ],
+            _RELEVANCE_MULTIPLIERS,
+            1.0
+        )
+        confidence_score = float(min(
+            min(rag_response['top_score'], 1.0)
+            * _RESULT_COUNT_MULTIPLIERS[(total_results >= 2) + (total_results >= 5)]
+            * relevance_multipliers.prod(),
+            1.0
+        ))
+        
+        # State-specific content and dates come from the struct-of-arrays view
+        soa = _results_soa(rag_response)
+        jurisdiction_specific = bool(soa['has_state'].any())
+        all_dates = soa['dates']
+        
+        # Flag if any date is older than 10 years
+        outdated = False
+        if all_dates:
+            years = np.fromiter(
+                (int(match.group(1)) for match in map(_YEAR_RE.search, all_dates) if match),
+                dtype=np.int32
+            )
+            outdated = bool((datetime.now().year - years > 10).any())
         
-        # Bonus for high semantic similarity
-        if relevance_scores.get('semantic_similarity', 0) > 0.8:
-            base_confidence *= 1.05
-        
-        # Bonus for high keyword matching
-        if relevance_scores.get('keyword_matching', 0) > 0.8:
-            base_confidence *= 1.05
-        
-        # Penalty for low citation relevance
-        if relevance_scores.get('citation_relevance', 0) < 0.5:
-            base_confidence *= 0.9
-        
-        return min(base_confidence, 1.0)
-    
-    def _check_jurisdiction_specific(self, rag_response: Dict[str, Any]) -> bool:
-        """Check if the response is jurisdiction-specific."""
-        
-        # Check if any results are state-specific
-        for result in rag_response['search_results']:
-            if result.jurisdiction and result.jurisdiction.lower() != 'federal':
-                return True
-        
-        return False
-    
-    def _check_outdated_information(self, rag_response: Dict[str, Any]) -> bool:
-        """Check if information might be outdated."""
-        
-        # Check for old dates in results
-        current_year = datetime.now().year
-        
-        for result in rag_response['search_results']:
-            if hasattr(result, 'dates') and result.dates:
-                for date_str in result.dates:
-                    try:
-                        # Extract year from date string
-                        if '-' in date_str:
-                            year = int(date_str.split('-')[0])
-                        else:
-                            year = int(date_str)
-                        
-                        # Flag if older than 10 years
-                        if current_year - year > 10:
-                            return True
-                    except (ValueError, IndexError):
-                        continue
-        
-        return False
-    
-    def _generate_safety_warnings(self, 
-                                 question: str, 
-                                 rag_response: Dict[str, Any],
-                                 confidence_score: float) -> Dict[str, Any]:
-        """Generate safety warnings and disclaimers."""
-        
-        warnings = {
-            'use_of_force_warning': False,
-            'jurisdiction_warning': False,
-            'outdated_warning': False,
-            'low_confidence_warning': False,
-            'legal_disclaimer': False  # Disabled for law enforcement use
-        }
-        
-        # Check for use of force queries
-        if self._detect_use_of_force_query(question):
-            warnings['use_of_force_warning'] = True
-        
-        # Check for jurisdiction-specific information
-        if self._check_jurisdiction_specific(rag_response):
-            warnings['jurisdiction_warning'] = True
-        
-        # Check for outdated information
-        if self._check_outdated_information(rag_response):
-            warnings['outdated_warning'] = True
-        
-        # Check for low confidence
-        if confidence_score < self.confidence_threshold:
-            warnings['low_confidence_warning'] = True
+        safety_warnings = SafetyWarnings(
+            use_of_force_warning=self._detect_use_of_force_query(question),
+            jurisdiction_warning=jurisdiction_specific,
+            outdated_warning=outdated,
+            low_confidence_warning=confidence_score < self.confidence_threshold
+        )
         
-        return warnings
+        return confidence_score, safety_warnings
     
     def ask(self, 
             question: str, 
@@ -523,116 +726,355 @@ Search Quality Metrics:
         """
         
         try:
-            # Step 1: Perform advanced RAG retrieval
+            # Step 1: Answer from the semantic cache when possible
             logger.info(f"Processing question: {question}")
-            rag_response = self.rag_system.ask_question(
-                question, 
-                jurisdiction=jurisdiction, 
-                max_results=5
-            )
+            prompt_type = self._determine_prompt_type(question)
+            q_vec, cached = self._semantic_lookup(question, jurisdiction, prompt_type, include_metadata)
+            if cached is not None:
+                self._record_exchange(question, cached, '')
+                return cached
             
-            # Step 2: Build context and metrics
+            # Step 2: Perform advanced RAG retrieval
+            rag_response = self._retrieve(question, jurisdiction)
+            
+            # Step 3: Build context and metrics
             context = self._build_context_for_llm(rag_response)
             search_metrics = self._build_search_metrics(rag_response)
             chat_history = self._build_chat_history()
             
-            # Step 3: Calculate confidence and safety features
-            confidence_score = self._calculate_confidence_score(rag_response)
-            safety_warnings = self._generate_safety_warnings(question, rag_response, confidence_score)
-            
-            # Step 4: Determine prompt type
-            prompt_type = self._determine_prompt_type(question)
+            # Step 4: Calculate confidence and safety features
+            confidence_score, safety_warnings = self._assess_response(question, rag_response)
             
             # Step 5: Generate response using LangChain
             logger.info(f"Generating response using {self.model} with {prompt_type} prompt")
             logger.info(f"Confidence score: {confidence_score:.3f}")
             logger.info(f"Safety warnings: {safety_warnings}")
             
-            chain = self.chains[prompt_type]
-            answer = chain.invoke({
+            answer = self.chain.invoke({
                 "context": context,
                 "search_metrics": search_metrics,
                 "chat_history": chat_history,
-                "question": question
+                "question": question,
+                "prompt_type": prompt_type
             })
             
             # Step 6: Prepare response with safety features
-            response = {
-                'question': question,
-                'answer': answer,
-                'timestamp': datetime.now().isoformat(),
-                'model_used': self.model,
-                'prompt_type': prompt_type,
-                'confidence_score': confidence_score,
-                'safety_warnings': safety_warnings
-            }
+            response = self._build_response(
+                question, answer, rag_response, context, chat_history,
+                prompt_type, confidence_score, safety_warnings, include_metadata
+            )
             
-            # Add metadata if requested
-            if include_metadata:
-                response['metadata'] = {
-                    'search_quality': {
-                        'top_score': rag_response['top_score'],
-                        'total_results': rag_response['total_results'],
-                        'relevance_breakdown': rag_response['relevance_breakdown']
-                    },
-                    'citations_found': rag_response['citation_chain'],
-                    'context_length': len(context),
-                    'jurisdiction': rag_response['jurisdiction'],
-                    'langchain_components': {
-                        'prompt_type': prompt_type,
-                        'chat_history_length': len(chat_history)
-                    },
-                    'safety_features': {
-                        'confidence_score': confidence_score,
-                        'confidence_threshold': self.confidence_threshold,
-                        'safety_warnings': safety_warnings,
-                        'use_of_force_detected': safety_warnings['use_of_force_warning'],
-                        'jurisdiction_specific': safety_warnings['jurisdiction_warning'],
-                        'potentially_outdated': safety_warnings['outdated_warning'],
-                        'low_confidence': safety_warnings['low_confidence_warning']
-                    }
-                }
+            # Step 7: Update conversation history and semantic cache
+            self._record_exchange(question, response, context)
+            if q_vec is not None:
+                self.semantic_cache.store(q_vec, jurisdiction, response)
+            
+            return response
             
-            # Step 6: Update conversation history
-            self.conversation_history.append({
-                'question': question,
-                'answer': answer,
-                'context': context,
-                'timestamp': response['timestamp']
+        except Exception as e:
+            logger.error(f"Error in ask method: {e}")
+            return self._build_error_response(question, e)
+    
+    async def aask(self, 
+                   question: str, 
+                   jurisdiction: str = "federal",
+                   include_metadata: bool = True) -> Dict[str, Any]:
+        """
+        Async version of ask() using the chain's ainvoke.
+        
+        Retrieval runs in a worker thread, so several aask() calls gathered
+        together overlap both their retrieval and their LLM requests.
+        
+        Args:
+            question: The legal question to ask
+            jurisdiction: Target jurisdiction (federal/state)
+            include_metadata: Whether to include search metadata in response
+            
+        Returns:
+            Dictionary containing the answer and metadata
+        """
+        
+        try:
+            # Step 1: Answer from the semantic cache when possible
+            logger.info(f"Processing async question: {question}")
+            prompt_type = self._determine_prompt_type(question)
+            q_vec = None
+            if self._semantic_cache_enabled:
+                q_vec, cached = await asyncio.to_thread(
+                    self._semantic_lookup, question, jurisdiction, prompt_type, include_metadata
+                )
+                if cached is not None:
+                    self._record_exchange(question, cached, '')
+                    return cached
+            
+            # Step 2: Start RAG retrieval off the event loop and build the
+            # chat history (independent of retrieval) while it runs
+            rag_task = asyncio.ensure_future(asyncio.to_thread(self._retrieve, question, jurisdiction))
+            chat_history = self._build_chat_history()
+            rag_response = await rag_task
+            
+            # Step 3: Build context, metrics and safety features
+            context = self._build_context_for_llm(rag_response)
+            search_metrics = self._build_search_metrics(rag_response)
+            confidence_score, safety_warnings = self._assess_response(question, rag_response)
+            
+            # Step 4: Generate response using LangChain
+            logger.info(f"Generating async response using {self.model} with {prompt_type} prompt")
+            answer = await self.chain.ainvoke({
+                "context": context,
+                "search_metrics": search_metrics,
+                "chat_history": chat_history,
+                "question": question,
+                "prompt_type": prompt_type
             })
             
-            # Keep only last 10 conversations to manage context
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            # Step 5: Prepare response and update conversation history and semantic cache
+            response = self._build_response(
+                question, answer, rag_response, context, chat_history,
+                prompt_type, confidence_score, safety_warnings, include_metadata
+            )
+            self._record_exchange(question, response, context)
+            if q_vec is not None:
+                self.semantic_cache.store(q_vec, jurisdiction, response)
             
             return response
             
         except Exception as e:
-            logger.error(f"Error in ask method: {e}")
-            return {
-                'question': question,
-                'answer': f"I apologize, but I encountered an error while processing your question. Please try again. Error: {str(e)}",
-                'error': str(e),
-                'timestamp': datetime.now().isoformat(),
-                'model_used': self.model,
-                'prompt_type': 'error',
-                'confidence_score': 0.0,
-                'safety_warnings': {
-                    'use_of_force_warning': False,
-                    'jurisdiction_warning': False,
-                    'outdated_warning': False,
-                    'low_confidence_warning': True,
-                    'legal_disclaimer': True
+            logger.error(f"Error in aask method: {e}")
+            return self._build_error_response(question, e)
+    
+    async def abatch_ask(self, 
+                         questions: List[str], 
+                         jurisdiction: str = "federal",
+                         include_metadata: bool = True,
+                         max_concurrent_requests: int = 32,
+                         max_requests_per_minute: int = 3500,
+                         max_tokens_per_minute: int = 90000) -> List[Dict[str, Any]]:
+        """
+        Ask several independent questions with bounded, rate-limited concurrency.
+        
+        Retrieval for all questions runs in worker threads, then the chains are
+        invoked concurrently. At most max_concurrent_requests calls are in flight,
+        and the request and estimated token rates stay under the per-minute limits.
+        Every question sees the conversation history as it was before the batch
+        started; the exchanges are appended to the history in order afterwards.
+        A failed question gets an error response without affecting the others.
+        
+        Args:
+            questions: The legal questions to ask
+            jurisdiction: Target jurisdiction (federal/state)
+            include_metadata: Whether to include search metadata in responses
+            max_concurrent_requests: Maximum LLM calls in flight at once
+            max_requests_per_minute: OpenAI request rate limit
+            max_tokens_per_minute: OpenAI token rate limit
+            
+        Returns:
+            List of response dictionaries, one per question
+        """
+        
+        if not questions:
+            return []
+        
+        try:
+            # Step 1: Perform retrieval for all questions concurrently
+            logger.info(f"Processing async batch of {len(questions)} questions")
+            rag_responses = await asyncio.gather(*[
+                asyncio.to_thread(self._retrieve, question, jurisdiction) for question in questions
+            ])
+            
+            # Step 2: Build chain inputs for every question
+            chat_history = self._build_chat_history()
+            prepared = []
+            for question, rag_response in zip(questions, rag_responses):
+                context = self._build_context_for_llm(rag_response)
+                confidence_score, safety_warnings = self._assess_response(question, rag_response)
+                prompt_type = self._determine_prompt_type(question)
+                payload = {
+                    "context": context,
+                    "search_metrics": self._build_search_metrics(rag_response),
+                    "chat_history": chat_history,
+                    "question": question,
+                    "prompt_type": prompt_type
+                }
+                prepared.append((question, rag_response, context, prompt_type, confidence_score, safety_warnings, payload))
+        
+        except Exception as e:
+            logger.error(f"Error in abatch_ask method: {e}")
+            return [self._build_error_response(question, e) for question in questions]
+        
+        # Step 3: Generate all answers concurrently within the rate limits
+        semaphore = asyncio.Semaphore(max_concurrent_requests)
+        limiter = _MinuteRateLimiter(max_requests_per_minute, max_tokens_per_minute)
+        
+        async def _generate(payload: Dict[str, Any]) -> str:
+            # Rough token estimate: ~4 characters per prompt token plus the completion budget
+            prompt_chars = len(payload["context"]) + len(payload["search_metrics"]) + len(payload["question"])
+            async with semaphore:
+                await limiter.acquire(prompt_chars // 4 + self.max_tokens)
+                return await self.chain.ainvoke(payload)
+        
+        logger.info(f"Generating {len(prepared)} responses using {self.model} concurrently")
+        answers = await asyncio.gather(
+            *[_generate(item[6]) for item in prepared],
+            return_exceptions=True
+        )
+        
+        # Step 4: Prepare responses and update conversation history
+        responses = []
+        for (question, rag_response, context, prompt_type, confidence_score, safety_warnings, _), answer in zip(prepared, answers):
+            if isinstance(answer, Exception):
+                logger.error(f"Error answering batched question '{question}': {answer}")
+                responses.append(self._build_error_response(question, answer))
+                continue
+            
+            response = self._build_response(
+                question, answer, rag_response, context, chat_history,
+                prompt_type, confidence_score, safety_warnings, include_metadata
+            )
+            self._record_exchange(question, response, context)
+            responses.append(response)
+        
+        return responses
+    
+    def _build_response(self,
+                        question: str,
+                        answer: str,
+                        rag_response: Dict[str, Any],
+                        context: str,
+                        chat_history: List[Any],
+                        prompt_type: str,
+                        confidence_score: float,
+                        safety_warnings: SafetyWarnings,
+                        include_metadata: bool) -> Dict[str, Any]:
+        """Build the response dictionary returned by ask()."""
+        
+        # The response carries plain dicts so it stays JSON serializable
+        warnings_dict = asdict(safety_warnings)
+        response = {
+            'question': question,
+            'answer': answer,
+            'answer_preview': _answer_preview(answer),
+            'timestamp': datetime.now().isoformat(),
+            'model_used': self.model,
+            'prompt_type': prompt_type,
+            'confidence_score': confidence_score,
+            'safety_warnings': warnings_dict,
+            'warning_mask': safety_warnings.mask
+        }
+        
+        # Add metadata if requested
+        if include_metadata:
+            response['metadata'] = {
+                'search_quality': {
+                    'top_score': rag_response['top_score'],
+                    'total_results': rag_response['total_results'],
+                    'relevance_breakdown': rag_response['relevance_breakdown']
+                },
+                'citations_found': rag_response['citation_chain'],
+                'search_results': rag_response['search_results'],
+                'context_length': len(context),
+                'jurisdiction': rag_response['jurisdiction'],
+                'langchain_components': {
+                    'prompt_type': prompt_type,
+                    'chat_history_length': len(chat_history)
+                },
+                'safety_features': {
+                    'confidence_score': confidence_score,
+                    'confidence_threshold': self.confidence_threshold,
+                    'safety_warnings': warnings_dict,
+                    'use_of_force_detected': safety_warnings.use_of_force_warning,
+                    'jurisdiction_specific': safety_warnings.jurisdiction_warning,
+                    'potentially_outdated': safety_warnings.outdated_warning,
+                    'low_confidence': safety_warnings.low_confidence_warning
                 }
             }
+        
+        return response
+    
+    def _build_error_response(self, question: str, error: Exception) -> Dict[str, Any]:
+        """Build the response dictionary returned when answering fails."""
+        return {
+            'question': question,
+            'answer': f"I apologize, but I encountered an error while processing your question. Please try again. Error: {str(error)}",
+            'error': str(error),
+            'timestamp': datetime.now().isoformat(),
+            'model_used': self.model,
+            'prompt_type': 'error',
+            'confidence_score': 0.0,
+            'safety_warnings': dict(_ERROR_SAFETY_WARNINGS),
+            'warning_mask': _ERROR_WARNING_MASK
+        }
+    
+    def _record_exchange(self, question: str, response: Dict[str, Any], context: str):
+        """Append an answered response to the conversation history, keeping only a context preview."""
+        answer = response['answer']
+        entry = {
+            'question': question,
+            'answer': answer,
+            'answer_preview': response.get('answer_preview') or _answer_preview(answer),
+            'context': context[:_HISTORY_CONTEXT_CHARS],
+            'timestamp': response['timestamp']
+        }
+        messages = (HumanMessage(content=question), AIMessage(content=answer))
+        with self._history_lock:
+            self.conversation_history.append(entry)
+            self._msg_history.extend(messages)
+    
+    async def akeepalive(self, interval: float = 30.0):
+        """
+        Periodically touch the OpenAI API so the pooled connection stays warm.
+        
+        Runs until cancelled. Uses the model listing endpoint, which costs no tokens.
+        
+        Args:
+            interval: Seconds between pings
+        """
+        client = getattr(self.llm, 'root_async_client', None)
+        if client is None:
+            return
+        
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await client.models.list()
+            except Exception as e:
+                logger.debug(f"Keepalive ping failed: {e}")
+    
+    def keepalive(self, stop: threading.Event, interval: float = 30.0):
+        """
+        Blocking version of akeepalive() for a background thread.
+        
+        Pings through the sync client used by ask() until stop is set.
+        
+        Args:
+            stop: Event that ends the loop
+            interval: Seconds between pings
+        """
+        client = getattr(self.llm, 'root_client', None)
+        if client is None:
+            return
+        
+        while not stop.wait(interval):
+            try:
+                client.models.list()
+            except Exception as e:
+                logger.debug(f"Keepalive ping failed: {e}")
+    
+    async def aclose(self):
+        """Close the shared HTTP clients."""
+        self.http_client.close()
+        await self.http_async_client.aclose()
     
     def get_conversation_history(self) -> List[Dict[str, Any]]:
         """Get the conversation history."""
-        return self.conversation_history.copy()
+        with self._history_lock:
+            return list(self.conversation_history)
     
     def clear_history(self):
         """Clear the conversation history."""
-        self.conversation_history = []
+        with self._history_lock:
+            self.conversation_history.clear()
+            self._msg_history.clear()
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics."""
@@ -641,7 +1083,7 @@ Search Quality Metrics:
             'model_used': self.model,
             'max_tokens': self.max_tokens,
             'temperature': self.temperature,
-            'langchain_components': list(self.chains.keys())
+            'langchain_components': list(self.prompt_templates.keys())
         }
     
     def ask_streaming(self, 
@@ -661,112 +1103,76 @@ Search Quality Metrics:
         """
         
         try:
-            # Step 1: Perform advanced RAG retrieval
+            # Step 1: Answer from the semantic cache when possible
             logger.info(f"Processing streaming question: {question}")
-            rag_response = self.rag_system.ask_question(
-                question, 
-                jurisdiction=jurisdiction, 
-                max_results=5
-            )
+            prompt_type = self._determine_prompt_type(question)
+            q_vec, cached = self._semantic_lookup(question, jurisdiction, prompt_type, include_metadata)
+            if cached is not None:
+                self._record_exchange(question, cached, '')
+                yield {
+                    'type': 'sources',
+                    'search_results': cached.get('metadata', {}).get('search_results', [])
+                }
+                answer = cached['answer']
+                for start in range(0, len(answer), _CACHED_REPLAY_CHARS):
+                    yield {
+                        'type': 'content',
+                        'content': answer[start:start + _CACHED_REPLAY_CHARS]
+                    }
+                yield {
+                    'type': 'complete',
+                    'response': cached
+                }
+                return
+            
+            # Step 2: Perform advanced RAG retrieval
+            rag_response = self._retrieve(question, jurisdiction)
             
-            # Step 2: Build context and metrics
+            # Hand retrieved results to the consumer before token generation starts
+            yield {
+                'type': 'sources',
+                'search_results': rag_response['search_results']
+            }
+            
+            # Step 3: Build context and metrics
             context = self._build_context_for_llm(rag_response)
             search_metrics = self._build_search_metrics(rag_response)
             chat_history = self._build_chat_history()
             
-            # Step 3: Calculate confidence and safety features
-            confidence_score = self._calculate_confidence_score(rag_response)
-            safety_warnings = self._generate_safety_warnings(question, rag_response, confidence_score)
-            
-            # Step 4: Determine prompt type
-            prompt_type = self._determine_prompt_type(question)
+            # Step 4: Calculate confidence and safety features
+            confidence_score, safety_warnings = self._assess_response(question, rag_response)
             
             # Step 5: Generate streaming response using LangChain
             logger.info(f"Generating streaming response using {self.model} with {prompt_type} prompt")
             
-            chain = self.chains[prompt_type]
-            
-            # Create streaming chain
-            streaming_chain = (
-                {
-                    "context": lambda x: x["context"],
-                    "search_metrics": lambda x: x["search_metrics"],
-                    "chat_history": lambda x: x["chat_history"],
-                    "question": lambda x: x["question"]
-                }
-                | self.prompt_templates[prompt_type]
-                | self.llm
-            )
-            
-            # Stream the response
-            full_answer = ""
-            for chunk in streaming_chain.stream({
+            # Stream the response, collecting chunks to join once at the end
+            answer_parts = []
+            for content in self.chain.stream({
                 "context": context,
                 "search_metrics": search_metrics,
                 "chat_history": chat_history,
-                "question": question
+                "question": question,
+                "prompt_type": prompt_type
             }):
-                if hasattr(chunk, 'content'):
-                    content = chunk.content
-                    full_answer += content
-                    yield {
-                        'type': 'content',
-                        'content': content,
-                        'full_answer': full_answer
-                    }
+                answer_parts.append(content)
+                yield {
+                    'type': 'content',
+                    'content': content
+                }
+            full_answer = "".join(answer_parts)
             
             # Step 6: Prepare final response
-            response = {
-                'question': question,
-                'answer': full_answer,
-                'timestamp': datetime.now().isoformat(),
-                'model_used': self.model,
-                'prompt_type': prompt_type,
-                'confidence_score': confidence_score,
-                'safety_warnings': safety_warnings
-            }
-            
-            # Add metadata if requested
+            response = self._build_response(
+                question, full_answer, rag_response, context, chat_history,
+                prompt_type, confidence_score, safety_warnings, include_metadata
+            )
             if include_metadata:
-                # Extract source documents
-                source_documents = self._extract_source_documents(rag_response)
-                
-                response['metadata'] = {
-                    'search_quality': {
-                        'top_score': rag_response['top_score'],
-                        'total_results': rag_response['total_results'],
-                        'relevance_breakdown': rag_response['relevance_breakdown']
-                    },
-                    'citations_found': rag_response['citation_chain'],
-                    'context_length': len(context),
-                    'jurisdiction': rag_response['jurisdiction'],
-                    'source_documents': source_documents,
-                    'langchain_components': {
-                        'prompt_type': prompt_type,
-                        'chat_history_length': len(chat_history)
-                    },
-                    'safety_features': {
-                        'confidence_score': confidence_score,
-                        'confidence_threshold': self.confidence_threshold,
-                        'safety_warnings': safety_warnings,
-                        'use_of_force_detected': safety_warnings['use_of_force_warning'],
-                        'jurisdiction_specific': safety_warnings['jurisdiction_warning'],
-                        'potentially_outdated': safety_warnings['outdated_warning'],
-                        'low_confidence': safety_warnings['low_confidence_warning']
-                    }
-                }
-            
-            # Step 7: Update conversation history
-            self.conversation_history.append({
-                'question': question,
-                'answer': full_answer,
-                'context': context,
-                'timestamp': response['timestamp']
-            })
+                response['metadata']['source_documents'] = self._extract_source_documents(rag_response)
             
-            # Keep only last 10 conversations to manage context
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            # Step 7: Update conversation history and semantic cache
+            self._record_exchange(question, response, context)
+            if q_vec is not None:
+                self.semantic_cache.store(q_vec, jurisdiction, response)
             
             # Yield final response
             yield {
@@ -776,140 +1182,214 @@ Search Quality Metrics:
             
         except Exception as e:
             logger.error(f"Error in streaming ask method: {e}")
-            error_response = {
-                'question': question,
-                'answer': f"I apologize, but I encountered an error while processing your question. Please try again. Error: {str(e)}",
-                'error': str(e),
-                'timestamp': datetime.now().isoformat(),
-                'model_used': self.model,
-                'prompt_type': 'error',
-                'confidence_score': 0.0,
-                'safety_warnings': {
-                    'use_of_force_warning': False,
-                    'jurisdiction_warning': False,
-                    'outdated_warning': False,
-                    'low_confidence_warning': True,
-                    'legal_disclaimer': True
-                }
-            }
+            error_response = self._build_error_response(question, e)
             yield {
                 'type': 'error',
                 'response': error_response
             }
 
-def format_langchain_response(response: Dict[str, Any]) -> str:
-    """Format LangChain chatbot response for display."""
+    def ask_streaming_tokens(self, 
+                            question: str, 
+                            jurisdiction: str = "federal",
+                            include_metadata: bool = True) -> Iterator[str]:
+        """
+        Ask a question and stream the answer as plain text chunks.
+        
+        The retrieved search results are stored on ``last_search_results`` as
+        soon as retrieval finishes, and the final (or error) response is stored
+        on ``last_response`` once the stream ends.
+        
+        Args:
+            question: The legal question to ask
+            jurisdiction: Target jurisdiction (federal/state)
+            include_metadata: Whether to include search metadata in response
+            
+        Yields:
+            Answer text chunks
+        """
+        
+        self.last_response = None
+        self.last_search_results = None
+        
+        for chunk in self.ask_streaming(question, jurisdiction, include_metadata):
+            chunk_type = chunk['type']
+            if chunk_type == 'content':
+                yield chunk['content']
+            elif chunk_type == 'sources':
+                self.last_search_results = chunk['search_results']
+            else:
+                self.last_response = chunk['response']
+
+# Display templates for format_langchain_response
+_RESPONSE_TEMPLATE = (
+    "🤖 **Answer:**\n"
+    "{answer}\n"
+    "\n"
+    "{confidence_block}"
+    "{warnings_block}"
+    "{metadata_block}"
+    "🔧 **Technical Info:**\n"
+    "   Model: {model_used}\n"
+    "   Framework: LangChain\n"
+    "   Timestamp: {timestamp}"
+)
+
+# Indexed by (confidence >= 0.6) + (confidence >= 0.8)
+_CONFIDENCE_TEMPLATES = (
+    "🎯 **Confidence Assessment:**\n   ❌ Low Confidence: {:.1%}\n\n",
+    "🎯 **Confidence Assessment:**\n   ⚠️  Moderate Confidence: {:.1%}\n\n",
+    "🎯 **Confidence Assessment:**\n   ✅ High Confidence: {:.1%}\n\n"
+)
+
+# Display order, mask bit and text for each safety warning flag
+_SAFETY_WARNING_LINES = (
+    ('use_of_force_warning', _WARN_USE_OF_FORCE,
+     "   🔴 USE OF FORCE QUERY: This response involves use of force considerations.\n"
+     "      Please consult with qualified legal counsel for specific guidance.\n"),
+    ('jurisdiction_warning', _WARN_JURISDICTION,
+     "   🟡 JURISDICTION-SPECIFIC: This information may be jurisdiction-specific.\n"
+     "      Verify applicability to your jurisdiction.\n"),
+    ('outdated_warning', _WARN_OUTDATED,
+     "   🟠 POTENTIALLY OUTDATED: This information may be outdated.\n"
+     "      Verify current legal status.\n"),
+    ('low_confidence_warning', _WARN_LOW_CONFIDENCE,
+     "   🔴 LOW CONFIDENCE: Limited information available.\n"
+     "      Consider consulting additional sources.\n"),
+    ('legal_disclaimer', _WARN_DISCLAIMER,
+     "   📋 LEGAL DISCLAIMER: This is informational only, not legal advice.\n"
+     "      Consult qualified legal counsel for specific legal matters.\n")
+)
+
+_METADATA_TEMPLATE = (
+    "📊 **Search Quality:**\n"
+    "   Top Score: {top_score:.3f}\n"
+    "   Results Found: {total_results}\n"
+    "\n"
+    "{citations_block}"
+    "{sources_block}"
+    "📈 **Relevance Breakdown:**\n"
+    "{breakdown}"
+    "\n"
+    "{langchain_block}"
+    "{safety_block}"
+)
+
+_SOURCE_DOC_TEMPLATE = (
+    "   📋 Source {doc.source_number} (Score: {doc.relevance_score:.3f}):\n"
+    "      Type: {doc.document_type}\n"
+    "      Jurisdiction: {doc.jurisdiction}\n"
+    "      Status: {doc.law_status}\n"
+    "{details}"
+    "      Preview: {doc.content_preview}\n"
+    "\n"
+)
+
+_LANGCHAIN_TEMPLATE = (
+    "🔗 **LangChain Info:**\n"
+    "   Prompt Type: {prompt_type}\n"
+    "   Chat History Length: {chat_history_length}\n"
+    "\n"
+)
+
+_SAFETY_FEATURES_TEMPLATE = (
+    "🛡️ **Safety Features:**\n"
+    "   Confidence Score: {confidence_score:.3f}\n"
+    "   Use of Force Detected: {use_of_force_detected}\n"
+    "   Jurisdiction Specific: {jurisdiction_specific}\n"
+    "   Potentially Outdated: {potentially_outdated}\n"
+    "   Low Confidence: {low_confidence}\n"
+    "\n"
+)
+
+_YES_NO = ('No', 'Yes')
+
+def format_safety_warnings(response: Dict[str, Any]) -> str:
+    """Format the safety warnings block of a response, or "" if it has none."""
+    if 'safety_warnings' not in response:
+        return ""
+    
+    mask = response.get('warning_mask')
+    if mask is None:
+        # Responses built before the mask existed (e.g. from a saved cache)
+        warnings = response['safety_warnings']
+        mask = sum(bit for key, bit, _ in _SAFETY_WARNING_LINES if warnings.get(key))
+    
+    return "⚠️ **Safety Warnings:**\n" + "".join(
+        text for _, bit, text in _SAFETY_WARNING_LINES if mask & bit
+    ) + "\n"
+
+def format_source_doc(doc: SourceDocPreview) -> str:
+    """Format one source document for display."""
+    details = ""
+    if doc.file_name != 'Unknown':
+        details += f"      File: {doc.file_name}\n"
+    if doc.section != 'Unknown':
+        details += f"      Section: {doc.section}\n"
+    if doc.citations:
+        details += f"      Citations: {', '.join(doc.citations[:3])}\n"
+    return _SOURCE_DOC_TEMPLATE.format(doc=doc, details=details)
+
+def _format_metadata(metadata: Dict[str, Any]) -> str:
+    """Format the response metadata for display."""
+    search_quality = metadata['search_quality']
+    
+    citations_block = ""
+    if metadata['citations_found']:
+        citations_block = "⚖️ **Legal Authorities Found:**\n" + "".join(
+            f"   - {citation}\n" for citation in metadata['citations_found'][:5]
+        ) + "\n"
     
-    output_parts = []
+    sources_block = ""
+    if metadata.get('source_documents'):
+        sources_block = "📄 **Source Documents Used:**\n" + "".join(
+            format_source_doc(doc) for doc in metadata['source_documents'][:3]  # Show top 3 documents
+        ) + "\n"
     
-    # Main answer
-    output_parts.append(f"🤖 **Answer:**")
-    output_parts.append(response['answer'])
-    output_parts.append("")
+    langchain_block = ""
+    if 'langchain_components' in metadata:
+        langchain_block = _LANGCHAIN_TEMPLATE.format_map(metadata['langchain_components'])
+    
+    safety_block = ""
+    if 'safety_features' in metadata:
+        safety_info = metadata['safety_features']
+        safety_block = _SAFETY_FEATURES_TEMPLATE.format(
+            confidence_score=safety_info['confidence_score'],
+            use_of_force_detected=_YES_NO[bool(safety_info['use_of_force_detected'])],
+            jurisdiction_specific=_YES_NO[bool(safety_info['jurisdiction_specific'])],
+            potentially_outdated=_YES_NO[bool(safety_info['potentially_outdated'])],
+            low_confidence=_YES_NO[bool(safety_info['low_confidence'])]
+        )
+    
+    return _METADATA_TEMPLATE.format(
+        top_score=search_quality['top_score'],
+        total_results=search_quality['total_results'],
+        citations_block=citations_block,
+        sources_block=sources_block,
+        breakdown="".join(
+            f"   {factor}: {score:.3f}\n"
+            for factor, score in search_quality['relevance_breakdown'].items()
+        ),
+        langchain_block=langchain_block,
+        safety_block=safety_block
+    )
+
+def format_langchain_response(response: Dict[str, Any]) -> str:
+    """Format LangChain chatbot response for display."""
     
     # Safety and accuracy features
+    confidence_block = ""
     if 'confidence_score' in response:
         confidence = response['confidence_score']
-        output_parts.append("🎯 **Confidence Assessment:**")
-        if confidence >= 0.8:
-            output_parts.append(f"   ✅ High Confidence: {confidence:.1%}")
-        elif confidence >= 0.6:
-            output_parts.append(f"   ⚠️  Moderate Confidence: {confidence:.1%}")
-        else:
-            output_parts.append(f"   ❌ Low Confidence: {confidence:.1%}")
-        output_parts.append("")
-    
-    # Safety warnings
-    if 'safety_warnings' in response:
-        warnings = response['safety_warnings']
-        output_parts.append("⚠️ **Safety Warnings:**")
-        
-        if warnings.get('use_of_force_warning'):
-            output_parts.append("   🔴 USE OF FORCE QUERY: This response involves use of force considerations.")
-            output_parts.append("      Please consult with qualified legal counsel for specific guidance.")
-        
-        if warnings.get('jurisdiction_warning'):
-            output_parts.append("   🟡 JURISDICTION-SPECIFIC: This information may be jurisdiction-specific.")
-            output_parts.append("      Verify applicability to your jurisdiction.")
-        
-        if warnings.get('outdated_warning'):
-            output_parts.append("   🟠 POTENTIALLY OUTDATED: This information may be outdated.")
-            output_parts.append("      Verify current legal status.")
-        
-        if warnings.get('low_confidence_warning'):
-            output_parts.append("   🔴 LOW CONFIDENCE: Limited information available.")
-            output_parts.append("      Consider consulting additional sources.")
-        
-        if warnings.get('legal_disclaimer'):
-            output_parts.append("   📋 LEGAL DISCLAIMER: This is informational only, not legal advice.")
-            output_parts.append("      Consult qualified legal counsel for specific legal matters.")
-        
-        output_parts.append("")
-    
-    # Metadata if available
-    if 'metadata' in response:
-        metadata = response['metadata']
-        
-        output_parts.append("📊 **Search Quality:**")
-        output_parts.append(f"   Top Score: {metadata['search_quality']['top_score']:.3f}")
-        output_parts.append(f"   Results Found: {metadata['search_quality']['total_results']}")
-        output_parts.append("")
-        
-        if metadata['citations_found']:
-            output_parts.append("⚖️ **Legal Authorities Found:**")
-            for citation in metadata['citations_found'][:5]:
-                output_parts.append(f"   - {citation}")
-            output_parts.append("")
-        
-        # Source documents
-        if 'source_documents' in metadata and metadata['source_documents']:
-            output_parts.append("📄 **Source Documents Used:**")
-            for doc in metadata['source_documents'][:3]:  # Show top 3 documents
-                output_parts.append(f"   📋 Source {doc['source_number']} (Score: {doc['relevance_score']:.3f}):")
-                output_parts.append(f"      Type: {doc['document_type']}")
-                output_parts.append(f"      Jurisdiction: {doc['jurisdiction']}")
-                output_parts.append(f"      Status: {doc['law_status']}")
-                if doc['file_name'] != 'Unknown':
-                    output_parts.append(f"      File: {doc['file_name']}")
-                if doc['section'] != 'Unknown':
-                    output_parts.append(f"      Section: {doc['section']}")
-                if doc['citations']:
-                    output_parts.append(f"      Citations: {', '.join(doc['citations'][:3])}")
-                output_parts.append(f"      Preview: {doc['content_preview']}")
-                output_parts.append("")
-            output_parts.append("")
-        
-        output_parts.append("📈 **Relevance Breakdown:**")
-        for factor, score in metadata['search_quality']['relevance_breakdown'].items():
-            output_parts.append(f"   {factor}: {score:.3f}")
-        output_parts.append("")
-        
-        # LangChain specific info
-        if 'langchain_components' in metadata:
-            langchain_info = metadata['langchain_components']
-            output_parts.append("🔗 **LangChain Info:**")
-            output_parts.append(f"   Prompt Type: {langchain_info['prompt_type']}")
-            output_parts.append(f"   Chat History Length: {langchain_info['chat_history_length']}")
-            output_parts.append("")
-        
-        # Safety features info
-        if 'safety_features' in metadata:
-            safety_info = metadata['safety_features']
-            output_parts.append("🛡️ **Safety Features:**")
-            output_parts.append(f"   Confidence Score: {safety_info['confidence_score']:.3f}")
-            output_parts.append(f"   Use of Force Detected: {'Yes' if safety_info['use_of_force_detected'] else 'No'}")
-            output_parts.append(f"   Jurisdiction Specific: {'Yes' if safety_info['jurisdiction_specific'] else 'No'}")
-            output_parts.append(f"   Potentially Outdated: {'Yes' if safety_info['potentially_outdated'] else 'No'}")
-            output_parts.append(f"   Low Confidence: {'Yes' if safety_info['low_confidence'] else 'No'}")
-            output_parts.append("")
-    
-    # Technical info
-    output_parts.append("🔧 **Technical Info:**")
-    output_parts.append(f"   Model: {response['model_used']}")
-    output_parts.append(f"   Framework: LangChain")
-    output_parts.append(f"   Timestamp: {response['timestamp']}")
-    
-    return "\n".join(output_parts)
+        confidence_block = _CONFIDENCE_TEMPLATES[(confidence >= 0.6) + (confidence >= 0.8)].format(confidence)
+    
+    return _RESPONSE_TEMPLATE.format_map({
+        'answer': response['answer'],
+        'confidence_block': confidence_block,
+        'warnings_block': format_safety_warnings(response),
+        'metadata_block': _format_metadata(response['metadata']) if 'metadata' in response else "",
+        'model_used': response['model_used'],
+        'timestamp': response['timestamp']
+    })
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -925,7 +1405,7 @@ if __name__ == "__main__":
         print("✅ LangChain chatbot initialized successfully!")
         print(f"📊 Model: {chatbot.model}")
         print(f"💰 Cost-effective: Using GPT-3.5-turbo with LangChain")
-        print(f"🔗 LangChain Components: {list(chatbot.chains.keys())}")
+        print(f"🔗 LangChain Components: {list(chatbot.prompt_templates.keys())}")
         print("=" * 60)
         
         # Test questions including safety scenarios
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Semantic Response Cache
+
+Caches chatbot responses keyed by the embedding of the question, so repeated
+or paraphrased questions skip both retrieval and generation. Exact repeats
+(after normalizing case and whitespace) are matched without embedding.
+"""
+
+import os
+import copy
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from rag_system.advanced_rag_system import SearchResult
+from chatbot.chatbot_hot import SourceDocPreview
+
+logger = logging.getLogger(__name__)
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact-match lookups."""
+    return ' '.join(question.lower().split())
+
+class SemanticResponseCache:
+    """
+    LRU cache of chatbot responses keyed by normalized question embeddings.
+
+    A lookup hits when the cosine similarity between the new question and a
+    cached question from the same jurisdiction reaches the threshold.
+    """
+
+    def __init__(self,
+                 embedding_model,
+                 threshold: float = 0.95,
+                 max_entries: int = 512,
+                 path: Optional[str] = None,
+                 ttl: Optional[float] = None):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            embedding_model: SentenceTransformer used by the vector database
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum cached responses before evicting the oldest
+            path: File prefix for persistence (<path>.npy and <path>.json)
+            ttl: Seconds a cached response stays valid (None to never expire)
+        """
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._vectors: List[np.ndarray] = []
+        self._jurisdictions: List[str] = []
+        self._responses: List[Dict[str, Any]] = []
+        self._keys: List[Tuple[str, str]] = []  # (normalized question, jurisdiction)
+        self._stored_at: List[float] = []
+
+        # Stacked views rebuilt lazily after the entries change
+        self._matrix: Optional[np.ndarray] = None
+        self._jurisdiction_array: Optional[np.ndarray] = None
+
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def embed(self, question: str) -> np.ndarray:
+        """Embed a question as a unit-length vector."""
+        return np.asarray(
+            self.embedding_model.encode(question, normalize_embeddings=True),
+            dtype=np.float32
+        )
+
+    def lookup_text(self, question: str, jurisdiction: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached response for the exact same question.
+
+        Args:
+            question: Question text, compared after normalizing case and whitespace
+            jurisdiction: Jurisdiction the question was asked for
+
+        Returns:
+            A copy of the cached response with a fresh timestamp, or None
+        """
+        key = (normalize_question(question), jurisdiction)
+        with self._lock:
+            self._purge_expired()
+            try:
+                index = self._keys.index(key)
+            except ValueError:
+                return None
+            response = self._hit(index)
+
+        response['timestamp'] = datetime.now().isoformat()
+        return response
+
+    def lookup(self, q_vec: np.ndarray, jurisdiction: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached response for a question embedding.
+
+        Args:
+            q_vec: Normalized question embedding
+            jurisdiction: Jurisdiction the question was asked for
+
+        Returns:
+            A copy of the cached response with a fresh timestamp, or None
+        """
+        with self._lock:
+            self._purge_expired()
+            if not self._responses:
+                return None
+
+            if self._matrix is None:
+                self._matrix = np.vstack(self._vectors)
+                self._jurisdiction_array = np.array(self._jurisdictions)
+
+            scores = self._matrix @ q_vec
+            scores[self._jurisdiction_array != jurisdiction] = -1.0
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+
+            response = self._hit(best)
+
+        response['timestamp'] = datetime.now().isoformat()
+        return response
+
+    def store(self, q_vec: np.ndarray, jurisdiction: str, response: Dict[str, Any]):
+        """Add a response to the cache, evicting the least recently used entry if full."""
+        response = copy.deepcopy(response)
+        key = (normalize_question(response['question']), jurisdiction)
+        with self._lock:
+            # Replace an older answer to the same question
+            if key in self._keys:
+                self._remove(self._keys.index(key))
+
+            self._vectors.append(q_vec)
+            self._jurisdictions.append(jurisdiction)
+            self._responses.append(response)
+            self._keys.append(key)
+            self._stored_at.append(time.time())
+
+            if len(self._responses) > self.max_entries:
+                self._remove(0)
+
+            self._matrix = None
+
+    def _hit(self, index: int) -> Dict[str, Any]:
+        """Move an entry to the most recently used position and return a copy of its response."""
+        for entries in (self._vectors, self._jurisdictions, self._responses, self._keys, self._stored_at):
+            entries.append(entries.pop(index))
+        self._matrix = None
+        return copy.deepcopy(self._responses[-1])
+
+    def _remove(self, index: int):
+        """Drop one entry. Callers hold the lock."""
+        for entries in (self._vectors, self._jurisdictions, self._responses, self._keys, self._stored_at):
+            del entries[index]
+        self._matrix = None
+
+    def _purge_expired(self):
+        """Drop entries older than the TTL. Callers hold the lock."""
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        for index in range(len(self._stored_at) - 1, -1, -1):
+            if self._stored_at[index] < cutoff:
+                self._remove(index)
+
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._vectors.clear()
+            self._jurisdictions.clear()
+            self._responses.clear()
+            self._keys.clear()
+            self._stored_at.clear()
+            self._matrix = None
+
+    def save(self):
+        """Persist the cache to <path>.npy and <path>.json."""
+        if not self.path:
+            return
+
+        with self._lock:
+            if not self._responses:
+                return
+            vectors = np.vstack(self._vectors)
+            entries = [
+                {
+                    'jurisdiction': jurisdiction,
+                    'stored_at': stored_at,
+                    'response': self._serialize_response(response)
+                }
+                for jurisdiction, stored_at, response in zip(self._jurisdictions, self._stored_at, self._responses)
+            ]
+
+        try:
+            np.save(f"{self.path}.npy", vectors)
+            with open(f"{self.path}.json", 'w') as f:
+                json.dump(entries, f)
+            logger.info(f"Saved {len(entries)} semantic cache entries to {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to save semantic cache: {e}")
+
+    def load(self):
+        """Load a previously saved cache, if one exists."""
+        vectors_file = f"{self.path}.npy"
+        entries_file = f"{self.path}.json"
+        if not (os.path.exists(vectors_file) and os.path.exists(entries_file)):
+            return
+
+        try:
+            vectors = np.load(vectors_file)
+            with open(entries_file, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load semantic cache: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for vector, entry in list(zip(vectors, entries))[-self.max_entries:]:
+                response = self._deserialize_response(entry['response'])
+                self._vectors.append(vector.astype(np.float32))
+                self._jurisdictions.append(entry['jurisdiction'])
+                self._responses.append(response)
+                self._keys.append((normalize_question(response['question']), entry['jurisdiction']))
+                self._stored_at.append(entry.get('stored_at', now))
+            self._purge_expired()
+            self._matrix = None
+
+        logger.info(f"Loaded {len(self._responses)} semantic cache entries from {self.path}")
+
+    @staticmethod
+    def _serialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert SearchResult and SourceDocPreview objects in a response to plain dicts."""
+        metadata = response.get('metadata')
+        if not metadata:
+            return response
+
+        serialized = dict(response)
+        serialized['metadata'] = dict(metadata)
+        for key in ('search_results', 'source_documents'):
+            if key in metadata:
+                serialized['metadata'][key] = [asdict(item) for item in metadata[key]]
+        return serialized
+
+    @staticmethod
+    def _deserialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild SearchResult and SourceDocPreview objects in a loaded response."""
+        metadata = response.get('metadata')
+        if metadata and 'search_results' in metadata:
+            metadata['search_results'] = [SearchResult(**result) for result in metadata['search_results']]
+        if metadata and 'source_documents' in metadata:
+            metadata['source_documents'] = [
+                SourceDocPreview(**{**doc, 'citations': tuple(doc['citations']), 'dates': tuple(doc['dates'])})
+                for doc in metadata['source_documents']
+            ]
+        return response
@@ -6,14 +6,42 @@ A user-friendly streaming interface for the LangChain-based legal RAG chatbot.
 Words and letters appear sequentially for a more engaging experience.
 """
 
+import io
 import sys
 import os
 import time
+import functools
 from typing import Generator
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(__file__))
-from langchain_rag_chatbot import LangChainLegalRAGChatbot, format_langchain_response
+from langchain_rag_chatbot import (
+    LangChainLegalRAGChatbot,
+    format_langchain_response,
+    format_safety_warnings,
+    format_source_doc
+)
+
+@functools.lru_cache(maxsize=4)
+def _get_chatbot(model: str, max_tokens: int, temperature: float, streaming: bool = True):
+    """Return a cached chatbot for the given configuration."""
+    return LangChainLegalRAGChatbot(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        streaming=streaming
+    )
+
+# Streamed answer text is written once this many characters or seconds accumulate
+_FLUSH_CHARS = 64
+_FLUSH_INTERVAL = 0.03
+
+# On a terminal, answer text is written straight to the file descriptor,
+# skipping the TextIOWrapper; redirected output keeps using sys.stdout
+try:
+    _TTY_FD = sys.stdout.fileno() if sys.stdout.isatty() else None
+except (AttributeError, OSError, ValueError):
+    _TTY_FD = None
 
 def print_banner():
     """Print the chatbot banner."""
@@ -64,7 +92,7 @@ def print_history(chatbot):
     
     for i, exchange in enumerate(history, 1):
         print(f"\n{i}. **Question:** {exchange['question']}")
-        print(f"   **Answer:** {exchange['answer'][:200]}...")
+        print(f"   **Answer:** {exchange['answer_preview']}")
         print(f"   **Time:** {exchange['timestamp']}")
         print("-" * 30)
 
@@ -81,6 +109,94 @@ def print_stats(chatbot):
     print(f"   Streaming Enabled: {chatbot.streaming}")
     print(f"   LangChain Components: {', '.join(stats['langchain_components'])}")
 
+def _flush(buf: list):
+    """Write buffered answer text to stdout in a single call."""
+    if not buf:
+        return
+    text = ''.join(buf)
+    buf.clear()
+    if _TTY_FD is None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    data = memoryview(text.encode('utf-8'))
+    while data:
+        data = data[os.write(_TTY_FD, data):]
+
+def _format_summary(full_response: dict) -> str:
+    """Render everything shown after the streamed answer into one string."""
+    out = io.StringIO()
+    out.write("\n\n" + "=" * 50 + "\n")
+    
+    # Safety features
+    if 'confidence_score' in full_response:
+        confidence = full_response['confidence_score']
+        if confidence >= 0.8:
+            tier = f"   ✅ High Confidence: {confidence:.1%}"
+        elif confidence >= 0.6:
+            tier = f"   ⚠️  Moderate Confidence: {confidence:.1%}"
+        else:
+            tier = f"   ❌ Low Confidence: {confidence:.1%}"
+        out.write(f"🎯 **Confidence Assessment:**\n{tier}\n\n")
+    
+    # Safety warnings
+    out.write(format_safety_warnings(full_response))
+    
+    # Metadata if available
+    if 'metadata' in full_response:
+        metadata = full_response['metadata']
+        search_quality = metadata['search_quality']
+        
+        out.write("📊 **Search Quality:**\n"
+                  f"   Top Score: {search_quality['top_score']:.3f}\n"
+                  f"   Results Found: {search_quality['total_results']}\n\n")
+        
+        if metadata['citations_found']:
+            out.write("⚖️ **Legal Authorities Found:**\n")
+            out.write("".join(f"   - {citation}\n" for citation in metadata['citations_found'][:5]))
+            out.write("\n")
+        
+        # Source documents if available
+        if 'source_documents' in metadata and metadata['source_documents']:
+            out.write("📄 **Source Documents Used:**\n")
+            out.write("".join(
+                format_source_doc(doc) for doc in metadata['source_documents'][:3]  # Show top 3 documents
+            ))
+            out.write("\n")
+        
+        out.write("📈 **Relevance Breakdown:**\n")
+        out.write("".join(
+            f"   {factor}: {score:.3f}\n"
+            for factor, score in search_quality['relevance_breakdown'].items()
+        ))
+        out.write("\n")
+        
+        # LangChain specific info
+        if 'langchain_components' in metadata:
+            langchain_info = metadata['langchain_components']
+            out.write("🔗 **LangChain Info:**\n"
+                      f"   Prompt Type: {langchain_info['prompt_type']}\n"
+                      f"   Chat History Length: {langchain_info['chat_history_length']}\n\n")
+        
+        # Safety features info
+        if 'safety_features' in metadata:
+            safety_info = metadata['safety_features']
+            out.write("🛡️ **Safety Features:**\n"
+                      f"   Confidence Score: {safety_info['confidence_score']:.3f}\n"
+                      f"   Use of Force Detected: {'Yes' if safety_info['use_of_force_detected'] else 'No'}\n"
+                      f"   Jurisdiction Specific: {'Yes' if safety_info['jurisdiction_specific'] else 'No'}\n"
+                      f"   Potentially Outdated: {'Yes' if safety_info['potentially_outdated'] else 'No'}\n"
+                      f"   Low Confidence: {'Yes' if safety_info['low_confidence'] else 'No'}\n\n")
+    
+    # Technical info
+    out.write("🔧 **Technical Info:**\n"
+              f"   Model: {full_response['model_used']}\n"
+              "   Framework: LangChain (Streaming)\n"
+              f"   Timestamp: {full_response['timestamp']}\n" +
+              "=" * 50 + "\n")
+    
+    return out.getvalue()
+
 def stream_response(chatbot, question: str) -> Generator[dict, None, None]:
     """Stream the chatbot response."""
     
@@ -92,126 +208,36 @@ def stream_response(chatbot, question: str) -> Generator[dict, None, None]:
     print("🤖 **Answer:**")
     
     full_response = None
+    buf = []
+    buf_len = 0
+    last_flush = time.monotonic()
     for chunk in chatbot.ask_streaming(question, include_metadata=True):
         if chunk['type'] == 'content':
-            # Print content as it streams
+            # Buffer content and flush in batches rather than per token
             content = chunk['content']
-            print(content, end='', flush=True)
+            buf.append(content)
+            buf_len += len(content)
+            now = time.monotonic()
+            if buf_len >= _FLUSH_CHARS or now - last_flush > _FLUSH_INTERVAL:
+                _flush(buf)
+                buf_len = 0
+                last_flush = now
             
         elif chunk['type'] == 'complete':
+            _flush(buf)
             # Store the complete response
             full_response = chunk['response']
-            print("\n\n" + "=" * 50)
-            
-            # Display safety features
-            if 'confidence_score' in full_response:
-                confidence = full_response['confidence_score']
-                print("🎯 **Confidence Assessment:**")
-                if confidence >= 0.8:
-                    print(f"   ✅ High Confidence: {confidence:.1%}")
-                elif confidence >= 0.6:
-                    print(f"   ⚠️  Moderate Confidence: {confidence:.1%}")
-                else:
-                    print(f"   ❌ Low Confidence: {confidence:.1%}")
-                print("")
-            
-            # Display safety warnings
-            if 'safety_warnings' in full_response:
-                warnings = full_response['safety_warnings']
-                print("⚠️ **Safety Warnings:**")
-                
-                if warnings.get('use_of_force_warning'):
-                    print("   🔴 USE OF FORCE QUERY: This response involves use of force considerations.")
-                    print("      Please consult with qualified legal counsel for specific guidance.")
-                
-                if warnings.get('jurisdiction_warning'):
-                    print("   🟡 JURISDICTION-SPECIFIC: This information may be jurisdiction-specific.")
-                    print("      Verify applicability to your jurisdiction.")
-                
-                if warnings.get('outdated_warning'):
-                    print("   🟠 POTENTIALLY OUTDATED: This information may be outdated.")
-                    print("      Verify current legal status.")
-                
-                if warnings.get('low_confidence_warning'):
-                    print("   🔴 LOW CONFIDENCE: Limited information available.")
-                    print("      Consider consulting additional sources.")
-                
-                if warnings.get('legal_disclaimer'):
-                    print("   📋 LEGAL DISCLAIMER: This is informational only, not legal advice.")
-                    print("      Consult qualified legal counsel for specific legal matters.")
-                
-                print("")
-            
-            # Display metadata if available
-            if 'metadata' in full_response:
-                metadata = full_response['metadata']
-                
-                print("📊 **Search Quality:**")
-                print(f"   Top Score: {metadata['search_quality']['top_score']:.3f}")
-                print(f"   Results Found: {metadata['search_quality']['total_results']}")
-                print("")
-                
-                if metadata['citations_found']:
-                    print("⚖️ **Legal Authorities Found:**")
-                    for citation in metadata['citations_found'][:5]:
-                        print(f"   - {citation}")
-                    print("")
-                
-                # Display source documents if available
-                if 'source_documents' in metadata and metadata['source_documents']:
-                    print("📄 **Source Documents Used:**")
-                    for doc in metadata['source_documents'][:3]:  # Show top 3 documents
-                        print(f"   📋 Source {doc['source_number']} (Score: {doc['relevance_score']:.3f}):")
-                        print(f"      Type: {doc['document_type']}")
-                        print(f"      Jurisdiction: {doc['jurisdiction']}")
-                        print(f"      Status: {doc['law_status']}")
-                        if doc['file_name'] != 'Unknown':
-                            print(f"      File: {doc['file_name']}")
-                        if doc['section'] != 'Unknown':
-                            print(f"      Section: {doc['section']}")
-                        if doc['citations']:
-                            print(f"      Citations: {', '.join(doc['citations'][:3])}")
-                        print(f"      Preview: {doc['content_preview']}")
-                        print("")
-                    print("")
-                
-                print("📈 **Relevance Breakdown:**")
-                for factor, score in metadata['search_quality']['relevance_breakdown'].items():
-                    print(f"   {factor}: {score:.3f}")
-                print("")
-                
-                # LangChain specific info
-                if 'langchain_components' in metadata:
-                    langchain_info = metadata['langchain_components']
-                    print("🔗 **LangChain Info:**")
-                    print(f"   Prompt Type: {langchain_info['prompt_type']}")
-                    print(f"   Chat History Length: {langchain_info['chat_history_length']}")
-                    print("")
-                
-                # Safety features info
-                if 'safety_features' in metadata:
-                    safety_info = metadata['safety_features']
-                    print("🛡️ **Safety Features:**")
-                    print(f"   Confidence Score: {safety_info['confidence_score']:.3f}")
-                    print(f"   Use of Force Detected: {'Yes' if safety_info['use_of_force_detected'] else 'No'}")
-                    print(f"   Jurisdiction Specific: {'Yes' if safety_info['jurisdiction_specific'] else 'No'}")
-                    print(f"   Potentially Outdated: {'Yes' if safety_info['potentially_outdated'] else 'No'}")
-                    print(f"   Low Confidence: {'Yes' if safety_info['low_confidence'] else 'No'}")
-                    print("")
-            
-            # Technical info
-            print("🔧 **Technical Info:**")
-            print(f"   Model: {full_response['model_used']}")
-            print(f"   Framework: LangChain (Streaming)")
-            print(f"   Timestamp: {full_response['timestamp']}")
-            print("=" * 50)
+            sys.stdout.write(_format_summary(full_response))
+            sys.stdout.flush()
             
         elif chunk['type'] == 'error':
             # Handle error
+            _flush(buf)
             error_response = chunk['response']
             print(f"\n❌ Error: {error_response['answer']}")
             print("=" * 50)
     
+    _flush(buf)
     return full_response
 
 def interactive_streaming_mode():
@@ -222,12 +248,7 @@ def interactive_streaming_mode():
     try:
         # Initialize streaming chatbot
         print("🔧 Initializing streaming LangChain chatbot...")
-        chatbot = LangChainLegalRAGChatbot(
-            model="gpt-3.5-turbo",
-            max_tokens=800,
-            temperature=0.3,
-            streaming=True
-        )
+        chatbot = _get_chatbot("gpt-3.5-turbo", 800, 0.3)
         print("✅ Streaming LangChain chatbot ready!")
         print_help()
         
@@ -264,12 +285,12 @@ def interactive_streaming_mode():
                     continue
                 
                 # Process the question with streaming
-                start_time = time.time()
+                start_ns = time.perf_counter_ns()
                 response = stream_response(chatbot, question)
-                end_time = time.time()
+                elapsed_ns = time.perf_counter_ns() - start_ns
                 
                 if response:
-                    print(f"\n⏱️ Response time: {end_time - start_time:.2f} seconds")
+                    print(f"\n⏱️ Response time: {elapsed_ns / 1e9:.2f} seconds")
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye!")
@@ -289,12 +310,7 @@ def quick_streaming_test():
     print("=" * 40)
     
     try:
-        chatbot = LangChainLegalRAGChatbot(
-            model="gpt-3.5-turbo",
-            max_tokens=600,
-            temperature=0.3,
-            streaming=True
-        )
+        chatbot = _get_chatbot("gpt-3.5-turbo", 600, 0.3)
         
         test_question = "What does 18 U.S.C. 2703 say about digital evidence?"
         print(f"❓ Test Question: {test_question}")
@@ -9,9 +9,46 @@ import sys
 import os
 import time
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(__file__))
-from langchain_rag_chatbot import LangChainLegalRAGChatbot
+def _chatbot_class():
+    """Import the chatbot on first use, so importing this module stays cheap."""
+    # Add parent directory to path for imports
+    chatbot_dir = os.path.dirname(__file__)
+    if chatbot_dir not in sys.path:
+        sys.path.append(chatbot_dir)
+    from langchain_rag_chatbot import LangChainLegalRAGChatbot
+    return LangChainLegalRAGChatbot
+
+# Fastest rate the word-by-word demo displays chunks at
+_WORD_DISPLAY_INTERVAL = 1 / 40
+
+# Streamed text is written once this many characters are buffered or this
+# many seconds have passed since the last write
+_FLUSH_CHARS = 512
+_FLUSH_INTERVAL = 1 / 30
+
+class _BatchedWriter:
+    """Buffers streamed chunks and writes them in batches instead of per token."""
+    
+    def __init__(self):
+        self._buf = []
+        self._buf_len = 0
+        self._last_flush = time.monotonic()
+    
+    def write(self, text: str):
+        self._buf.append(text)
+        self._buf_len += len(text)
+        now = time.monotonic()
+        if self._buf_len >= _FLUSH_CHARS or now - self._last_flush >= _FLUSH_INTERVAL:
+            self.flush()
+            self._last_flush = now
+    
+    def flush(self):
+        """Write out everything buffered so far."""
+        if self._buf:
+            sys.stdout.write(''.join(self._buf))
+            sys.stdout.flush()
+            self._buf.clear()
+            self._buf_len = 0
 
 def simple_streaming_example():
     """Simple streaming example."""
@@ -21,7 +58,7 @@ def simple_streaming_example():
     
     try:
         # Initialize streaming chatbot
-        chatbot = LangChainLegalRAGChatbot(
+        chatbot = _chatbot_class()(
             model="gpt-3.5-turbo",
             max_tokens=600,
             temperature=0.3,
@@ -37,34 +74,39 @@ def simple_streaming_example():
         
         # Stream the response
         start_time = time.time()
+        writer = _BatchedWriter()
         
         for chunk in chatbot.ask_streaming(question):
             if chunk['type'] == 'content':
-                # Print each word as it comes
-                print(chunk['content'], end='', flush=True)
+                # Print words as they come, a batch at a time
+                writer.write(chunk['content'])
                 
             elif chunk['type'] == 'complete':
+                writer.flush()
                 end_time = time.time()
                 print(f"\n\n⏱️ Total time: {end_time - start_time:.2f} seconds")
                 print("✅ Streaming completed!")
                 break
                 
             elif chunk['type'] == 'error':
+                writer.flush()
                 print(f"\n❌ Error: {chunk['response']['answer']}")
                 break
         
+        writer.flush()
+        
     except Exception as e:
         print(f"❌ Error: {e}")
 
 def word_by_word_streaming():
-    """Word-by-word streaming with delays for demonstration."""
+    """Word-by-word streaming, paced for demonstration."""
     
     print("📝 Word-by-Word Streaming Demo")
     print("=" * 40)
     
     try:
         # Initialize streaming chatbot
-        chatbot = LangChainLegalRAGChatbot(
+        chatbot = _chatbot_class()(
             model="gpt-3.5-turbo",
             max_tokens=400,
             temperature=0.3,
@@ -77,12 +119,17 @@ def word_by_word_streaming():
         print("\n🤖 Word-by-Word Response:")
         print("-" * 40)
         
+        last_shown = 0.0
         for chunk in chatbot.ask_streaming(question):
             if chunk['type'] == 'content':
-                # Add a small delay to make streaming more visible
+                # Cap the display rate to keep streaming visible, sleeping only
+                # for whatever part of the interval the model didn't already take
+                delay = _WORD_DISPLAY_INTERVAL - (time.monotonic() - last_shown)
+                if delay > 0:
+                    time.sleep(delay)
                 content = chunk['content']
                 print(content, end='', flush=True)
-                time.sleep(0.05)
+                last_shown = time.monotonic()
                 
             elif chunk['type'] == 'complete':
                 print("\n\n✅ Word-by-word streaming completed!")
@@ -102,7 +149,7 @@ def streaming_with_metadata():
     print("=" * 40)
     
     try:
-        chatbot = LangChainLegalRAGChatbot(
+        chatbot = _chatbot_class()(
             model="gpt-3.5-turbo",
             max_tokens=500,
             temperature=0.3,
@@ -116,12 +163,14 @@ def streaming_with_metadata():
         print("-" * 40)
         
         full_response = None
+        writer = _BatchedWriter()
         
         for chunk in chatbot.ask_streaming(question, include_metadata=True):
             if chunk['type'] == 'content':
-                print(chunk['content'], end='', flush=True)
+                writer.write(chunk['content'])
                 
             elif chunk['type'] == 'complete':
+                writer.flush()
                 full_response = chunk['response']
                 print("\n\n" + "=" * 40)
                 print("📊 Response Metadata:")
@@ -138,8 +187,11 @@ def streaming_with_metadata():
                 break
                 
             elif chunk['type'] == 'error':
+                writer.flush()
                 print(f"\n❌ Error: {chunk['response']['answer']}")
                 break
+        
+        writer.flush()
     
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -11,11 +11,17 @@ import os
 import re
 import json
 import logging
-from typing import Dict, List, Optional, Any, Set, Tuple
+import tempfile
+from typing import Dict, List, Optional, Any, Set, Tuple, FrozenSet
 from pathlib import Path
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 import hashlib
+import functools
+import heapq
+from operator import itemgetter
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root to the path
 import sys
@@ -23,6 +29,42 @@ project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
 from dotenv import load_dotenv
+
+# Hyperscan multi-pattern prefilter (optional)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Aho-Corasick keyword matching (optional, falls back to substring checks)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Compact binary storage for cross-references (optional, falls back to JSON)
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Fast JSON encoding for the JSON storage fallback (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba JIT for the date-gap loop (optional)
+try:
+    import numba
+    import numpy as np
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 from vector_db.vector_database import LegalVectorDatabase
 from document_processing.document_processor import DocumentProcessor
 
@@ -33,6 +75,238 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Entity patterns, compiled once at import. Each pattern is still scanned on its
+# own: matches may overlap across patterns (e.g. "Dane County" is both a location
+# and a name) and findall returns the group for patterns that have one
+LOCATION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b[A-Z][a-z]+ County\b',
+    r'\b[A-Z][a-z]+ (City|Town|Village)\b',
+    r'\b\d+\s+[A-Z][a-z]+\s+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr)\b',
+    r'\b[A-Z]{2}\s+\d{5}\b',
+    r'\bWisconsin\b',
+    r'\bMadison\b',
+    r'\bMilwaukee\b',
+))
+CITATION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\b\d+\.\d+[A-Z]?\b',
+    r'\b[A-Z]+\s+\d+\b',
+    r'\b\d+\s+U\.S\.\s+\d+\b',
+    r'\b\d+\s+Wis\.\s+\d+\b',
+))
+DATE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b\d{1,2}/\d{1,2}/\d{4}\b',
+    r'\b\d{4}-\d{2}-\d{2}\b',
+    r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
+))
+NAME_PATTERNS = (
+    re.compile(r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b'),
+)
+
+# Every entity pattern with the category it fills, in extraction order
+ENTITY_PATTERNS = tuple(
+    (category, pattern)
+    for category, patterns in (
+        ('locations', LOCATION_PATTERNS),
+        ('citations', CITATION_PATTERNS),
+        ('dates', DATE_PATTERNS),
+        ('names', NAME_PATTERNS),
+    )
+    for pattern in patterns
+)
+
+# Legal terms and case types
+LEGAL_KEYWORDS = (
+    'domestic violence', 'traffic stop', 'DUI', 'assault', 'theft',
+    'burglary', 'drug possession', 'weapon', 'firearm', 'Miranda',
+    'search warrant', 'probable cause', 'reasonable suspicion',
+    'use of force', 'excessive force', 'civil rights', 'discrimination',
+    'county', 'counties', 'boundaries', 'statutes', 'laws', 'training',
+    'procedures', 'policies', 'enforcement', 'officer', 'police'
+)
+
+# Individual words that might be relevant
+RELEVANT_WORDS = ('county', 'counties', 'wisconsin', 'statutes', 'laws', 'training', 'procedures')
+
+# For probing text tokens against the relevant words in O(1) each
+RELEVANT_WORD_SET = frozenset(RELEVANT_WORDS)
+
+# (keyword, lowercased keyword) pairs so matching never re-lowercases the list
+LEGAL_KEYWORDS_LOWER = tuple((keyword, keyword.lower()) for keyword in LEGAL_KEYWORDS)
+
+# Entity types scored by overlap, kept as frozensets for intersection
+OVERLAP_FIELDS = ('locations', 'citations', 'keywords', 'names')
+
+# Cross-reference storage; the msgpack file is preferred when msgpack is installed
+CROSS_REFERENCES_MSGPACK = Path("cross_references.msgpack")
+CROSS_REFERENCES_JSON = Path("cross_references.json")
+
+# Entities extracted at ingest time, keyed by content hash
+ENTITY_STORE_MSGPACK = Path("cross_reference_entities.msgpack")
+ENTITY_STORE_JSON = Path("cross_reference_entities.json")
+ENTITY_STORE_SIZE = 50000  # Texts kept; the oldest are dropped first
+
+# Documents whose searches are embedded together in update_cross_references
+UPDATE_BATCH_SIZE = 64
+
+# Entity types summarized by analyze_patterns, and the key each is reported under
+PATTERN_ENTITY_KEYS = {
+    'locations': 'common_locations',
+    'citations': 'common_citations',
+    'keywords': 'common_keywords',
+}
+
+# Suggestions returned by suggest_related_content, and the similarity they must exceed
+MAX_SUGGESTIONS = 10
+SUGGESTION_MIN_SIMILARITY = 0.05
+
+# Search-result texts whose extracted entities are kept between queries
+ENTITY_CACHE_SIZE = 4096
+
+# Date pairs below this count are compared in plain Python; the JIT kernel
+# only pays off once array conversion is cheap relative to the loop
+JIT_MIN_DATE_PAIRS = 256
+
+@functools.lru_cache(maxsize=65536)
+def _parse_slash_date(text: str) -> Optional[int]:
+    """Parse an MM/DD/YYYY date to a day ordinal, or None if it isn't a valid date."""
+    try:
+        return datetime.strptime(text, '%m/%d/%Y').toordinal()
+    except ValueError:
+        return None
+
+def _slash_date_days(dates: List[str]) -> Optional[List[int]]:
+    """Day ordinals of the MM/DD/YYYY dates in a list, or None if any fails to parse."""
+    days = [_parse_slash_date(d) for d in dates if '/' in d]
+    return None if None in days else days
+
+def _min_day_gap_python(days1: List[int], days2: List[int]) -> int:
+    """Smallest absolute difference between two lists of day ordinals."""
+    return min(abs(d1 - d2) for d1 in days1 for d2 in days2)
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _min_day_gap_kernel(days1, days2):
+        best = abs(days1[0] - days2[0])
+        for i in range(days1.shape[0]):
+            for j in range(days2.shape[0]):
+                gap = abs(days1[i] - days2[j])
+                if gap < best:
+                    best = gap
+        return best
+
+def _min_day_gap(days1: List[int], days2: List[int]) -> int:
+    """Smallest absolute difference between two non-empty lists of day ordinals."""
+    if NUMBA_AVAILABLE and len(days1) * len(days2) >= JIT_MIN_DATE_PAIRS:
+        return int(_min_day_gap_kernel(np.asarray(days1, dtype=np.int64), np.asarray(days2, dtype=np.int64)))
+    return _min_day_gap_python(days1, days2)
+
+def _build_keyword_automaton():
+    """Build one automaton over LEGAL_KEYWORDS and RELEVANT_WORDS, or return None if unavailable."""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    
+    # Each lowercased term maps to the (kind, index) entries it satisfies;
+    # a term such as 'county' is both a legal keyword and a relevant word
+    targets = defaultdict(list)
+    for index, (_, keyword_lower) in enumerate(LEGAL_KEYWORDS_LOWER):
+        targets[keyword_lower].append(('keyword', index))
+    for index, word in enumerate(RELEVANT_WORDS):
+        targets[word].append(('word', index))
+    
+    automaton = ahocorasick.Automaton()
+    for term, entries in targets.items():
+        automaton.add_word(term, (len(term), tuple(entries)))
+    automaton.make_automaton()
+    return automaton
+
+KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+def _find_keywords(text_lower: str) -> List[str]:
+    """
+    Find legal keywords (substring matches) followed by relevant words (whole
+    whitespace-separated words) in lowercased text, in list order.
+    """
+    if KEYWORD_AUTOMATON is None:
+        # Only the relevant words present are kept, not a set of every token
+        found_words = RELEVANT_WORD_SET.intersection(text_lower.split())
+        return ([keyword for keyword, keyword_lower in LEGAL_KEYWORDS_LOWER if keyword_lower in text_lower] +
+                [word for word in RELEVANT_WORDS if word in found_words])
+    
+    keyword_hits = set()
+    word_hits = set()
+    last = len(text_lower) - 1
+    for end, (length, entries) in KEYWORD_AUTOMATON.iter(text_lower):
+        start = end - length + 1
+        is_word = ((start == 0 or text_lower[start - 1].isspace()) and
+                   (end == last or text_lower[end + 1].isspace()))
+        for kind, index in entries:
+            if kind == 'keyword':
+                keyword_hits.add(index)
+            elif is_word:
+                word_hits.add(index)
+    
+    return ([LEGAL_KEYWORDS[index] for index in sorted(keyword_hits)] +
+            [RELEVANT_WORDS[index] for index in sorted(word_hits)])
+
+def _build_entity_prefilter():
+    """Compile ENTITY_PATTERNS into a Hyperscan database, or return None if unavailable."""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    
+    flags = []
+    for _, pattern in ENTITY_PATTERNS:
+        pattern_flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        if pattern.flags & re.IGNORECASE:
+            pattern_flags |= hyperscan.HS_FLAG_CASELESS
+        flags.append(pattern_flags)
+    
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[pattern.pattern.encode('utf-8') for _, pattern in ENTITY_PATTERNS],
+            ids=list(range(len(ENTITY_PATTERNS))),
+            elements=len(ENTITY_PATTERNS),
+            flags=flags
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Could not compile Hyperscan entity prefilter: {e}")
+        return None
+
+def _entity_sets(entities: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    """Each overlap field's distinct entities, for scoring one document against many."""
+    return {field: frozenset(entities[field]) for field in OVERLAP_FIELDS}
+
+def _content_key(text: str) -> str:
+    """Hash document text into the key used by the entity cache and store."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+def _read_store(msgpack_path: Path, json_path: Path) -> Optional[Dict[str, Any]]:
+    """Read a stored mapping, preferring msgpack when available; None if neither file exists."""
+    if MSGPACK_AVAILABLE and msgpack_path.exists():
+        with open(msgpack_path, 'rb') as f:
+            return msgpack.unpackb(f.read(), raw=False)
+    if json_path.exists():
+        if ORJSON_AVAILABLE:
+            return orjson.loads(json_path.read_bytes())
+        with open(json_path, 'r') as f:
+            return json.load(f)
+    return None
+
+def _write_store(data: Dict[str, Any], msgpack_path: Path, json_path: Path):
+    """Write a mapping as msgpack when available, otherwise as indented JSON."""
+    if MSGPACK_AVAILABLE:
+        path, payload = msgpack_path, msgpack.packb(data, use_bin_type=True)
+    elif ORJSON_AVAILABLE:
+        path, payload = json_path, orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        path, payload = json_path, json.dumps(data, indent=2).encode('utf-8')
+    
+    # Write to a temp file and rename so readers never see a partial file
+    with tempfile.NamedTemporaryFile('wb', dir=path.resolve().parent, delete=False) as f:
+        f.write(payload)
+    os.replace(f.name, path)
+
 class CrossReferenceSystem:
     """
     Intelligent cross-referencing system for legal documents.
@@ -52,19 +326,38 @@ class CrossReferenceSystem:
         self.relationship_graph = defaultdict(dict)
         self.pattern_cache = {}
         
+        # One Hyperscan pass finds which entity patterns occur in a text, so
+        # re.findall only runs for those; the scratch space is not thread-safe
+        self._entity_prefilter = _build_entity_prefilter()
+        self._prefilter_lock = threading.Lock()
+        
+        # LRU of (entities, entity sets) for search-result text, keyed by content hash
+        self._entity_cache = OrderedDict()
+        self._entity_cache_lock = threading.Lock()
+        
+        # Entities precomputed at ingest time, loaded on first use
+        self._entity_store = None
+        self._entity_store_lock = threading.Lock()
+        
+        # Runs the vector search while the caller extracts entities locally
+        self._search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='xref-search')
+        
         # Load existing cross-references
         self._load_cross_references()
     
     def _load_cross_references(self):
         """Load existing cross-references from storage."""
         try:
-            cross_ref_file = Path("cross_references.json")
-            if cross_ref_file.exists():
-                with open(cross_ref_file, 'r') as f:
-                    data = json.load(f)
-                    self.cross_references = defaultdict(set, data.get('cross_references', {}))
-                    self.relationship_graph = defaultdict(dict, data.get('relationship_graph', {}))
-                    logger.info(f"Loaded {len(self.cross_references)} cross-references")
+            data = _read_store(CROSS_REFERENCES_MSGPACK, CROSS_REFERENCES_JSON)
+            if data is None:
+                return
+            
+            # Related ids are stored as lists
+            self.cross_references = defaultdict(set, {
+                doc_id: set(related_ids) for doc_id, related_ids in data.get('cross_references', {}).items()
+            })
+            self.relationship_graph = defaultdict(dict, data.get('relationship_graph', {}))
+            logger.info(f"Loaded {len(self.cross_references)} cross-references")
         except Exception as e:
             logger.warning(f"Could not load cross-references: {e}")
     
@@ -72,16 +365,81 @@ class CrossReferenceSystem:
         """Save cross-references to storage."""
         try:
             data = {
-                'cross_references': dict(self.cross_references),
+                'cross_references': {
+                    doc_id: list(related_ids) for doc_id, related_ids in self.cross_references.items()
+                },
                 'relationship_graph': dict(self.relationship_graph),
                 'last_updated': datetime.now().isoformat()
             }
-            with open("cross_references.json", 'w') as f:
-                json.dump(data, f, indent=2)
+            _write_store(data, CROSS_REFERENCES_MSGPACK, CROSS_REFERENCES_JSON)
             logger.info("Cross-references saved successfully")
         except Exception as e:
             logger.error(f"Could not save cross-references: {e}")
     
+    def _get_entity_store(self) -> Dict[str, Dict[str, List[str]]]:
+        """Return the ingest-time entity store, loading it on first use."""
+        with self._entity_store_lock:
+            if self._entity_store is None:
+                try:
+                    self._entity_store = _read_store(ENTITY_STORE_MSGPACK, ENTITY_STORE_JSON) or {}
+                except Exception as e:
+                    logger.warning(f"Could not load entity store: {e}")
+                    self._entity_store = {}
+            return self._entity_store
+    
+    def precompute_entities(self, contents: List[str]) -> int:
+        """
+        Extract and persist entities for newly ingested text, so queries that
+        retrieve it only look them up. The store keeps the ENTITY_STORE_SIZE
+        most recently added texts.
+        
+        Args:
+            contents: Text exactly as it is returned in search results
+            
+        Returns:
+            Number of texts added to the store
+        """
+        store = self._get_entity_store()
+        added = {}
+        for content in contents:
+            key = _content_key(content)
+            if key not in store and key not in added:
+                added[key] = self.extract_entities(content)
+        
+        if not added:
+            return 0
+        
+        # Written under the lock so concurrent upload workers save one after another
+        with self._entity_store_lock:
+            store.update(added)
+            while len(store) > ENTITY_STORE_SIZE:
+                del store[next(iter(store))]
+            try:
+                _write_store(store, ENTITY_STORE_MSGPACK, ENTITY_STORE_JSON)
+            except Exception as e:
+                logger.error(f"Could not save entity store: {e}")
+        
+        logger.info(f"Precomputed entities for {len(added)} texts")
+        return len(added)
+    
+    def _matching_patterns(self, text: str) -> Optional[Set[int]]:
+        """Indexes into ENTITY_PATTERNS that may match the text, or None to try them all."""
+        if self._entity_prefilter is None:
+            return None
+        
+        matched = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched.add(pattern_id)
+        
+        try:
+            with self._prefilter_lock:
+                self._entity_prefilter.scan(text.encode('utf-8'), match_event_handler=on_match)
+        except Exception as e:
+            logger.debug(f"Hyperscan prefilter failed, scanning every pattern: {e}")
+            return None
+        return matched
+    
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """Extract entities from text for cross-referencing."""
         entities = {
@@ -92,158 +450,156 @@ class CrossReferenceSystem:
             'keywords': []
         }
         
-        # Extract locations (counties, cities, addresses)
-        location_patterns = [
-            r'\b[A-Z][a-z]+ County\b',
-            r'\b[A-Z][a-z]+ (City|Town|Village)\b',
-            r'\b\d+\s+[A-Z][a-z]+\s+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr)\b',
-            r'\b[A-Z]{2}\s+\d{5}\b',
-            r'\bWisconsin\b',
-            r'\bMadison\b',
-            r'\bMilwaukee\b',
-        ]
-        
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            entities['locations'].extend(matches)
-        
-        # Extract legal citations
-        citation_patterns = [
-            r'\b\d+\.\d+[A-Z]?\b',
-            r'\b[A-Z]+\s+\d+\b',
-            r'\b\d+\s+U\.S\.\s+\d+\b',
-            r'\b\d+\s+Wis\.\s+\d+\b',
-        ]
-        
-        for pattern in citation_patterns:
-            matches = re.findall(pattern, text)
-            entities['citations'].extend(matches)
-        
-        # Extract dates
-        date_patterns = [
-            r'\b\d{1,2}/\d{1,2}/\d{4}\b',
-            r'\b\d{4}-\d{2}-\d{2}\b',
-            r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            entities['dates'].extend(matches)
-        
-        # Extract names (basic pattern)
-        name_patterns = [
-            r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\b',
-        ]
-        
-        for pattern in name_patterns:
-            matches = re.findall(pattern, text)
-            entities['names'].extend(matches)
-        
-        # Extract keywords (legal terms, case types)
-        legal_keywords = [
-            'domestic violence', 'traffic stop', 'DUI', 'assault', 'theft',
-            'burglary', 'drug possession', 'weapon', 'firearm', 'Miranda',
-            'search warrant', 'probable cause', 'reasonable suspicion',
-            'use of force', 'excessive force', 'civil rights', 'discrimination',
-            'county', 'counties', 'boundaries', 'statutes', 'laws', 'training',
-            'procedures', 'policies', 'enforcement', 'officer', 'police'
-        ]
-        
-        for keyword in legal_keywords:
-            if keyword.lower() in text.lower():
-                entities['keywords'].append(keyword)
-        
-        # Also add individual words that might be relevant
-        words = text.lower().split()
-        relevant_words = ['county', 'counties', 'wisconsin', 'statutes', 'laws', 'training', 'procedures']
-        for word in relevant_words:
-            if word in words:
-                entities['keywords'].append(word)
+        # Extract locations, citations, dates and names, skipping patterns the
+        # prefilter ruled out
+        candidates = self._matching_patterns(text)
+        for index, (category, pattern) in enumerate(ENTITY_PATTERNS):
+            if candidates is None or index in candidates:
+                entities[category].extend(pattern.findall(text))
+        
+        # Extract keywords (legal terms, case types) and individual words that
+        # might be relevant
+        entities['keywords'] = _find_keywords(text.lower())
         
         return entities
     
-    def calculate_similarity_score(self, doc1_entities: Dict, doc2_entities: Dict) -> float:
-        """Calculate similarity score between two documents based on entities."""
+    def _cached_entities(self, text: str) -> Tuple[Dict[str, List[str]], Dict[str, FrozenSet[str]]]:
+        """
+        Extract entities and their overlap sets from search-result text, reusing earlier results.
+        
+        Checks the in-memory LRU, then the ingest-time entity store, and only
+        then runs extraction. Keyed by a content hash rather than the document
+        id, so a re-ingested document with new text is never matched to stale
+        entities. Callers must not mutate the returned lists.
+        """
+        key = _content_key(text)
+        with self._entity_cache_lock:
+            cached = self._entity_cache.get(key)
+            if cached is not None:
+                self._entity_cache.move_to_end(key)
+                return cached
+        
+        entities = self._get_entity_store().get(key)
+        if entities is None:
+            entities = self.extract_entities(text)
+        cached = (entities, _entity_sets(entities))
+        with self._entity_cache_lock:
+            self._entity_cache[key] = cached
+            if len(self._entity_cache) > ENTITY_CACHE_SIZE:
+                self._entity_cache.popitem(last=False)
+        return cached
+    
+    def calculate_similarity_score(self, doc1_entities: Dict, doc2_entities: Dict,
+                                   doc1_sets: Optional[Dict[str, FrozenSet[str]]] = None,
+                                   doc2_sets: Optional[Dict[str, FrozenSet[str]]] = None,
+                                   threshold: Optional[float] = None) -> float:
+        """
+        Calculate similarity score between two documents based on entities.
+        
+        Shared entities are counted by intersecting sets from _entity_sets;
+        pass them in when scoring one document against many. With a threshold,
+        returns 0.0 as soon as the score provably can't reach it.
+        """
+        if doc1_sets is None:
+            doc1_sets = _entity_sets(doc1_entities)
+        if doc2_sets is None:
+            doc2_sets = _entity_sets(doc2_entities)
+        
         score = 0.0
         total_weight = 0.0
         
         # Location similarity (medium weight)
         location_weight = 0.2
         if doc1_entities['locations'] and doc2_entities['locations']:
-            common_locations = set(doc1_entities['locations']) & set(doc2_entities['locations'])
+            common_locations = len(doc1_sets['locations'] & doc2_sets['locations'])
             if common_locations:
-                score += location_weight * (len(common_locations) / max(len(doc1_entities['locations']), len(doc2_entities['locations'])))
+                score += location_weight * (common_locations / max(len(doc1_entities['locations']), len(doc2_entities['locations'])))
         total_weight += location_weight
         
         # Citation similarity (medium weight)
         citation_weight = 0.2
         if doc1_entities['citations'] and doc2_entities['citations']:
-            common_citations = set(doc1_entities['citations']) & set(doc2_entities['citations'])
+            common_citations = len(doc1_sets['citations'] & doc2_sets['citations'])
             if common_citations:
-                score += citation_weight * (len(common_citations) / max(len(doc1_entities['citations']), len(doc2_entities['citations'])))
+                score += citation_weight * (common_citations / max(len(doc1_entities['citations']), len(doc2_entities['citations'])))
         total_weight += citation_weight
         
         # Keyword similarity (high weight - more important for general similarity)
         keyword_weight = 0.4
         if doc1_entities['keywords'] and doc2_entities['keywords']:
-            common_keywords = set(doc1_entities['keywords']) & set(doc2_entities['keywords'])
+            common_keywords = len(doc1_sets['keywords'] & doc2_sets['keywords'])
             if common_keywords:
-                score += keyword_weight * (len(common_keywords) / max(len(doc1_entities['keywords']), len(doc2_entities['keywords'])))
+                score += keyword_weight * (common_keywords / max(len(doc1_entities['keywords']), len(doc2_entities['keywords'])))
         total_weight += keyword_weight
         
+        # Skip the date comparison when even full date and name matches
+        # (0.15 + 0.1) couldn't lift the score to the threshold
+        if threshold is not None:
+            remaining_weight = 0.15 + 0.1
+            if (score + remaining_weight) / (total_weight + remaining_weight) < threshold - 1e-9:
+                return 0.0
+        
         # Date similarity (medium weight)
         date_weight = 0.15
         if doc1_entities['dates'] and doc2_entities['dates']:
-            # Simple date proximity check
-            try:
-                dates1 = [datetime.strptime(d, '%m/%d/%Y') for d in doc1_entities['dates'] if '/' in d]
-                dates2 = [datetime.strptime(d, '%m/%d/%Y') for d in doc2_entities['dates'] if '/' in d]
-                if dates1 and dates2:
-                    min_diff = min(abs((d1 - d2).days) for d1 in dates1 for d2 in dates2)
-                    if min_diff <= 30:  # Within 30 days
-                        score += date_weight * (1 - min_diff / 30)
-            except:
-                pass
+            # Simple date proximity check; a document with an unparseable
+            # date (e.g. 13/45/2020) gets no date score
+            days1 = _slash_date_days(doc1_entities['dates'])
+            days2 = _slash_date_days(doc2_entities['dates']) if days1 else None
+            if days1 and days2:
+                min_diff = _min_day_gap(days1, days2)
+                if min_diff <= 30:  # Within 30 days
+                    score += date_weight * (1 - min_diff / 30)
         total_weight += date_weight
         
         # Name similarity (low weight)
         name_weight = 0.1
         if doc1_entities['names'] and doc2_entities['names']:
-            common_names = set(doc1_entities['names']) & set(doc2_entities['names'])
+            common_names = len(doc1_sets['names'] & doc2_sets['names'])
             if common_names:
-                score += name_weight * (len(common_names) / max(len(doc1_entities['names']), len(doc2_entities['names'])))
+                score += name_weight * (common_names / max(len(doc1_entities['names']), len(doc2_entities['names'])))
         total_weight += name_weight
         
         return score / total_weight if total_weight > 0 else 0.0
     
     def find_cross_references(self, document_id: str, content: str, threshold: float = 0.3) -> List[Dict[str, Any]]:
         """Find cross-references for a given document."""
+        # Search for similar documents in the vector database,
+        # overlapping the embedding and search with local entity extraction
+        search = self._search_pool.submit(
+            self.vector_db.search_legal_documents,
+            query=content,
+            top_k=20,
+            include_metadata=True
+        )
+        
         # Extract entities from the current document
         current_entities = self.extract_entities(content)
+        current_sets = _entity_sets(current_entities)
         
-        # Search for similar documents in the vector database
         try:
-            search_results = self.vector_db.search_legal_documents(
-                query=content,
-                top_k=20,
-                include_metadata=True
-            )
+            search_results = search.result()
         except Exception as e:
             logger.error(f"Error searching for cross-references: {e}")
             return []
         
+        return self._record_cross_references(document_id, current_entities, current_sets, search_results, threshold)
+    
+    def _record_cross_references(self, document_id: str, current_entities: Dict, current_sets: Dict[str, FrozenSet[str]],
+                                 search_results: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+        """Score search results against a document and store those above the threshold."""
         cross_refs = []
         
         for result in search_results:
             if result.get('id') == document_id:
                 continue
             
-            # Extract entities from the result document
-            result_content = result.get('content', '')
-            result_entities = self.extract_entities(result_content)
+            # Extract entities from the result document; matches carry their text in metadata
+            result_content = result.get('metadata', {}).get('content', '')
+            result_entities, result_sets = self._cached_entities(result_content)
             
             # Calculate similarity score
-            similarity = self.calculate_similarity_score(current_entities, result_entities)
+            similarity = self.calculate_similarity_score(current_entities, result_entities, current_sets, result_sets, threshold)
             
             if similarity >= threshold:
                 cross_ref = {
@@ -253,10 +609,11 @@ class CrossReferenceSystem:
                     'similarity_score': similarity,
                     'relevance_score': result.get('score', 0),
                     'common_entities': {
-                        'locations': list(set(current_entities['locations']) & set(result_entities['locations'])),
-                        'citations': list(set(current_entities['citations']) & set(result_entities['citations'])),
-                        'keywords': list(set(current_entities['keywords']) & set(result_entities['keywords'])),
-                        'names': list(set(current_entities['names']) & set(result_entities['names']))
+                        # Shared entities once each, in the order the match mentions them
+                        field: list(dict.fromkeys(
+                            entity for entity in result_entities[field] if entity in current_sets[field]
+                        ))
+                        for field in OVERLAP_FIELDS
                     },
                     'metadata': result.get('metadata', {})
                 }
@@ -294,9 +651,8 @@ class CrossReferenceSystem:
                     'last_updated': relationship['timestamp']
                 })
         
-        # Sort by similarity score and limit results
-        related_docs.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return related_docs[:max_results]
+        # Keep the most similar, without sorting the rest
+        return heapq.nlargest(max_results, related_docs, key=lambda x: x['similarity_score'])
     
     def analyze_patterns(self, document_ids: List[str] = None) -> Dict[str, Any]:
         """Analyze patterns across documents."""
@@ -312,38 +668,41 @@ class CrossReferenceSystem:
             'relationship_clusters': []
         }
         
-        # Find most connected documents
-        connection_counts = Counter()
-        for doc_id, related_ids in self.cross_references.items():
-            connection_counts[doc_id] = len(related_ids)
-        
-        patterns['most_connected_documents'] = connection_counts.most_common(10)
-        
-        # Analyze common entities across all documents
-        all_entities = defaultdict(set)
+        # Find most connected documents (same selection as Counter.most_common,
+        # without building a Counter of every document)
+        patterns['most_connected_documents'] = heapq.nlargest(
+            10,
+            ((doc_id, len(related_ids)) for doc_id, related_ids in self.cross_references.items()),
+            key=itemgetter(1)
+        )
+        
+        # Analyze common entities across all documents, collecting only the
+        # entity types that are reported
+        all_entities = {entity_type: set() for entity_type in PATTERN_ENTITY_KEYS}
         for doc_id in document_ids:
             # This would require fetching document content
             # For now, we'll use cached relationship data
-            if doc_id in self.relationship_graph:
-                for related_id, relationship in self.relationship_graph[doc_id].items():
-                    common_entities = relationship.get('common_entities', {})
-                    for entity_type, entities in common_entities.items():
-                        all_entities[entity_type].update(entities)
+            relationships = self.relationship_graph.get(doc_id)
+            if not relationships:
+                continue
+            for relationship in relationships.values():
+                common_entities = relationship.get('common_entities', {})
+                for entity_type, entities in all_entities.items():
+                    found = common_entities.get(entity_type)
+                    if found:
+                        entities.update(found)
         
         # Count common entities
-        for entity_type, entities in all_entities.items():
-            if entity_type == 'locations':
-                patterns['common_locations'] = Counter(entities)
-            elif entity_type == 'citations':
-                patterns['common_citations'] = Counter(entities)
-            elif entity_type == 'keywords':
-                patterns['common_keywords'] = Counter(entities)
+        for entity_type, pattern_key in PATTERN_ENTITY_KEYS.items():
+            patterns[pattern_key] = Counter(all_entities[entity_type])
         
         return patterns
     
     def generate_relationship_map(self, document_id: str, depth: int = 2) -> Dict[str, Any]:
         """Generate a relationship map for a document."""
         def get_connections(doc_id: str, current_depth: int, visited: Set[str]) -> Dict[str, Any]:
+            # visited holds the documents on the current path; each call adds
+            # its document on the way down and removes it on the way back up
             if current_depth > depth or doc_id in visited:
                 return {}
             
@@ -356,9 +715,10 @@ class CrossReferenceSystem:
                         connections[related_id] = {
                             'similarity': relationship['similarity'],
                             'common_entities': relationship['common_entities'],
-                            'connections': get_connections(related_id, current_depth + 1, visited.copy())
+                            'connections': get_connections(related_id, current_depth + 1, visited)
                         }
             
+            visited.remove(doc_id)
             return connections
         
         return {
@@ -371,45 +731,59 @@ class CrossReferenceSystem:
         """Suggest related content based on a query or document."""
         suggestions = []
         
+        # Search for documents with similar entities,
+        # overlapping the embedding and search with local entity extraction
+        search = self._search_pool.submit(
+            self.vector_db.search_legal_documents,
+            query=query,
+            top_k=15,
+            include_metadata=True
+        )
+        
         # Extract entities from query
         query_entities = self.extract_entities(query)
+        query_sets = _entity_sets(query_entities)
         
-        # Search for documents with similar entities
         try:
-            search_results = self.vector_db.search_legal_documents(
-                query=query,
-                top_k=15,
-                include_metadata=True
-            )
+            search_results = search.result()
         except Exception as e:
             logger.error(f"Error searching for suggestions: {e}")
             return []
         
-        for result in search_results:
-            result_id = result.get('id')
-            if result_id == document_id:
-                continue
-            
-            result_content = result.get('content', '')
-            result_entities = self.extract_entities(result_content)
-            
-            similarity = self.calculate_similarity_score(query_entities, result_entities)
-            
-            if similarity > 0.05:
-                suggestion = {
-                    'document_id': result_id,
-                    'file_name': result.get('metadata', {}).get('file_name', 'Unknown'),
-                    'section': result.get('metadata', {}).get('section', 'Unknown'),
-                    'relevance_score': result.get('score', 0),
-                    'similarity_score': similarity,
-                    'why_relevant': self._explain_relevance(query_entities, result_entities),
-                    'metadata': result.get('metadata', {})
-                }
-                suggestions.append(suggestion)
+        def scored_candidates():
+            for result in search_results:
+                if result.get('id') == document_id:
+                    continue
+                
+                result_content = result.get('metadata', {}).get('content', '')
+                result_entities, result_sets = self._cached_entities(result_content)
+                
+                similarity = self.calculate_similarity_score(query_entities, result_entities, query_sets, result_sets,
+                                                             SUGGESTION_MIN_SIMILARITY)
+                if similarity > SUGGESTION_MIN_SIMILARITY:
+                    yield result, result_entities, similarity
+        
+        # Keep the top suggestions by relevance and similarity as candidates
+        # stream in, and only build entries (and explanations) for those
+        top = heapq.nlargest(
+            MAX_SUGGESTIONS,
+            scored_candidates(),
+            key=lambda candidate: (candidate[0].get('score', 0), candidate[2])
+        )
+        
+        for result, result_entities, similarity in top:
+            suggestion = {
+                'document_id': result.get('id'),
+                'file_name': result.get('metadata', {}).get('file_name', 'Unknown'),
+                'section': result.get('metadata', {}).get('section', 'Unknown'),
+                'relevance_score': result.get('score', 0),
+                'similarity_score': similarity,
+                'why_relevant': self._explain_relevance(query_entities, result_entities),
+                'metadata': result.get('metadata', {})
+            }
+            suggestions.append(suggestion)
         
-        # Sort by relevance and similarity
-        suggestions.sort(key=lambda x: (x['relevance_score'], x['similarity_score']), reverse=True)
-        return suggestions[:10]
+        return suggestions
     
     def _explain_relevance(self, query_entities: Dict, result_entities: Dict) -> str:
         """Explain why a document is relevant."""
@@ -433,20 +807,36 @@ class CrossReferenceSystem:
         
         return "; ".join(reasons) if reasons else "Semantic similarity"
     
-    def update_cross_references(self):
-        """Update all cross-references in the system."""
+    def update_cross_references(self, documents: Optional[Dict[str, str]] = None, threshold: float = 0.3):
+        """
+        Update all cross-references in the system.
+        
+        Args:
+            documents: Content of the documents to re-link, keyed by document id.
+                Their searches are embedded UPDATE_BATCH_SIZE at a time.
+            threshold: Minimum similarity for a cross-reference
+        """
         logger.info("Starting cross-reference update...")
         
         try:
-            # Get all documents from vector database
-            # This would require a method to list all documents
-            # For now, we'll work with existing cross-references
-            
-            updated_count = 0
-            for doc_id in list(self.cross_references.keys()):
-                # This would require fetching document content
-                # For demonstration, we'll skip the actual update
-                updated_count += 1
+            if documents is None:
+                # Without document content, existing cross-references are kept as they are
+                updated_count = len(self.cross_references)
+            else:
+                updated_count = 0
+                items = list(documents.items())
+                for start in range(0, len(items), UPDATE_BATCH_SIZE):
+                    batch = items[start:start + UPDATE_BATCH_SIZE]
+                    batch_results = self.vector_db.search_legal_documents_batch(
+                        [content for _, content in batch],
+                        top_k=20,
+                        include_metadata=True
+                    )
+                    for (doc_id, content), search_results in zip(batch, batch_results):
+                        entities = self.extract_entities(content)
+                        self._record_cross_references(doc_id, entities, _entity_sets(entities),
+                                                      search_results, threshold)
+                        updated_count += 1
             
             logger.info(f"Updated cross-references for {updated_count} documents")
             self._save_cross_references()
@@ -8,22 +8,242 @@ handles hierarchical document structures, and maintains metadata for RAG systems
 
 import re
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple, Callable, Iterator
 from pathlib import Path
 
 # Text Processing
 try:
     import nltk
-    from nltk.tokenize import sent_tokenize
     NLTK_AVAILABLE = True
 except ImportError:
     NLTK_AVAILABLE = False
     print("NLTK not available. Install with: pip install nltk")
 
+# Hyperscan multi-pattern scanning (optional)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Backtracking control for the hottest patterns (optional, falls back to re)
+try:
+    import regex
+    REGEX_AVAILABLE = True
+except ImportError:
+    REGEX_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Legal document structure patterns for hierarchy detection, compiled once at import
+HIERARCHY_PATTERNS = {level: re.compile(pattern, re.IGNORECASE) for level, pattern in {
+    'chapter': r'^CHAPTER\s+(\d+|[IVX]+)\.?\s*(.+)$',
+    'section': r'^(\d+\.\d+)\s+(.+)$',
+    'subsection': r'^(\d+\.\d+\.\d+)\s+(.+)$',
+    'paragraph': r'^\(([a-z])\)\s+(.+)$',
+    'subparagraph': r'^\((\d+)\)\s+(.+)$',
+    'statute': r'^(\d+\.\d+)\s+(.+)$',
+    'case_citation': r'^([A-Z][a-z]+\s+v\.\s+[A-Z][a-z]+)',
+    'court_opinion': r'^(OPINION|DISSENT|CONCURRENCE)',
+    'legal_reference': r'^(See|Cf\.|But see|But cf\.)',
+}.items()}
+
+# Every character the court_opinion pattern accepts as a line's first letter;
+# lines starting with anything else cannot open a case law section
+COURT_OPINION_INITIALS = frozenset('OoDdCc')
+
+# Possessive forms of metadata patterns, used when the regex module is
+# installed. Each possessive run is followed by a token it cannot match, so
+# the matches are the same; near-misses just fail without backtracking.
+POSSESSIVE_METADATA_PATTERNS = {
+    'statute_number': r'(\d++\.\d++[A-Z]*+|\d++\s++U\.S\.C\.\s++\d++)',
+    'case_citation': r'([A-Z][a-z]++\s++v\.\s++[A-Z][a-z]++,\s++\d++[A-Z]++\s++\d++)',
+}
+
+POSSESSIVE_MARKER = re.compile(r'([+*?}])\+')
+
+def _compile_metadata_pattern(meta_type: str, pattern: str):
+    """Compile a metadata pattern, preferring its possessive form under the regex module."""
+    if REGEX_AVAILABLE and meta_type in POSSESSIVE_METADATA_PATTERNS:
+        return regex.compile(POSSESSIVE_METADATA_PATTERNS[meta_type], regex.IGNORECASE)
+    return re.compile(pattern, re.IGNORECASE)
+
+# Metadata extraction patterns for legal context
+METADATA_PATTERNS = {meta_type: _compile_metadata_pattern(meta_type, pattern) for meta_type, pattern in {
+    'statute_number': r'(\d+\.\d+[A-Z]*|\d+\s+U\.S\.C\.\s+\d+)',
+    'case_citation': r'([A-Z][a-z]+\s+v\.\s+[A-Z][a-z]+,\s+\d+[A-Z]+\s+\d+)',
+    'date': r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})',
+    'court': r'(Supreme Court|Court of Appeals|District Court|Circuit Court)',
+    'docket_number': r'(Docket|Case)\s+No\.?\s*([A-Z0-9\-]+)',
+}.items()}
+
+# Metadata patterns that can only match text containing a digit, so a single
+# digit search rules all of them out for most prose lines
+NUMERIC_METADATA_TYPES = frozenset({'statute_number', 'case_citation', 'date'})
+DIGIT_PATTERN = re.compile(r'\d')
+
+# Shared stand-in for lines without metadata matches; never mutated
+NO_LINE_METADATA: Dict[str, List[str]] = {}
+
+# Training material markers
+MODULE_HEADING_PATTERN = re.compile(r'^(Module|Topic|Chapter|Lesson)\s+\d+', re.IGNORECASE)
+LEARNING_OBJECTIVE_PATTERN = re.compile(r'objective|outcome|goal', re.IGNORECASE)
+KEY_TERM_PATTERN = regex.compile(r'^[A-Z][A-Z\s]++$') if REGEX_AVAILABLE else re.compile(r'^[A-Z][A-Z\s]+$')
+
+# Oversized chunks are cut at the last separator; each maps to the text added
+# after the cut-off part and the separator placed before the following line
+FALLBACK_SPLITS = {
+    '. ': ('.', '\n'),
+    '\n\n': ('', '\n\n'),
+}
+
+POLICY_NUMBER_PATTERN = re.compile(r'Policy\s+No\.?\s*([A-Z0-9\-]+)', re.IGNORECASE)
+
+def _join_hierarchy_patterns(hierarchy_patterns: Dict[str, re.Pattern]) -> Tuple[re.Pattern, Dict[str, int]]:
+    """
+    Join the hierarchy patterns into one alternation of named groups.
+    
+    Alternatives are tried in table order, so a match reports the same level
+    as trying each pattern in turn. Returns the pattern and, per level, the
+    index of its named group; the level's own groups follow it.
+    """
+    joined = re.compile(
+        '|'.join(f'(?P<{level}>{pattern.pattern})' for level, pattern in hierarchy_patterns.items()),
+        re.IGNORECASE
+    )
+    return joined, {level: joined.groupindex[level] for level in hierarchy_patterns}
+
+def _build_structure_scanner(metadata_patterns: Dict[str, re.Pattern],
+                             hierarchy_patterns: Dict[str, re.Pattern]):
+    """
+    Compile the metadata and hierarchy patterns into one Hyperscan database.
+    
+    Pattern ids number the metadata patterns first, then the hierarchy
+    patterns, in table order. Returns None if Hyperscan is unavailable.
+    """
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    
+    patterns = list(metadata_patterns.values()) + list(hierarchy_patterns.values())
+    
+    # Hyperscan has no possessive syntax and never backtracks, so the plain
+    # quantifier is equivalent
+    expressions = [POSSESSIVE_MARKER.sub(r'\1', pattern.pattern).encode('utf-8') for pattern in patterns]
+    
+    flags = []
+    for pattern in patterns:
+        pattern_flags = hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        if pattern.flags & re.IGNORECASE:
+            pattern_flags |= hyperscan.HS_FLAG_CASELESS
+        flags.append(pattern_flags)
+    
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=flags
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Could not compile Hyperscan structure scanner: {e}")
+        return None
+
+@lru_cache(maxsize=None)
+def _punkt_tokenizer():
+    """The English Punkt tokenizer sent_tokenize uses, loaded once."""
+    try:
+        # NLTK 3.8.2+ loads it from punkt_tab
+        from nltk.tokenize import _get_punkt_tokenizer
+        return _get_punkt_tokenizer('english')
+    except ImportError:
+        return nltk.data.load('tokenizers/punkt/english.pickle')
+
+def _iter_sentences(text: str) -> Iterator[str]:
+    """
+    Yield the same sentences as sent_tokenize, or text.split('. ') without
+    NLTK, one at a time instead of building the whole list.
+    """
+    if NLTK_AVAILABLE:
+        for start, end in _punkt_tokenizer().span_tokenize(text):
+            yield text[start:end]
+        return
+    
+    start = 0
+    end = text.find('. ')
+    while end != -1:
+        yield text[start:end]
+        start = end + 2
+        end = text.find('. ', start)
+    yield text[start:]
+
+def _snapshot_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy chunk metadata along with its list fields.
+    
+    A chunk cut off mid-section keeps accumulating metadata afterwards; a
+    shallow copy would share its lists with the emitted chunk, which would then
+    pick up references from text it does not contain.
+    """
+    return {key: list(value) if isinstance(value, list) else value for key, value in metadata.items()}
+
+def _last_separator(text: str, separator: str) -> int:
+    """
+    Find where text.split(separator) makes its last cut, or -1 if it makes none.
+    
+    str.split consumes separators left to right, so inside a run of newlines
+    a '\n\n' cut lands on an even offset from the start of the run, which can
+    be one character before the last occurrence found by rfind.
+    """
+    cut = text.rfind(separator)
+    if cut > 0 and separator == '\n\n':
+        run_start = cut
+        while run_start > 0 and text[run_start - 1] == '\n':
+            run_start -= 1
+        if (cut - run_start) % 2:
+            cut -= 1
+    return cut
+
+class _ChunkBuffer:
+    """
+    Accumulates chunk text in parts, tracking its length and newline count
+    without joining or re-splitting it on every line.
+    """
+    
+    __slots__ = ('parts', 'length', 'newlines')
+    
+    def __init__(self, text: str = ''):
+        self.reset(text)
+    
+    def reset(self, text: str = ''):
+        """Start over with the given text."""
+        self.parts = [text] if text else []
+        self.length = len(text)
+        self.newlines = text.count('\n')
+    
+    def append(self, text: str):
+        self.parts.append(text)
+        self.length += len(text)
+        self.newlines += text.count('\n')
+    
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the text, as len(text.split('\\n')) would give."""
+        return self.newlines + 1
+    
+    def text(self) -> str:
+        """Join the parts into the chunk text."""
+        if len(self.parts) > 1:
+            self.parts = [''.join(self.parts)]
+        return self.parts[0] if self.parts else ''
+
 class DocumentChunker:
     """
     Intelligent document chunking that preserves legal context and hierarchical structure.
@@ -46,27 +266,16 @@ class DocumentChunker:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
-        # Legal document structure patterns for hierarchy detection
-        self.hierarchy_patterns = {
-            'chapter': r'^CHAPTER\s+(\d+|[IVX]+)\.?\s*(.+)$',
-            'section': r'^(\d+\.\d+)\s+(.+)$',
-            'subsection': r'^(\d+\.\d+\.\d+)\s+(.+)$',
-            'paragraph': r'^\(([a-z])\)\s+(.+)$',
-            'subparagraph': r'^\((\d+)\)\s+(.+)$',
-            'statute': r'^(\d+\.\d+)\s+(.+)$',
-            'case_citation': r'^([A-Z][a-z]+\s+v\.\s+[A-Z][a-z]+)',
-            'court_opinion': r'^(OPINION|DISSENT|CONCURRENCE)',
-            'legal_reference': r'^(See|Cf\.|But see|But cf\.)',
-        }
+        # Compiled pattern tables, shared by every chunker
+        self.hierarchy_patterns = HIERARCHY_PATTERNS
+        self.metadata_patterns = METADATA_PATTERNS
         
-        # Metadata extraction patterns for legal context
-        self.metadata_patterns = {
-            'statute_number': r'(\d+\.\d+[A-Z]*|\d+\s+U\.S\.C\.\s+\d+)',
-            'case_citation': r'([A-Z][a-z]+\s+v\.\s+[A-Z][a-z]+,\s+\d+[A-Z]+\s+\d+)',
-            'date': r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})',
-            'court': r'(Supreme Court|Court of Appeals|District Court|Circuit Court)',
-            'docket_number': r'(Docket|Case)\s+No\.?\s*([A-Z0-9\-]+)',
-        }
+        # All hierarchy levels as one alternation, first level wins
+        self._hierarchy_pattern, self._hierarchy_groups = _join_hierarchy_patterns(self.hierarchy_patterns)
+        
+        # Scans the whole document for every pattern at once when Hyperscan is installed
+        self._structure_scanner = _build_structure_scanner(self.metadata_patterns, self.hierarchy_patterns)
+        self._scanner_lock = threading.Lock()
     
     def chunk_document(self, text_content: str, document_type: str) -> List[Dict[str, Any]]:
         """
@@ -104,169 +313,267 @@ class DocumentChunker:
         - Metadata like statute numbers and dates
         - Document hierarchy relationships
         """
-        lines = text_content.split('\n')
+        lines = [line.strip() for line in text_content.split('\n')]
         structure = {
             'chapters': [],
             'sections': [],
             'subsections': [],
             'paragraphs': [],
-            'metadata': {}
+            'metadata': {},
+            # Stripped lines, shared with the chunking strategies
+            'lines': lines,
+            # Metadata matches per line index, for lines with any
+            'line_metadata': {}
         }
         
         current_chapter = None
         current_section = None
         current_subsection = None
         
+        # Pattern ids that may match each line, or None to try every pattern
+        candidates = self._scan_structure(lines)
+        metadata_count = len(self.metadata_patterns)
+        hierarchy_ids = range(metadata_count, metadata_count + len(self.hierarchy_patterns))
+        
         for i, line in enumerate(lines):
-            line = line.strip()
             if not line:
                 continue
             
+            if candidates is None:
+                hits = None
+                has_digit = DIGIT_PATTERN.search(line) is not None
+            else:
+                hits = candidates.get(i)
+                if not hits:
+                    continue
+            
             # Extract metadata from each line
-            for meta_type, pattern in self.metadata_patterns.items():
-                matches = re.findall(pattern, line, re.IGNORECASE)
+            for index, (meta_type, pattern) in enumerate(self.metadata_patterns.items()):
+                if hits is None:
+                    if not has_digit and meta_type in NUMERIC_METADATA_TYPES:
+                        continue
+                elif index not in hits:
+                    continue
+                matches = pattern.findall(line)
                 if matches:
                     if meta_type not in structure['metadata']:
                         structure['metadata'][meta_type] = []
                     structure['metadata'][meta_type].extend(matches)
+                    structure['line_metadata'].setdefault(i, {})[meta_type] = matches
+            
+            # Detect the first matching hierarchy level with one joined pattern
+            if hits is not None and hits.isdisjoint(hierarchy_ids):
+                continue
+            match = self._hierarchy_pattern.match(line)
+            if not match:
+                continue
+            
+            level = match.lastgroup
+            group = self._hierarchy_groups[level]
+            if level == 'chapter':
+                current_chapter = {
+                    'number': match.group(group + 1),
+                    'title': match.group(group + 2),
+                    'start_line': i,
+                    'content': line
+                }
+                structure['chapters'].append(current_chapter)
+                current_section = None
+                current_subsection = None
+            
+            elif level == 'section':
+                current_section = {
+                    'number': match.group(group + 1),
+                    'title': match.group(group + 2),
+                    'start_line': i,
+                    'content': line,
+                    'chapter': current_chapter
+                }
+                structure['sections'].append(current_section)
+                current_subsection = None
             
-            # Detect hierarchy levels using pattern matching
-            for level, pattern in self.hierarchy_patterns.items():
-                match = re.match(pattern, line, re.IGNORECASE)
-                if match:
-                    if level == 'chapter':
-                        current_chapter = {
-                            'number': match.group(1),
-                            'title': match.group(2),
-                            'start_line': i,
-                            'content': line
-                        }
-                        structure['chapters'].append(current_chapter)
-                        current_section = None
-                        current_subsection = None
-                    
-                    elif level == 'section':
-                        current_section = {
-                            'number': match.group(1),
-                            'title': match.group(2),
-                            'start_line': i,
-                            'content': line,
-                            'chapter': current_chapter
-                        }
-                        structure['sections'].append(current_section)
-                        current_subsection = None
-                    
-                    elif level == 'subsection':
-                        current_subsection = {
-                            'number': match.group(1),
-                            'title': match.group(2),
-                            'start_line': i,
-                            'content': line,
-                            'section': current_section,
-                            'chapter': current_chapter
-                        }
-                        structure['subsections'].append(current_subsection)
-                    
-                    break
+            elif level == 'subsection':
+                current_subsection = {
+                    'number': match.group(group + 1),
+                    'title': match.group(group + 2),
+                    'start_line': i,
+                    'content': line,
+                    'section': current_section,
+                    'chapter': current_chapter
+                }
+                structure['subsections'].append(current_subsection)
         
         return structure
     
-    def _chunk_case_law(self, text_content: str, structure: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _scan_structure(self, lines: List[str]) -> Optional[Dict[int, set]]:
         """
-        Chunk case law documents preserving legal context.
+        Scan stripped lines for every structure pattern in one Hyperscan pass.
         
-        Case law chunking strategy:
-        - Break at major section boundaries (Opinion, Dissent, Concurrence)
-        - Preserve legal citations and references within chunks
-        - Maintain context of legal arguments
-        - Include metadata about case citations and statute references
+        Returns a mapping of line index to the pattern ids that matched text
+        ending on that line, or None when Hyperscan is unavailable. Matches that
+        run across lines only add candidates; each is confirmed with re.
+        """
+        if self._structure_scanner is None:
+            return None
+        
+        try:
+            data = '\n'.join(lines).encode('utf-8')
+        except UnicodeEncodeError:
+            return None
+        
+        # Byte offset of each line's terminating newline
+        newlines = []
+        position = data.find(b'\n')
+        while position != -1:
+            newlines.append(position)
+            position = data.find(b'\n', position + 1)
+        
+        candidates = defaultdict(set)
+        
+        def on_match(pattern_id, start, end, flags, context):
+            candidates[bisect_left(newlines, end)].add(pattern_id)
+        
+        try:
+            with self._scanner_lock:
+                self._structure_scanner.scan(data, match_event_handler=on_match)
+        except Exception as e:
+            logger.debug(f"Hyperscan structure scan failed, matching line by line: {e}")
+            return None
+        return candidates
+    
+    def _chunk_by_boundary(self,
+                           structure: Dict[str, Any],
+                           chunk_type: str,
+                           initial_metadata: Dict[str, Any],
+                           start_chunk: Callable[[str, Dict[str, List[str]]], Optional[Tuple[Dict[str, Any], Any]]],
+                           update_metadata: Callable[[Dict[str, Any], str, Dict[str, List[str]]], None],
+                           fallback_split: str,
+                           context_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Chunk a document line by line, starting a new chunk at each boundary line.
+        
+        Args:
+            structure: Parsed structure, whose stripped lines are chunked and whose
+                line_metadata is passed to the callbacks
+            chunk_type: Chunk type recorded on every chunk
+            initial_metadata: Metadata for text before the first boundary
+            start_chunk: Returns (metadata, context) for a boundary line and its
+                metadata matches, or None for any other line
+            update_metadata: Adds what a non-boundary line and its metadata
+                matches contribute to the current metadata
+            fallback_split: Separator ('. ' or '\n\n') used to cut oversized chunks
+            context_key: Key the boundary context is stored under on each chunk, if any
         """
         chunks = []
-        lines = text_content.split('\n')
+        lines = structure['lines']
+        line_metadata = structure['line_metadata']
         
-        current_chunk = ""
-        current_metadata = {
-            'section_type': '',
-            'statute_numbers': [],
-            'case_citations': [],
-            'dates': []
-        }
+        # Text appended to the cut-off part of an oversized chunk, and the
+        # separator between the carried-over overlap and the next line
+        cut_suffix, overlap_separator = FALLBACK_SPLITS[fallback_split]
+        
+        current_chunk = _ChunkBuffer()
+        current_metadata = initial_metadata
+        current_context = None
+        
+        def emit(content: str, metadata: Dict[str, Any], start_line: int, end_line: int):
+            chunk = {
+                'content': content,
+                'metadata': metadata,
+                'chunk_type': chunk_type
+            }
+            if context_key:
+                chunk[context_key] = current_context
+            chunk['start_line'] = start_line
+            chunk['end_line'] = end_line
+            chunks.append(chunk)
         
         for i, line in enumerate(lines):
-            line = line.strip()
             if not line:
                 continue
             
-            # Check for major section breaks (Opinion, Dissent, etc.)
-            if re.match(self.hierarchy_patterns['court_opinion'], line, re.IGNORECASE):
+            matches = line_metadata.get(i, NO_LINE_METADATA)
+            boundary = start_chunk(line, matches)
+            if boundary:
                 # Save current chunk if it exists
-                if current_chunk.strip():
-                    chunks.append({
-                        'content': current_chunk.strip(),
-                        'metadata': current_metadata.copy(),
-                        'chunk_type': 'case_law_section',
-                        'start_line': i - len(current_chunk.split('\n')),
-                        'end_line': i - 1
-                    })
+                # The boundary replaces the metadata, so the chunk can keep it as is
+                chunk_text = current_chunk.text()
+                if chunk_text.strip():
+                    emit(chunk_text.strip(), current_metadata, i - current_chunk.line_count, i - 1)
                 
-                # Start new chunk with section context
-                current_chunk = line + '\n'
-                current_metadata = {
-                    'section_type': line,
-                    'statute_numbers': self._extract_statute_numbers(line),
-                    'case_citations': self._extract_case_citations(line),
-                    'dates': self._extract_dates(line)
-                }
+                # Start new chunk with the boundary's context
+                current_chunk.reset(line + '\n')
+                current_metadata, current_context = boundary
             
             else:
-                current_chunk += line + '\n'
-                
-                # Update metadata with legal references
-                current_metadata['statute_numbers'].extend(self._extract_statute_numbers(line))
-                current_metadata['case_citations'].extend(self._extract_case_citations(line))
-                current_metadata['dates'].extend(self._extract_dates(line))
+                current_chunk.append(line + '\n')
+                update_metadata(current_metadata, line, matches)
                 
                 # Check if chunk is getting too large
-                if len(current_chunk) > self.chunk_size:
-                    # Try to break at sentence boundary to preserve context
-                    sentences = current_chunk.split('. ')
-                    if len(sentences) > 1:
-                        # Keep last sentence for overlap to maintain context
-                        overlap_text = sentences[-1] if len(sentences[-1]) < self.chunk_overlap else ""
+                if current_chunk.length > self.chunk_size:
+                    # Try to break at a natural boundary to preserve context
+                    chunk_text = current_chunk.text()
+                    cut = _last_separator(chunk_text, fallback_split)
+                    if cut != -1:
+                        # Keep the last part for overlap to maintain context
+                        last_part = chunk_text[cut + len(fallback_split):]
+                        overlap_text = last_part if len(last_part) < self.chunk_overlap else ""
                         
-                        chunk_content = '. '.join(sentences[:-1]) + '.'
-                        chunks.append({
-                            'content': chunk_content.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'case_law_section',
-                            'start_line': i - len(chunk_content.split('\n')),
-                            'end_line': i - 1
-                        })
+                        chunk_content = chunk_text[:cut] + cut_suffix
+                        emit(chunk_content.strip(), _snapshot_metadata(current_metadata),
+                             i - (chunk_content.count('\n') + 1), i - 1)
                         
-                        current_chunk = overlap_text + '\n' + line + '\n'
+                        current_chunk.reset(overlap_text + overlap_separator + line + '\n')
                     else:
-                        # Force break if no good sentence boundary
-                        chunks.append({
-                            'content': current_chunk.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'case_law_section',
-                            'start_line': i - len(current_chunk.split('\n')),
-                            'end_line': i - 1
-                        })
-                        current_chunk = line + '\n'
+                        # Force break if no good boundary
+                        emit(chunk_text.strip(), _snapshot_metadata(current_metadata),
+                             i - current_chunk.line_count, i - 1)
+                        current_chunk.reset(line + '\n')
         
         # Add final chunk
-        if current_chunk.strip():
-            chunks.append({
-                'content': current_chunk.strip(),
-                'metadata': current_metadata,
-                'chunk_type': 'case_law_section',
-                'start_line': len(lines) - len(current_chunk.split('\n')),
-                'end_line': len(lines) - 1
-            })
+        chunk_text = current_chunk.text()
+        if chunk_text.strip():
+            emit(chunk_text.strip(), current_metadata, len(lines) - current_chunk.line_count, len(lines) - 1)
         
         return chunks
     
+    def _chunk_case_law(self, text_content: str, structure: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Chunk case law documents preserving legal context.
+        
+        Case law chunking strategy:
+        - Break at major section boundaries (Opinion, Dissent, Concurrence)
+        - Preserve legal citations and references within chunks
+        - Maintain context of legal arguments
+        - Include metadata about case citations and statute references
+        """
+        def start_chunk(line: str, matches: Dict[str, List[str]]):
+            if line[0] not in COURT_OPINION_INITIALS or not self.hierarchy_patterns['court_opinion'].match(line):
+                return None
+            return {
+                'section_type': line,
+                'statute_numbers': list(matches.get('statute_number', ())),
+                'case_citations': list(matches.get('case_citation', ())),
+                'dates': list(matches.get('date', ()))
+            }, None
+        
+        def update_metadata(metadata: Dict[str, Any], line: str, matches: Dict[str, List[str]]):
+            # Most lines carry no references; leave the metadata untouched for them
+            if not matches:
+                return
+            metadata['statute_numbers'].extend(matches.get('statute_number', ()))
+            metadata['case_citations'].extend(matches.get('case_citation', ()))
+            metadata['dates'].extend(matches.get('date', ()))
+        
+        return self._chunk_by_boundary(
+            structure,
+            chunk_type='case_law_section',
+            initial_metadata={'section_type': '', 'statute_numbers': [], 'case_citations': [], 'dates': []},
+            start_chunk=start_chunk,
+            update_metadata=update_metadata,
+            fallback_split='. '
+        )
+    
     def _chunk_policy(self, text_content: str, structure: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Chunk policy documents preserving hierarchical structure.
@@ -277,98 +584,36 @@ class DocumentChunker:
         - Maintain section context and relationships
         - Include metadata about policy scope and applicability
         """
-        chunks = []
-        lines = text_content.split('\n')
-        
-        current_chunk = ""
-        current_metadata = {
-            'section_number': '',
-            'section_title': '',
-            'policy_numbers': [],
-            'dates': []
-        }
-        current_section = None
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check for section breaks (1.1, 1.2, etc.)
-            section_match = re.match(self.hierarchy_patterns['section'], line, re.IGNORECASE)
-            if section_match:
-                # Save current chunk if it exists
-                if current_chunk.strip():
-                    chunks.append({
-                        'content': current_chunk.strip(),
-                        'metadata': current_metadata.copy(),
-                        'chunk_type': 'policy_section',
-                        'section': current_section,
-                        'start_line': i - len(current_chunk.split('\n')),
-                        'end_line': i - 1
-                    })
-                
-                # Start new chunk with section context
-                current_chunk = line + '\n'
-                current_section = {
-                    'number': section_match.group(1),
-                    'title': section_match.group(2)
-                }
-                current_metadata = {
-                    'section_number': section_match.group(1),
-                    'section_title': section_match.group(2),
-                    'policy_numbers': self._extract_policy_numbers(line),
-                    'dates': self._extract_dates(line)
-                }
-            
-            else:
-                current_chunk += line + '\n'
-                
-                # Update metadata
-                current_metadata['policy_numbers'].extend(self._extract_policy_numbers(line))
-                current_metadata['dates'].extend(self._extract_dates(line))
-                
-                # Check chunk size
-                if len(current_chunk) > self.chunk_size:
-                    # Break at paragraph boundary to preserve context
-                    paragraphs = current_chunk.split('\n\n')
-                    if len(paragraphs) > 1:
-                        overlap_text = paragraphs[-1] if len(paragraphs[-1]) < self.chunk_overlap else ""
-                        
-                        chunk_content = '\n\n'.join(paragraphs[:-1])
-                        chunks.append({
-                            'content': chunk_content.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'policy_section',
-                            'section': current_section,
-                            'start_line': i - len(chunk_content.split('\n')),
-                            'end_line': i - 1
-                        })
-                        
-                        current_chunk = overlap_text + '\n\n' + line + '\n'
-                    else:
-                        chunks.append({
-                            'content': current_chunk.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'policy_section',
-                            'section': current_section,
-                            'start_line': i - len(current_chunk.split('\n')),
-                            'end_line': i - 1
-                        })
-                        current_chunk = line + '\n'
+        def start_chunk(line: str, matches: Dict[str, List[str]]):
+            section_match = self.hierarchy_patterns['section'].match(line)
+            if not section_match:
+                return None
+            return {
+                'section_number': section_match.group(1),
+                'section_title': section_match.group(2),
+                'policy_numbers': self._extract_policy_numbers(line),
+                'dates': list(matches.get('date', ()))
+            }, {
+                'number': section_match.group(1),
+                'title': section_match.group(2)
+            }
         
-        # Add final chunk
-        if current_chunk.strip():
-            chunks.append({
-                'content': current_chunk.strip(),
-                'metadata': current_metadata,
-                'chunk_type': 'policy_section',
-                'section': current_section,
-                'start_line': len(lines) - len(current_chunk.split('\n')),
-                'end_line': len(lines) - 1
-            })
+        def update_metadata(metadata: Dict[str, Any], line: str, matches: Dict[str, List[str]]):
+            policy_numbers = POLICY_NUMBER_PATTERN.findall(line)
+            if policy_numbers:
+                metadata['policy_numbers'].extend(policy_numbers)
+            if 'date' in matches:
+                metadata['dates'].extend(matches['date'])
         
-        return chunks
+        return self._chunk_by_boundary(
+            structure,
+            chunk_type='policy_section',
+            initial_metadata={'section_number': '', 'section_title': '', 'policy_numbers': [], 'dates': []},
+            start_chunk=start_chunk,
+            update_metadata=update_metadata,
+            fallback_split='\n\n',
+            context_key='section'
+        )
     
     def _chunk_training(self, text_content: str, structure: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -380,96 +625,29 @@ class DocumentChunker:
         - Maintain educational context and progression
         - Include metadata about learning outcomes
         """
-        chunks = []
-        lines = text_content.split('\n')
+        def start_chunk(line: str, matches: Dict[str, List[str]]):
+            if not MODULE_HEADING_PATTERN.search(line):
+                return None
+            return {'module_title': line, 'learning_objectives': [], 'key_terms': []}, line
         
-        current_chunk = ""
-        current_metadata = {
-            'module_title': '',
-            'learning_objectives': [],
-            'key_terms': []
-        }
-        current_module = None
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
+        def update_metadata(metadata: Dict[str, Any], line: str, matches: Dict[str, List[str]]):
+            # Extract learning objectives
+            if LEARNING_OBJECTIVE_PATTERN.search(line):
+                metadata['learning_objectives'].append(line)
             
-            # Check for module/topic breaks
-            if re.search(r'^(Module|Topic|Chapter|Lesson)\s+\d+', line, re.IGNORECASE):
-                # Save current chunk
-                if current_chunk.strip():
-                    chunks.append({
-                        'content': current_chunk.strip(),
-                        'metadata': current_metadata.copy(),
-                        'chunk_type': 'training_module',
-                        'module': current_module,
-                        'start_line': i - len(current_chunk.split('\n')),
-                        'end_line': i - 1
-                    })
-                
-                # Start new chunk with module context
-                current_chunk = line + '\n'
-                current_module = line
-                current_metadata = {
-                    'module_title': line,
-                    'learning_objectives': [],
-                    'key_terms': []
-                }
-            
-            else:
-                current_chunk += line + '\n'
-                
-                # Extract learning objectives
-                if re.search(r'objective|outcome|goal', line, re.IGNORECASE):
-                    current_metadata['learning_objectives'].append(line)
-                
-                # Extract key terms (all caps lines)
-                if re.search(r'^[A-Z][A-Z\s]+$', line):
-                    current_metadata['key_terms'].append(line)
-                
-                # Check chunk size
-                if len(current_chunk) > self.chunk_size:
-                    # Break at natural boundaries
-                    sentences = current_chunk.split('. ')
-                    if len(sentences) > 1:
-                        overlap_text = sentences[-1] if len(sentences[-1]) < self.chunk_overlap else ""
-                        
-                        chunk_content = '. '.join(sentences[:-1]) + '.'
-                        chunks.append({
-                            'content': chunk_content.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'training_module',
-                            'module': current_module,
-                            'start_line': i - len(chunk_content.split('\n')),
-                            'end_line': i - 1
-                        })
-                        
-                        current_chunk = overlap_text + '\n' + line + '\n'
-                    else:
-                        chunks.append({
-                            'content': current_chunk.strip(),
-                            'metadata': current_metadata.copy(),
-                            'chunk_type': 'training_module',
-                            'module': current_module,
-                            'start_line': i - len(current_chunk.split('\n')),
-                            'end_line': i - 1
-                        })
-                        current_chunk = line + '\n'
-        
-        # Add final chunk
-        if current_chunk.strip():
-            chunks.append({
-                'content': current_chunk.strip(),
-                'metadata': current_metadata,
-                'chunk_type': 'training_module',
-                'module': current_module,
-                'start_line': len(lines) - len(current_chunk.split('\n')),
-                'end_line': len(lines) - 1
-            })
+            # Extract key terms (all caps lines)
+            if KEY_TERM_PATTERN.search(line):
+                metadata['key_terms'].append(line)
         
-        return chunks
+        return self._chunk_by_boundary(
+            structure,
+            chunk_type='training_module',
+            initial_metadata={'module_title': '', 'learning_objectives': [], 'key_terms': []},
+            start_chunk=start_chunk,
+            update_metadata=update_metadata,
+            fallback_split='. ',
+            context_key='module'
+        )
     
     def _chunk_general(self, text_content: str, structure: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -482,19 +660,18 @@ class DocumentChunker:
         - Preserve context through overlap
         """
         chunks = []
-        sentences = sent_tokenize(text_content) if NLTK_AVAILABLE else text_content.split('. ')
-        
-        current_chunk = ""
+        current_chunk = _ChunkBuffer()
         current_metadata = {
             'statute_numbers': [],
             'dates': []
         }
         
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) > self.chunk_size:
-                if current_chunk.strip():
+        for sentence in _iter_sentences(text_content):
+            if current_chunk.length + len(sentence) > self.chunk_size:
+                chunk_text = current_chunk.text()
+                if chunk_text.strip():
                     chunks.append({
-                        'content': current_chunk.strip(),
+                        'content': chunk_text.strip(),
                         'metadata': current_metadata.copy(),
                         'chunk_type': 'general',
                         'start_line': 0,
@@ -502,19 +679,26 @@ class DocumentChunker:
                     })
                 
                 # Start new chunk with overlap
-                overlap_sentences = current_chunk.split('. ')[-2:] if len(current_chunk.split('. ')) > 1 else []
-                current_chunk = '. '.join(overlap_sentences) + '. ' + sentence + '. '
+                # Carry over the text after the second-to-last sentence break
+                last_break = chunk_text.rfind('. ')
+                if last_break == -1:
+                    overlap_text = ''
+                else:
+                    previous_break = chunk_text.rfind('. ', 0, last_break)
+                    overlap_text = chunk_text[previous_break + 2:] if previous_break != -1 else chunk_text
+                current_chunk.reset(overlap_text + '. ' + sentence + '. ')
             else:
-                current_chunk += sentence + '. '
+                current_chunk.append(sentence + '. ')
             
             # Update metadata
             current_metadata['statute_numbers'] = self._extract_statute_numbers(sentence)
             current_metadata['dates'] = self._extract_dates(sentence)
         
         # Add final chunk
-        if current_chunk.strip():
+        chunk_text = current_chunk.text()
+        if chunk_text.strip():
             chunks.append({
-                'content': current_chunk.strip(),
+                'content': chunk_text.strip(),
                 'metadata': current_metadata,
                 'chunk_type': 'general',
                 'start_line': 0,
@@ -525,19 +709,19 @@ class DocumentChunker:
     
     def _extract_statute_numbers(self, text: str) -> List[str]:
         """Extract statute numbers from text."""
-        return re.findall(self.metadata_patterns['statute_number'], text, re.IGNORECASE)
+        return self.metadata_patterns['statute_number'].findall(text)
     
     def _extract_case_citations(self, text: str) -> List[str]:
         """Extract case citations from text."""
-        return re.findall(self.metadata_patterns['case_citation'], text, re.IGNORECASE)
+        return self.metadata_patterns['case_citation'].findall(text)
     
     def _extract_dates(self, text: str) -> List[str]:
         """Extract dates from text."""
-        return re.findall(self.metadata_patterns['date'], text, re.IGNORECASE)
+        return self.metadata_patterns['date'].findall(text)
     
     def _extract_policy_numbers(self, text: str) -> List[str]:
         """Extract policy numbers from text."""
-        return re.findall(r'Policy\s+No\.?\s*([A-Z0-9\-]+)', text, re.IGNORECASE)
+        return POLICY_NUMBER_PATTERN.findall(text)
 
 if __name__ == "__main__":
     # Example usage
@@ -10,6 +10,7 @@ import os
 import re
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 from datetime import datetime
@@ -62,6 +63,28 @@ import mimetypes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Entity and heading patterns, compiled once at import
+DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\d{1,2}/\d{1,2}/\d{4}',
+    r'\d{4}-\d{2}-\d{2}',
+    r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}'
+)]
+CASE_REFERENCE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Case\s+No\.?\s*[A-Z0-9\-]+',
+    r'Docket\s+No\.?\s*[A-Z0-9\-]+',
+    r'Citation:\s*[A-Z0-9\s]+'
+)]
+POLICY_REFERENCE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Policy\s+No\.?\s*[A-Z0-9\-]+',
+    r'Procedure\s+No\.?\s*[A-Z0-9\-]+'
+)]
+HEADING_PATTERN = re.compile(r'^[A-Z][A-Z\s\d]+$')
+
+@lru_cache(maxsize=128)
+def _compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile a configurable pattern once, independent of re's shared cache."""
+    return re.compile(pattern, flags)
+
 class DocumentProcessor:
     """
     Document processor with singleton pattern to prevent multiple initializations.
@@ -380,7 +403,7 @@ class DocumentProcessor:
                     score += 1
 
             for pattern in patterns['patterns']:
-                if re.search(pattern, text_content, re.IGNORECASE):
+                if _compile_pattern(pattern, re.IGNORECASE).search(text_content):
                     score += 2
             
             scores[doc_type] = score
@@ -443,33 +466,18 @@ class DocumentProcessor:
             'references': []
         }
         
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',
-            r'\d{4}-\d{2}-\d{2}',
-            r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}'
-        ]
-        
-        for pattern in date_patterns:
-            dates = re.findall(pattern, text_content, re.IGNORECASE)
+        for pattern in DATE_PATTERNS:
+            dates = pattern.findall(text_content)
             entities['dates'].extend(dates)
         
         if document_type == 'case_law':
-            case_patterns = [
-                r'Case\s+No\.?\s*[A-Z0-9\-]+',
-                r'Docket\s+No\.?\s*[A-Z0-9\-]+',
-                r'Citation:\s*[A-Z0-9\s]+'
-            ]
-            for pattern in case_patterns:
-                refs = re.findall(pattern, text_content, re.IGNORECASE)
+            for pattern in CASE_REFERENCE_PATTERNS:
+                refs = pattern.findall(text_content)
                 entities['references'].extend(refs)
         
         elif document_type == 'policy':
-            policy_patterns = [
-                r'Policy\s+No\.?\s*[A-Z0-9\-]+',
-                r'Procedure\s+No\.?\s*[A-Z0-9\-]+'
-            ]
-            for pattern in policy_patterns:
-                refs = re.findall(pattern, text_content, re.IGNORECASE)
+            for pattern in POLICY_REFERENCE_PATTERNS:
+                refs = pattern.findall(text_content)
                 entities['references'].extend(refs)
         
         return entities
@@ -486,7 +494,7 @@ class DocumentProcessor:
         for line in lines:
             line = line.strip()
             if line and len(line) < 100 and not line.endswith('.'):
-                if re.match(r'^[A-Z][A-Z\s\d]+$', line) or line.isupper():
+                if HEADING_PATTERN.match(line) or line.isupper():
                     structure['headings'].append(line)
         
         return structure
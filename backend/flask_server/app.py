@@ -42,20 +42,28 @@ import json
 import logging
 import threading
 import uuid
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 from werkzeug.utils import secure_filename
 from flask import Flask, request, jsonify, Response, stream_template, send_file
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+# Optional fast JSON encoding for streamed chat frames
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Add parent directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from chatbot.langchain_rag_chatbot import LangChainLegalRAGChatbot
 from document_processing.document_processor import DocumentProcessor
-from vector_db.vector_database import LegalVectorDatabase
+from vector_db.vector_database import LegalVectorDatabase, METADATA_CONTENT_CHARS
 from cross_reference_system import CrossReferenceSystem
 
 # Load environment variables from backend directory
@@ -125,6 +133,7 @@ def initialize_components():
             temperature=0.3,
             streaming=True  # Enable streaming for real-time responses
         )
+        chatbot.preload()  # Load the RAG system in the background
         logger.info("✅ Chatbot initialized")
         
         # Initialize cross-reference system
@@ -165,6 +174,16 @@ def process_document_background(task_id: str, filepath: str, metadata: Dict[str,
         
         # Check if processing was successful
         if result and 'chunk_count' in result:
+            # Extract cross-reference entities now rather than on every query
+            # that retrieves these chunks; keyed by the text search returns
+            if cross_ref_system and result.get('vector_db_indexed'):
+                try:
+                    cross_ref_system.precompute_entities([
+                        chunk['content'][:METADATA_CONTENT_CHARS] for chunk in result.get('chunks', [])
+                    ])
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not precompute entities for task {task_id}: {e}")
+            
             # Update task status to completed
             background_tasks[task_id]['status'] = 'completed'
             background_tasks[task_id]['progress'] = 100
@@ -210,6 +229,41 @@ def format_error_response(error: str, status_code: int = 400) -> Response:
         'status': 'error'
     }), status_code
 
+def prepare_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make a chatbot response JSON-ready before encoding.
+    
+    Raw search result objects are dropped and source document previews are
+    converted to plain dicts.
+    """
+    metadata = response.get('metadata')
+    if isinstance(metadata, dict):
+        metadata.pop('search_results', None)
+        if 'source_documents' in metadata:
+            metadata['source_documents'] = [asdict(doc) for doc in metadata['source_documents']]
+    return response
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as JSON bytes, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC)
+    return json.dumps(payload).encode('utf-8')
+
+def sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a server-sent event frame."""
+    return b"data: " + encode_json(payload) + b"\n\n"
+
+def response_frames(response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Split a complete chatbot response into one frame per section."""
+    metadata = response.get('metadata') or {}
+    yield {
+        'type': 'frame',
+        'kind': 'answer',
+        'data': {key: value for key, value in response.items() if key != 'metadata'}
+    }
+    for kind, payload in metadata.items():
+        yield {'type': 'frame', 'kind': kind, 'data': payload}
+
 def format_success_response(data: Dict[str, Any], message: str = "Success") -> Response:
     """Format success response."""
     return jsonify({
@@ -256,7 +310,7 @@ def chat():
             include_metadata=include_metadata
         )
         
-        return format_success_response(response, "Chat response generated successfully")
+        return format_success_response(prepare_response(response), "Chat response generated successfully")
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
@@ -264,7 +318,14 @@ def chat():
 
 @app.route('/api/chat/stream', methods=['POST'])
 def chat_stream():
-    """Streaming chat endpoint."""
+    """
+    Streaming chat endpoint.
+    
+    Sends server-sent events by default. With "format": "ndjson" the response
+    is newline-delimited JSON instead, and the final response arrives as one
+    frame per section (answer, search_quality, source_documents, ...) followed
+    by a bare complete message.
+    """
     
     if not chatbot:
         return format_error_response("Chatbot not initialized", 500)
@@ -279,6 +340,39 @@ def chat_stream():
         jurisdiction = data.get('jurisdiction', 'federal')
         include_metadata = data.get('include_metadata', True)
         
+        def generate_ndjson():
+            """Generate newline-delimited JSON, splitting the final response into frames."""
+            try:
+                for chunk in chatbot.ask_streaming(
+                    question=question,
+                    jurisdiction=jurisdiction,
+                    include_metadata=include_metadata
+                ):
+                    if chunk['type'] == 'sources':
+                        continue
+                    if chunk['type'] == 'complete':
+                        for frame in response_frames(prepare_response(chunk['response'])):
+                            yield encode_json(frame) + b"\n"
+                        yield encode_json({'type': 'complete'}) + b"\n"
+                    else:
+                        yield encode_json(chunk) + b"\n"
+                        
+            except Exception as e:
+                yield encode_json({
+                    'type': 'error',
+                    'response': {
+                        'error': str(e),
+                        'timestamp': datetime.now().isoformat()
+                    }
+                }) + b"\n"
+        
+        if data.get('format') == 'ndjson':
+            return Response(
+                generate_ndjson(),
+                mimetype='application/x-ndjson',
+                headers={'Cache-Control': 'no-cache'}
+            )
+        
         def generate_stream():
             """Generate streaming response with slower typing animation."""
             import time
@@ -295,14 +389,18 @@ def chat_stream():
                         for char in content:
                             char_chunk = {
                                 'type': 'content',
-                                'content': char,
-                                'full_answer': chunk.get('full_answer', '')
+                                'content': char
                             }
-                            yield f"data: {json.dumps(char_chunk)}\n\n"
+                            yield sse_event(char_chunk)
                             time.sleep(0.03)  # 30ms delay between characters for slower typing
+                    elif chunk['type'] == 'sources':
+                        # Raw search results are for in-process consumers only
+                        continue
                     else:
                         # For non-content chunks (complete, error, etc.), send immediately
-                        yield f"data: {json.dumps(chunk)}\n\n"
+                        if chunk['type'] == 'complete':
+                            prepare_response(chunk['response'])
+                        yield sse_event(chunk)
                         
             except Exception as e:
                 error_chunk = {
@@ -312,7 +410,7 @@ def chat_stream():
                         'timestamp': datetime.now().isoformat()
                     }
                 }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
+                yield sse_event(error_chunk)
         
         return Response(
             generate_stream(),
@@ -25,7 +25,7 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple, Set
 from pathlib import Path
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
 import difflib
 
@@ -52,6 +52,9 @@ class SearchResult:
     jurisdiction: str
     law_status: str  # 'current', 'superseded', 'pending'
     document_type: str
+    dates: List[str] = field(default_factory=list)
+    file_name: str = 'Unknown'
+    section: str = 'Unknown'
 
 @dataclass
 class QueryEnhancement:
@@ -461,7 +464,10 @@ class HybridSearchEngine:
                 citation_chain=citation_chain,
                 jurisdiction=doc_jurisdiction,
                 law_status=law_status,
-                document_type=metadata.get('chunk_type', 'unknown')
+                document_type=metadata.get('chunk_type', 'unknown'),
+                dates=metadata.get('dates') or [],
+                file_name=metadata.get('file_name') or 'Unknown',
+                section=metadata.get('section') or 'Unknown'
             )
             
             scored_results.append(enhanced_result)
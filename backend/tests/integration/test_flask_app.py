@@ -16,7 +16,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the Flask app and related modules
-from flask_server.app import app, format_success_response, format_error_response
+from flask_server.app import app, format_success_response, format_error_response, prepare_response, response_frames
+from chatbot.chatbot_hot import SourceDocPreview
 from chatbot.langchain_rag_chatbot import LangChainLegalRAGChatbot
 from document_processing.document_processor import DocumentProcessor
 
@@ -158,6 +159,141 @@ class TestUtilityFunctions(unittest.TestCase):
         self.assertEqual(response['error'], error_message)
         self.assertEqual(response['status_code'], 500)
 
+class TestChatStreamFrames(unittest.TestCase):
+    """Test cases for the streaming chat endpoint's SSE and NDJSON frames"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = app.test_client()
+        self.app.testing = True
+        
+    def make_source_doc(self):
+        """Build a source document preview as the chatbot attaches it"""
+        return SourceDocPreview(
+            source_number=1,
+            relevance_score=0.91,
+            document_type='statute',
+            jurisdiction='federal',
+            law_status='current',
+            content_preview='A governmental entity may require disclosure...',
+            citations=('18 U.S.C. 2703',),
+            dates=('1/15/2024',),
+            file_name='stored_communications.pdf',
+            original_file_name='stored_communications.pdf',
+            module_title='Stored Communications Act',
+            section='2703'
+        )
+        
+    def make_response(self):
+        """Build a complete chatbot response with raw search results in its metadata"""
+        return {
+            'question': 'What does 18 U.S.C. 2703 say?',
+            'answer': 'Hi',
+            'confidence_score': 0.9,
+            'metadata': {
+                'search_quality': {'total_results': 1},
+                'search_results': [object()],  # Not JSON serializable
+                'source_documents': [self.make_source_doc()]
+            }
+        }
+        
+    def make_chunks(self):
+        """Build the chunks ask_streaming yields for one question"""
+        response = self.make_response()
+        return [
+            {'type': 'sources', 'search_results': response['metadata']['search_results']},
+            {'type': 'content', 'content': 'Hi'},
+            {'type': 'complete', 'response': response}
+        ]
+        
+    def test_prepare_response(self):
+        """Test that search results are stripped and source documents serialized"""
+        response = prepare_response(self.make_response())
+        
+        self.assertNotIn('search_results', response['metadata'])
+        self.assertEqual(response['metadata']['source_documents'][0]['citations'], ('18 U.S.C. 2703',))
+        self.assertEqual(response['metadata']['source_documents'][0]['file_name'], 'stored_communications.pdf')
+        
+    def test_response_frames(self):
+        """Test that a response is split into an answer frame and one frame per metadata section"""
+        frames = list(response_frames(prepare_response(self.make_response())))
+        
+        self.assertEqual([frame['kind'] for frame in frames], ['answer', 'search_quality', 'source_documents'])
+        self.assertTrue(all(frame['type'] == 'frame' for frame in frames))
+        self.assertNotIn('metadata', frames[0]['data'])
+        self.assertEqual(frames[0]['data']['answer'], 'Hi')
+        self.assertEqual(frames[1]['data'], {'total_results': 1})
+        
+    @patch('flask_server.app.chatbot')
+    def test_sse_frames(self, mock_chatbot):
+        """Test the server-sent event frames of the default stream format"""
+        mock_chatbot.ask_streaming.return_value = iter(self.make_chunks())
+        
+        response = self.app.post('/api/chat/stream',
+                                json={'question': 'What does 18 U.S.C. 2703 say?'},
+                                content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.endswith('\n\n'))
+        events = [json.loads(frame[len('data: '):]) for frame in body.split('\n\n') if frame]
+        
+        # Sources are dropped and content is sent one character per event
+        self.assertEqual(events[:2], [{'type': 'content', 'content': 'H'}, {'type': 'content', 'content': 'i'}])
+        self.assertEqual(len(events), 3)
+        
+        complete = events[2]
+        self.assertEqual(complete['type'], 'complete')
+        self.assertEqual(complete['response']['answer'], 'Hi')
+        self.assertNotIn('search_results', complete['response']['metadata'])
+        self.assertEqual(complete['response']['metadata']['source_documents'][0]['citations'], ['18 U.S.C. 2703'])
+        
+    @patch('flask_server.app.chatbot')
+    def test_ndjson_frames(self, mock_chatbot):
+        """Test the newline-delimited JSON frames of the ndjson stream format"""
+        mock_chatbot.ask_streaming.return_value = iter(self.make_chunks())
+        
+        response = self.app.post('/api/chat/stream',
+                                json={'question': 'What does 18 U.S.C. 2703 say?', 'format': 'ndjson'},
+                                content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.endswith('\n'))
+        lines = [json.loads(line) for line in body.splitlines()]
+        
+        self.assertEqual(lines[0], {'type': 'content', 'content': 'Hi'})
+        self.assertEqual(
+            [(line['type'], line.get('kind')) for line in lines[1:]],
+            [('frame', 'answer'), ('frame', 'search_quality'), ('frame', 'source_documents'), ('complete', None)]
+        )
+        self.assertEqual(lines[1]['data']['answer'], 'Hi')
+        self.assertNotIn('metadata', lines[1]['data'])
+        self.assertEqual(lines[3]['data'][0]['section'], '2703')
+        self.assertEqual(lines[3]['data'][0]['citations'], ['18 U.S.C. 2703'])
+        self.assertEqual(lines[4], {'type': 'complete'})
+        
+    @patch('flask_server.app.chatbot')
+    def test_ndjson_error_frame(self, mock_chatbot):
+        """Test that a failure mid-stream ends the stream with an error frame"""
+        def failing_stream(**kwargs):
+            yield {'type': 'content', 'content': 'Hi'}
+            raise RuntimeError('LLM unavailable')
+        mock_chatbot.ask_streaming.side_effect = failing_stream
+        
+        response = self.app.post('/api/chat/stream',
+                                json={'question': 'What does 18 U.S.C. 2703 say?', 'format': 'ndjson'},
+                                content_type='application/json')
+        
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1]['type'], 'error')
+        self.assertEqual(lines[1]['response']['error'], 'LLM unavailable')
+
 class TestChatbotIntegration(unittest.TestCase):
     """Integration tests for chatbot functionality"""
     
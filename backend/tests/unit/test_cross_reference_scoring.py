@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cross-reference similarity scoring.
+"""
+
+import unittest
+import itertools
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from pinecone import ScoredVector
+import cross_reference_system
+from cross_reference_system import CrossReferenceSystem, _entity_sets, _content_key, _read_store
+
+def set_based_score(doc1_entities, doc2_entities):
+    """Reference score computed with plain set intersections, as originally implemented."""
+    score = 0.0
+    total_weight = 0.0
+
+    for field, weight in (('locations', 0.2), ('citations', 0.2), ('keywords', 0.4)):
+        if doc1_entities[field] and doc2_entities[field]:
+            common = set(doc1_entities[field]) & set(doc2_entities[field])
+            score += weight * (len(common) / max(len(doc1_entities[field]), len(doc2_entities[field])))
+        total_weight += weight
+
+    date_weight = 0.15
+    if doc1_entities['dates'] and doc2_entities['dates']:
+        try:
+            dates1 = [datetime.strptime(d, '%m/%d/%Y') for d in doc1_entities['dates'] if '/' in d]
+            dates2 = [datetime.strptime(d, '%m/%d/%Y') for d in doc2_entities['dates'] if '/' in d]
+            if dates1 and dates2:
+                min_diff = min(abs((d1 - d2).days) for d1 in dates1 for d2 in dates2)
+                if min_diff <= 30:
+                    score += date_weight * (1 - min_diff / 30)
+        except ValueError:
+            pass
+    total_weight += date_weight
+
+    name_weight = 0.1
+    if doc1_entities['names'] and doc2_entities['names']:
+        common = set(doc1_entities['names']) & set(doc2_entities['names'])
+        score += name_weight * (len(common) / max(len(doc1_entities['names']), len(doc2_entities['names'])))
+    total_weight += name_weight
+
+    return score / total_weight
+
+class TestSimilarityScore(unittest.TestCase):
+    """Test cases for CrossReferenceSystem.calculate_similarity_score."""
+
+    def setUp(self):
+        """Set up a cross-reference system over a mocked vector database."""
+        self.system = CrossReferenceSystem(vector_db=MagicMock())
+        texts = [
+            "In Dane County, Wisconsin, Officer Johnson responded to a domestic violence call on 1/15/2024 "
+            "under Wisconsin Statute 940.19.",
+            "Milwaukee police training on use of force and probable cause, updated 1/20/2024.",
+            "The court in Roe v. Wade, 410 U.S. 113, addressed privacy; see also 12 Wis. 2d 45.",
+            "Dane County DUI enforcement policy, Wisconsin Statute 346.63, effective 2/1/2024 in Madison, WI.",
+            "Officer Johnson testified in Dane County about the 1/15/2024 domestic violence arrest.",
+            "A document with an invalid date 13/45/2020 and Milwaukee City ordinance 9.12.",
+            "",
+        ]
+        self.entities = [self.system.extract_entities(text) for text in texts]
+
+    def test_matches_set_based_score(self):
+        """Test that scores equal the set-intersection reference for every pair."""
+        for doc1, doc2 in itertools.product(self.entities, repeat=2):
+            self.assertAlmostEqual(
+                self.system.calculate_similarity_score(doc1, doc2),
+                set_based_score(doc1, doc2),
+                places=12
+            )
+
+    def test_precomputed_sets_match(self):
+        """Test that passing precomputed entity sets gives the same score."""
+        for doc1, doc2 in itertools.product(self.entities, repeat=2):
+            self.assertEqual(
+                self.system.calculate_similarity_score(doc1, doc2, _entity_sets(doc1), _entity_sets(doc2)),
+                self.system.calculate_similarity_score(doc1, doc2)
+            )
+
+    def test_threshold_only_drops_scores_below_it(self):
+        """Test that the early exit never discards a score that reaches the threshold."""
+        for threshold in (0.1, 0.3, 0.5):
+            for doc1, doc2 in itertools.product(self.entities, repeat=2):
+                full = self.system.calculate_similarity_score(doc1, doc2)
+                early = self.system.calculate_similarity_score(doc1, doc2, threshold=threshold)
+                if full >= threshold:
+                    self.assertEqual(early, full)
+
+class TestPrecomputedEntities(unittest.TestCase):
+    """Test cases for reusing ingest-time entities for search results."""
+
+    def setUp(self):
+        """Set up a cross-reference system whose entity store holds one match's text."""
+        self.match_text = "Milwaukee police training on probable cause, updated 1/20/2024."
+        self.query_text = "Officer Johnson in Dane County established probable cause under 940.19."
+
+        # Deliberately different from what extraction would return for the text
+        self.stored_entities = {
+            'locations': ['Dane County'],
+            'citations': ['940.19'],
+            'dates': [],
+            'names': ['Officer Johnson'],
+            'keywords': ['probable cause', 'officer']
+        }
+
+        self.vector_db = MagicMock()
+        self.vector_db.search_legal_documents.return_value = [
+            ScoredVector(
+                id='doc-2',
+                score=0.8,
+                metadata={'content': self.match_text, 'file_name': 'training.pdf', 'section': '1.2'}
+            )
+        ]
+        self.system = CrossReferenceSystem(vector_db=self.vector_db)
+        self.system._entity_store = {_content_key(self.match_text): self.stored_entities}
+
+    def test_find_cross_references_uses_stored_entities(self):
+        """Test that a Pinecone match's metadata text is looked up in the entity store."""
+        with patch.object(self.system, 'extract_entities', wraps=self.system.extract_entities) as extract:
+            cross_refs = self.system.find_cross_references('doc-1', self.query_text)
+
+        # Only the query itself is extracted
+        extract.assert_called_once_with(self.query_text)
+        self.assertEqual(len(cross_refs), 1)
+        self.assertEqual(cross_refs[0]['document_id'], 'doc-2')
+        self.assertEqual(cross_refs[0]['file_name'], 'training.pdf')
+        self.assertEqual(cross_refs[0]['common_entities']['citations'], ['940.19'])
+        self.assertEqual(cross_refs[0]['common_entities']['names'], ['Officer Johnson'])
+
+    def test_suggestions_use_stored_entities(self):
+        """Test that suggestions score a Pinecone match with its stored entities."""
+        with patch.object(self.system, 'extract_entities', wraps=self.system.extract_entities) as extract:
+            suggestions = self.system.suggest_related_content(self.query_text)
+
+        extract.assert_called_once_with(self.query_text)
+        self.assertEqual([suggestion['document_id'] for suggestion in suggestions], ['doc-2'])
+        self.assertIn('940.19', suggestions[0]['why_relevant'])
+
+class TestEntityStore(unittest.TestCase):
+    """Test cases for persisting ingest-time entities."""
+
+    def setUp(self):
+        """Point the entity store at a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        directory = Path(self.temp_dir.name)
+        self.msgpack_path = directory / "entities.msgpack"
+        self.json_path = directory / "entities.json"
+        self.patches = [
+            patch.object(cross_reference_system, 'ENTITY_STORE_MSGPACK', self.msgpack_path),
+            patch.object(cross_reference_system, 'ENTITY_STORE_JSON', self.json_path),
+            patch.object(cross_reference_system, 'ENTITY_STORE_SIZE', 5),
+        ]
+        for active in self.patches:
+            active.start()
+        self.system = CrossReferenceSystem(vector_db=MagicMock())
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        for active in self.patches:
+            active.stop()
+        self.temp_dir.cleanup()
+
+    def saved_store(self):
+        return _read_store(self.msgpack_path, self.json_path)
+
+    def test_store_is_bounded(self):
+        """Test that only the most recently added texts are kept and saved."""
+        texts = [f"Wisconsin Statute 940.{i} applies in Dane County." for i in range(8)]
+        self.assertEqual(self.system.precompute_entities(texts[:3]), 3)
+        self.assertEqual(self.system.precompute_entities(texts[3:]), 5)
+        self.assertEqual(self.system.precompute_entities(texts[5:]), 0)
+
+        saved = self.saved_store()
+        self.assertEqual(list(saved), [_content_key(text) for text in texts[3:]])
+        self.assertEqual(saved[_content_key(texts[7])], self.system.extract_entities(texts[7]))
+
+    def test_concurrent_saves(self):
+        """Test that concurrent ingests leave a complete store and no temp files."""
+        def ingest(worker):
+            self.system.precompute_entities([f"Policy {worker}.{i} for Milwaukee officers." for i in range(3)])
+
+        threads = [threading.Thread(target=ingest, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.saved_store(), self.system._get_entity_store())
+        self.assertEqual(len(self.saved_store()), 5)
+        store_path = self.msgpack_path if cross_reference_system.MSGPACK_AVAILABLE else self.json_path
+        self.assertEqual(list(Path(self.temp_dir.name).iterdir()), [store_path])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the document chunker.
+
+The chunker's scanning and buffering were rewritten for speed. These tests
+fuzz it against a plain reference implementation of the original algorithm.
+"""
+
+import unittest
+import copy
+import random
+import re
+from unittest.mock import patch
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from document_processing import document_chunker
+from document_processing.document_chunker import DocumentChunker
+
+# Lines the random documents are built from, chosen to hit every boundary and metadata pattern
+SAMPLE_LINES = [
+    "CHAPTER 3. General Provisions",
+    "chapter IV rules",
+    "1.2 Use of force",
+    "1.2.3 Deadly force",
+    "(a) First item",
+    "(2) Second",
+    "Smith v. Maryland, 442US 735",
+    "OPINION OF THE COURT",
+    "DISSENT",
+    "concurrence here",
+    "See also 18 U.S.C. 2703.",
+    "Cf. Katz",
+    "Filed 1/15/2024 and 2024-01-15.",
+    "Docket No. 21-1234",
+    "Case No 55-A",
+    "Supreme Court of Wisconsin",
+    "Policy No. AB-12 applies",
+    "Module 1 Basics",
+    "Lesson 2",
+    "Learning objective: know the law.",
+    "KEY TERMS",
+    "This is a sentence. Another one here. And more",
+    "Long text " * 30 + ". End of it. Yes.",
+    "",
+    "   ",
+    "The officer used 940.19 and 1.1A statutes.",
+    "goal outcome",
+    "Topic 7 x",
+    "x. " * 40,
+    "Paragraph one.\n\nParagraph two.",
+    "Mr. Jones v. State.",
+]
+
+# (chunk_size, chunk_overlap) pairs, from the default down to sizes that split most lines
+CHUNK_SIZES = [(1000, 200), (200, 50), (80, 30)]
+
+DOCUMENT_TYPES = ['case_law', 'policy', 'training', 'general']
+
+def random_documents(count, seed):
+    """Generate random documents from the sample lines."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "\n".join(rng.choice(SAMPLE_LINES) for _ in range(rng.randint(0, 80)))
+
+class ReferenceChunker:
+    """
+    The chunking algorithm as originally written.
+
+    With snapshot_overflow=False, chunks cut off mid-section share their
+    metadata lists with the rest of the section, as the original did; with
+    snapshot_overflow=True they keep the references seen up to the cut.
+    """
+
+    def __init__(self, chunk_size, chunk_overlap, snapshot_overflow=True):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.snapshot_overflow = snapshot_overflow
+
+    def chunk_document(self, text_content, document_type):
+        if document_type == 'case_law':
+            return self._chunk_lines(
+                text_content, 'case_law_section', None,
+                {'section_type': '', 'statute_numbers': [], 'case_citations': [], 'dates': []},
+                self._case_law_boundary, self._case_law_update, '. '
+            )
+        if document_type == 'policy':
+            return self._chunk_lines(
+                text_content, 'policy_section', 'section',
+                {'section_number': '', 'section_title': '', 'policy_numbers': [], 'dates': []},
+                self._policy_boundary, self._policy_update, '\n\n'
+            )
+        if document_type == 'training':
+            return self._chunk_lines(
+                text_content, 'training_module', 'module',
+                {'module_title': '', 'learning_objectives': [], 'key_terms': []},
+                self._training_boundary, self._training_update, '. '
+            )
+        return self._chunk_general(text_content)
+
+    def _chunk_lines(self, text_content, chunk_type, context_key, metadata,
+                     boundary, update_metadata, separator):
+        chunks = []
+        lines = text_content.split('\n')
+        current_chunk = ""
+        current_context = None
+
+        def emit(content, chunk_metadata, start_line, end_line):
+            chunk = {'content': content, 'metadata': chunk_metadata, 'chunk_type': chunk_type,
+                     'start_line': start_line, 'end_line': end_line}
+            if context_key:
+                chunk[context_key] = current_context
+            chunks.append(chunk)
+
+        overflow_copy = copy.deepcopy if self.snapshot_overflow else dict.copy
+
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+
+            section = boundary(line)
+            if section:
+                if current_chunk.strip():
+                    emit(current_chunk.strip(), metadata.copy(), i - len(current_chunk.split('\n')), i - 1)
+                current_chunk = line + '\n'
+                metadata, current_context = section
+                continue
+
+            current_chunk += line + '\n'
+            update_metadata(metadata, line)
+
+            if len(current_chunk) > self.chunk_size:
+                parts = current_chunk.split(separator)
+                if len(parts) > 1:
+                    overlap_text = parts[-1] if len(parts[-1]) < self.chunk_overlap else ""
+                    chunk_content = separator.join(parts[:-1])
+                    if separator == '. ':
+                        chunk_content += '.'
+                    emit(chunk_content.strip(), overflow_copy(metadata),
+                         i - len(chunk_content.split('\n')), i - 1)
+                    current_chunk = overlap_text + ('\n\n' if separator == '\n\n' else '\n') + line + '\n'
+                else:
+                    emit(current_chunk.strip(), overflow_copy(metadata), i - len(current_chunk.split('\n')), i - 1)
+                    current_chunk = line + '\n'
+
+        if current_chunk.strip():
+            emit(current_chunk.strip(), metadata, len(lines) - len(current_chunk.split('\n')), len(lines) - 1)
+
+        return chunks
+
+    def _case_law_boundary(self, line):
+        if re.match(r'^(OPINION|DISSENT|CONCURRENCE)', line, re.IGNORECASE):
+            return {
+                'section_type': line,
+                'statute_numbers': self._statute_numbers(line),
+                'case_citations': self._case_citations(line),
+                'dates': self._dates(line)
+            }, None
+        return None
+
+    def _case_law_update(self, metadata, line):
+        metadata['statute_numbers'].extend(self._statute_numbers(line))
+        metadata['case_citations'].extend(self._case_citations(line))
+        metadata['dates'].extend(self._dates(line))
+
+    def _policy_boundary(self, line):
+        match = re.match(r'^(\d+\.\d+)\s+(.+)$', line, re.IGNORECASE)
+        if match:
+            return {
+                'section_number': match.group(1),
+                'section_title': match.group(2),
+                'policy_numbers': self._policy_numbers(line),
+                'dates': self._dates(line)
+            }, {'number': match.group(1), 'title': match.group(2)}
+        return None
+
+    def _policy_update(self, metadata, line):
+        metadata['policy_numbers'].extend(self._policy_numbers(line))
+        metadata['dates'].extend(self._dates(line))
+
+    def _training_boundary(self, line):
+        if re.search(r'^(Module|Topic|Chapter|Lesson)\s+\d+', line, re.IGNORECASE):
+            return {'module_title': line, 'learning_objectives': [], 'key_terms': []}, line
+        return None
+
+    def _training_update(self, metadata, line):
+        if re.search(r'objective|outcome|goal', line, re.IGNORECASE):
+            metadata['learning_objectives'].append(line)
+        if re.search(r'^[A-Z][A-Z\s]+$', line):
+            metadata['key_terms'].append(line)
+
+    def _chunk_general(self, text_content):
+        chunks = []
+        if document_chunker.NLTK_AVAILABLE:
+            import nltk
+            sentences = nltk.sent_tokenize(text_content)
+        else:
+            sentences = text_content.split('. ')
+
+        current_chunk = ""
+        metadata = {'statute_numbers': [], 'dates': []}
+
+        for sentence in sentences:
+            if len(current_chunk) + len(sentence) > self.chunk_size:
+                if current_chunk.strip():
+                    chunks.append({'content': current_chunk.strip(), 'metadata': metadata.copy(),
+                                   'chunk_type': 'general', 'start_line': 0, 'end_line': 0})
+                overlap_sentences = current_chunk.split('. ')[-2:] if len(current_chunk.split('. ')) > 1 else []
+                current_chunk = '. '.join(overlap_sentences) + '. ' + sentence + '. '
+            else:
+                current_chunk += sentence + '. '
+
+            metadata['statute_numbers'] = self._statute_numbers(sentence)
+            metadata['dates'] = self._dates(sentence)
+
+        if current_chunk.strip():
+            chunks.append({'content': current_chunk.strip(), 'metadata': metadata,
+                           'chunk_type': 'general', 'start_line': 0, 'end_line': 0})
+
+        return chunks
+
+    def _statute_numbers(self, text):
+        return re.findall(r'(\d+\.\d+[A-Z]*|\d+\s+U\.S\.C\.\s+\d+)', text, re.IGNORECASE)
+
+    def _case_citations(self, text):
+        return re.findall(r'([A-Z][a-z]+\s+v\.\s+[A-Z][a-z]+,\s+\d+[A-Z]+\s+\d+)', text, re.IGNORECASE)
+
+    def _dates(self, text):
+        return re.findall(r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})', text, re.IGNORECASE)
+
+    def _policy_numbers(self, text):
+        return re.findall(r'Policy\s+No\.?\s*([A-Z0-9\-]+)', text, re.IGNORECASE)
+
+def punkt_available():
+    """Whether NLTK and its Punkt sentence tokenizer data are installed."""
+    if not document_chunker.NLTK_AVAILABLE:
+        return False
+    try:
+        document_chunker._punkt_tokenizer()
+        return True
+    except LookupError:
+        return False
+
+class TestChunkerEquivalence(unittest.TestCase):
+    """Fuzz DocumentChunker against the reference implementation."""
+
+    DOCUMENTS_PER_SIZE = 150
+
+    def assert_matches_reference(self, document_types):
+        for chunk_size, chunk_overlap in CHUNK_SIZES:
+            chunker = DocumentChunker(chunk_size, chunk_overlap)
+            reference = ReferenceChunker(chunk_size, chunk_overlap)
+            for document in random_documents(self.DOCUMENTS_PER_SIZE, seed=chunk_size):
+                for document_type in document_types:
+                    with self.subTest(chunk_size=chunk_size, document_type=document_type, document=document):
+                        self.assertEqual(
+                            chunker.chunk_document(document, document_type),
+                            reference.chunk_document(document, document_type)
+                        )
+
+    def test_line_chunkers_match_reference(self):
+        """Test that case law, policy and training chunks match the reference exactly."""
+        self.assert_matches_reference(['case_law', 'policy', 'training'])
+
+    def test_general_chunker_matches_reference_without_nltk(self):
+        """Test that general chunks match the reference on the '. ' split fallback."""
+        with patch.object(document_chunker, 'NLTK_AVAILABLE', False):
+            self.assert_matches_reference(['general'])
+
+    def test_general_chunker_matches_reference_with_nltk(self):
+        """Test that general chunks match the reference with NLTK sentence splitting."""
+        if not punkt_available():
+            self.skipTest("NLTK Punkt data not installed")
+        self.assert_matches_reference(['general'])
+
+    def test_overflow_metadata_is_prefix_of_original(self):
+        """Test that only overflow chunk metadata differs from the original, as a prefix of its lists."""
+        for chunk_size, chunk_overlap in CHUNK_SIZES:
+            chunker = DocumentChunker(chunk_size, chunk_overlap)
+            original = ReferenceChunker(chunk_size, chunk_overlap, snapshot_overflow=False)
+            for document in random_documents(self.DOCUMENTS_PER_SIZE, seed=chunk_size + 1):
+                for document_type in ['case_law', 'policy', 'training']:
+                    chunks = chunker.chunk_document(document, document_type)
+                    expected = original.chunk_document(document, document_type)
+                    self.assertEqual(len(chunks), len(expected))
+                    for chunk, original_chunk in zip(chunks, expected):
+                        metadata = chunk.pop('metadata')
+                        original_metadata = original_chunk.pop('metadata')
+                        self.assertEqual(chunk, original_chunk)
+                        self.assertEqual(metadata.keys(), original_metadata.keys())
+                        for key, value in metadata.items():
+                            if isinstance(value, list):
+                                self.assertEqual(value, original_metadata[key][:len(value)])
+                            else:
+                                self.assertEqual(value, original_metadata[key])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the chatbot's retrieval cache.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from chatbot.langchain_rag_chatbot import LangChainLegalRAGChatbot
+from rag_system.advanced_rag_system import AdvancedLegalRAG
+
+class TestRetrievalCache(unittest.TestCase):
+    """Test cases for LangChainLegalRAGChatbot.ask_question_cached."""
+
+    def setUp(self):
+        """Build a fresh chatbot over a mocked vector database."""
+        self.vector_db = MagicMock()
+        self.vector_db.search_legal_documents.return_value = []
+        self.vector_db.search_by_statute.return_value = []
+        self.vector_db.search_by_case_citation.return_value = []
+
+        # The chatbot is a singleton; start each test from a new instance
+        self._saved_instance = LangChainLegalRAGChatbot._instance
+        LangChainLegalRAGChatbot._instance = None
+        self.chatbot = LangChainLegalRAGChatbot(
+            openai_api_key="test-key",
+            cache_retrieval=True,
+            rag_system=AdvancedLegalRAG(self.vector_db)
+        )
+
+    def tearDown(self):
+        """Restore the previous singleton."""
+        LangChainLegalRAGChatbot._instance = self._saved_instance
+
+    def test_citations_reach_filters_with_original_case(self):
+        """Test that citation and statute filters see the question as asked."""
+        question = "What did Smith v. Maryland say about 18 U.S.C. 2703?"
+        result = self.chatbot.ask_question_cached(question, "federal")
+
+        self.vector_db.search_by_case_citation.assert_called_with("Smith v. Maryland", top_k=5)
+        self.vector_db.search_by_statute.assert_called_with("18 U.S.C. 2703", top_k=5)
+        self.assertEqual(result['question'], question)
+
+    def test_normalized_repeat_hits_cache(self):
+        """Test that a repeat differing only in case and whitespace reuses the first result."""
+        question = "What did Smith v. Maryland say about 18 U.S.C. 2703?"
+        first = self.chatbot.ask_question_cached(question, "federal")
+        second = self.chatbot.ask_question_cached(f"  {question.lower()} ", "federal")
+
+        self.assertIs(second, first)
+        self.assertEqual(self.vector_db.search_legal_documents.call_count, 1)
+
+    def test_cache_keyed_by_jurisdiction_and_max_results(self):
+        """Test that other jurisdictions and result counts run their own retrieval."""
+        question = "What is probable cause?"
+        self.chatbot.ask_question_cached(question, "federal")
+        self.chatbot.ask_question_cached(question, "wisconsin")
+        self.chatbot.ask_question_cached(question, "federal", max_results=3)
+
+        self.assertEqual(self.vector_db.search_legal_documents.call_count, 3)
+
+    def test_clear_retrieval_cache(self):
+        """Test that clearing the cache forces a new retrieval."""
+        question = "What is probable cause?"
+        self.chatbot.ask_question_cached(question, "federal")
+        self.chatbot.clear_retrieval_cache()
+        self.chatbot.ask_question_cached(question, "federal")
+
+        self.assertEqual(self.vector_db.search_legal_documents.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the semantic response cache.
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from chatbot.semantic_cache import SemanticResponseCache
+
+class StubEmbedder:
+    """Embedding model stand-in mapping known questions to fixed unit vectors."""
+
+    VECTORS = {
+        "what is probable cause?": [1.0, 0.0, 0.0],
+        "what does probable cause mean?": [0.99, 0.141, 0.0],
+        "when is a warrant required?": [0.0, 1.0, 0.0],
+        "what is excessive force?": [0.0, 0.0, 1.0],
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, normalize_embeddings=True):
+        self.calls += 1
+        vector = np.array(self.VECTORS[text.lower()], dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+def make_response(question, answer="An answer."):
+    """Build a minimal chatbot response."""
+    return {
+        'question': question,
+        'answer': answer,
+        'timestamp': '2024-01-01T00:00:00',
+        'metadata': {'prompt_type': 'general', 'warnings': ['low_confidence']}
+    }
+
+class TestSemanticResponseCache(unittest.TestCase):
+    """Test cases for SemanticResponseCache."""
+
+    def setUp(self):
+        """Set up a cache over the stub embedder."""
+        self.embedder = StubEmbedder()
+        self.cache = SemanticResponseCache(self.embedder, threshold=0.95, max_entries=2)
+
+    def store(self, question, jurisdiction="federal", answer="An answer."):
+        self.cache.store(self.cache.embed(question), jurisdiction, make_response(question, answer))
+
+    def test_paraphrase_hit(self):
+        """Test that a question above the similarity threshold returns the cached answer."""
+        self.store("What is probable cause?", answer="Cached.")
+        response = self.cache.lookup(self.cache.embed("What does probable cause mean?"), "federal")
+
+        self.assertIsNotNone(response)
+        self.assertEqual(response['answer'], "Cached.")
+        self.assertNotEqual(response['timestamp'], '2024-01-01T00:00:00')
+
+    def test_exact_text_hit_skips_embedding(self):
+        """Test that an exact repeat after normalization is found without embedding."""
+        self.store("What is probable cause?", answer="Cached.")
+        calls = self.embedder.calls
+        response = self.cache.lookup_text("  what is   PROBABLE cause? ", "federal")
+
+        self.assertEqual(response['answer'], "Cached.")
+        self.assertEqual(self.embedder.calls, calls)
+
+    def test_miss_below_threshold(self):
+        """Test that an unrelated question misses."""
+        self.store("What is probable cause?")
+
+        self.assertIsNone(self.cache.lookup(self.cache.embed("When is a warrant required?"), "federal"))
+        self.assertIsNone(self.cache.lookup_text("When is a warrant required?", "federal"))
+
+    def test_miss_other_jurisdiction(self):
+        """Test that entries only match questions from the same jurisdiction."""
+        self.store("What is probable cause?", jurisdiction="wisconsin")
+
+        self.assertIsNone(self.cache.lookup(self.cache.embed("What is probable cause?"), "federal"))
+        self.assertIsNone(self.cache.lookup_text("What is probable cause?", "federal"))
+
+    def test_miss_on_empty_cache(self):
+        """Test that lookups on an empty cache return None."""
+        self.assertIsNone(self.cache.lookup(self.cache.embed("What is probable cause?"), "federal"))
+
+    def test_ttl_expiry(self):
+        """Test that entries older than the TTL are dropped."""
+        cache = SemanticResponseCache(self.embedder, ttl=60)
+        q_vec = cache.embed("What is probable cause?")
+        with patch('chatbot.semantic_cache.time.time', return_value=1000.0):
+            cache.store(q_vec, "federal", make_response("What is probable cause?"))
+
+        with patch('chatbot.semantic_cache.time.time', return_value=1059.0):
+            self.assertIsNotNone(cache.lookup(q_vec, "federal"))
+
+        with patch('chatbot.semantic_cache.time.time', return_value=1061.0):
+            self.assertIsNone(cache.lookup(q_vec, "federal"))
+            self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when the cache is full."""
+        self.store("What is probable cause?")
+        self.store("When is a warrant required?")
+
+        # Touch the oldest entry so the warrant question becomes least recently used
+        self.assertIsNotNone(self.cache.lookup_text("What is probable cause?", "federal"))
+        self.store("What is excessive force?")
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNotNone(self.cache.lookup_text("What is probable cause?", "federal"))
+        self.assertIsNotNone(self.cache.lookup_text("What is excessive force?", "federal"))
+        self.assertIsNone(self.cache.lookup_text("When is a warrant required?", "federal"))
+
+    def test_store_replaces_same_question(self):
+        """Test that storing the same question again replaces the older answer."""
+        self.store("What is probable cause?", answer="Old.")
+        self.store("What is probable cause?", answer="New.")
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.lookup_text("What is probable cause?", "federal")['answer'], "New.")
+
+    def test_deepcopy_isolation(self):
+        """Test that neither stored nor returned responses alias the cached entry."""
+        response = make_response("What is probable cause?", answer="Cached.")
+        self.cache.store(self.cache.embed("What is probable cause?"), "federal", response)
+
+        # Mutating the caller's response after storing leaves the cache untouched
+        response['answer'] = "Changed by caller."
+        response['metadata']['warnings'].append('outdated')
+
+        first = self.cache.lookup_text("What is probable cause?", "federal")
+        self.assertEqual(first['answer'], "Cached.")
+        self.assertEqual(first['metadata']['warnings'], ['low_confidence'])
+
+        # Mutating a returned response does not leak into later hits
+        first['answer'] = "Changed by reader."
+        first['metadata']['warnings'].clear()
+
+        second = self.cache.lookup_text("What is probable cause?", "federal")
+        self.assertEqual(second['answer'], "Cached.")
+        self.assertEqual(second['metadata']['warnings'], ['low_confidence'])
+
+    def test_clear(self):
+        """Test that clear drops every entry."""
+        self.store("What is probable cause?")
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNone(self.cache.lookup_text("What is probable cause?", "federal"))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -34,6 +34,9 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Characters of chunk text stored in (and returned from) vector metadata
+METADATA_CONTENT_CHARS = 1000
+
 class LegalVectorDatabase:
     """
     Pinecone vector database handler optimized for legal documents.
@@ -195,7 +198,7 @@ class LegalVectorDatabase:
                 metadata = {
                     'document_id': document_id,
                     'chunk_type': chunk.get('chunk_type', 'general'),
-                    'content': chunk['content'][:1000],  # Truncate for metadata
+                    'content': chunk['content'][:METADATA_CONTENT_CHARS],  # Truncate for metadata
                     'chunk_index': i,
                     'total_chunks': len(chunks),
                     'start_line': chunk.get('start_line', 0),
@@ -325,6 +328,55 @@ class LegalVectorDatabase:
             logger.error(f"Failed to search documents: {e}")
             return []
     
+    def search_legal_documents_batch(self,
+                                     queries: List[str],
+                                     top_k: int = 10,
+                                     filter_metadata: Optional[Dict[str, Any]] = None,
+                                     include_metadata: bool = True) -> List[List[Dict[str, Any]]]:
+        """
+        Search legal documents for several queries, embedding them in one call.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            filter_metadata: Metadata filters applied to every query
+            include_metadata: Whether to include metadata in results
+            
+        Returns:
+            One list of search results per query, in query order
+        """
+        if not self.index:
+            raise RuntimeError("Pinecone index not initialized")
+        
+        if not queries:
+            return []
+        
+        try:
+            query_embeddings = self.create_embeddings(queries)
+        except Exception as e:
+            logger.error(f"Failed to embed search batch: {e}")
+            return [[] for _ in queries]
+        
+        filter_dict = None
+        if filter_metadata:
+            filter_dict = self._build_metadata_filter(filter_metadata)
+        
+        all_results = []
+        for query_embedding in query_embeddings:
+            try:
+                results = self.index.query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    filter=filter_dict,
+                    include_metadata=include_metadata
+                )
+                all_results.append(results.matches)
+            except Exception as e:
+                logger.error(f"Failed to search documents: {e}")
+                all_results.append([])
+        
+        return all_results
+    
     def _build_metadata_filter(self, filter_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
         Build Pinecone metadata filter from user-specified filters.